@@ -0,0 +1,460 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark for the Pinecone Memory MCP Server.
+
+Drives remember_many, remember_this, show_my_memories and recall_memory
+through the real tool dispatch (index.call_tool) with the in-process vector
+backend and the hashing embedder, so runs need no network or API keys and
+are reproducible. Each corpus size runs in a fresh process, which keeps the
+peak RSS figures separate.
+
+Usage:
+    python benchmarks/bench_server.py                                # 1k and 10k memories
+    python benchmarks/bench_server.py --sizes 1000,10000,100000,1000000 --store sqlite --dimension 384
+    python benchmarks/bench_server.py --output results.json
+    python benchmarks/bench_server.py --output new.json --compare results.json
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Callable, Awaitable
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+REPORT_VERSION = 1
+DEFAULT_SIZES = "1000,10000"
+DEFAULT_CONCURRENCY = "1,8,32"
+DEFAULT_OPERATIONS = 200
+DEFAULT_INGEST_BATCH = 1000
+
+# Vocabulary for the synthetic corpus; words are chosen to exercise keyword
+# extraction and every category
+ACTIONS = ["deploy", "review", "refactor", "document", "benchmark", "debug", "schedule", "test", "migrate", "plan"]
+SUBJECTS = [
+    "the payment service", "the login page", "our database schema", "the weekly report", "the mobile app",
+    "the search index", "the onboarding flow", "the billing API", "the team offsite", "the coffee order"
+]
+DETAILS = [
+    "before the release on friday", "with npm run build", "after the standup meeting", "using pytest -q",
+    "because latency doubled", "for the quarterly goals", "with the new staging credentials",
+    "when the cache is cold", "as discussed with the design team", "to cut cloud costs"
+]
+QUERY_WORDS = ACTIONS + ["payment", "login", "database", "report", "mobile", "search", "billing", "release", "cache"]
+
+
+def make_memory(rng: random.Random, number: int) -> Dict[str, str]:
+    """Build one synthetic memory; the number keeps every text unique."""
+    return {
+        "memory": f"{rng.choice(ACTIONS).capitalize()} {rng.choice(SUBJECTS)} {rng.choice(DETAILS)} (note {number})",
+        "context": rng.choice(["", "", "work", "personal project"])
+    }
+
+
+def make_query(rng: random.Random) -> str:
+    """Build one recall query from two or three corpus words."""
+    return " ".join(rng.sample(QUERY_WORDS, rng.randint(2, 3)))
+
+
+def summarize(samples: List[float]) -> Dict[str, Any]:
+    """
+    Summarize latency samples.
+    
+    Args:
+        samples: Durations in seconds
+    
+    Returns:
+        Count plus mean, p50, p95, p99 and max in milliseconds
+    """
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+    
+    def percentile(p: float) -> float:
+        # Nearest rank
+        return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+    
+    return {
+        "count": len(ordered),
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3),
+        "p50_ms": round(percentile(50) * 1000, 3),
+        "p95_ms": round(percentile(95) * 1000, 3),
+        "p99_ms": round(percentile(99) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3)
+    }
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process, in MiB."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+class StageTimer:
+    """Collects latency samples per stage, including inner calls."""
+    
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {}
+    
+    def add(self, stage: str, seconds: float):
+        """Record one sample."""
+        self.samples.setdefault(stage, []).append(seconds)
+    
+    def instrument(self, owner: Any, attribute: str, stage: str):
+        """Time every call of an async function or method on owner."""
+        original = getattr(owner, attribute)
+        
+        async def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await original(*args, **kwargs)
+            finally:
+                self.add(stage, time.perf_counter() - start)
+        
+        setattr(owner, attribute, timed)
+    
+    def drain(self) -> Dict[str, Dict[str, Any]]:
+        """Summarize and reset the samples collected so far."""
+        summary = {stage: summarize(samples) for stage, samples in sorted(self.samples.items())}
+        self.samples = {}
+        return summary
+
+
+def configure_environment(args, workdir: str):
+    """Point the server at local stand-ins and a scratch directory."""
+    os.environ.update({
+        "VECTOR_BACKEND": "local",
+        "LOCAL_BACKEND_LATENCY_MS": str(args.backend_latency_ms),
+        "LOCAL_BACKEND_JITTER_MS": str(args.backend_jitter_ms),
+        "EMBEDDING_PROVIDER": "hash",
+        "HASH_EMBEDDING_DIMENSION": str(args.dimension),
+        "EMBEDDING_CACHE_PATH": "",
+        "MEMORY_STORE_BACKEND": args.store,
+        "MEMORY_STORE_PATH": os.path.join(workdir, f"memories.{'db' if args.store == 'sqlite' else 'json'}"),
+        "OUTBOX_PATH": os.path.join(workdir, "outbox.db"),
+        "LOCAL_VECTOR_INDEX": "1" if args.mirror else "0",
+        "LOCAL_VECTOR_SNAPSHOT": "",
+        "QUERY_CACHE_SIZE": os.getenv("QUERY_CACHE_SIZE", "1024") if args.query_cache else "0"
+    })
+    os.chdir(workdir)
+
+
+async def run_concurrently(
+    calls: List[Callable[[], Awaitable[Any]]],
+    concurrency: int,
+    stage: str,
+    timer: StageTimer
+) -> Dict[str, Any]:
+    """
+    Run tool calls with a fixed number of workers.
+    
+    Returns:
+        Elapsed seconds, throughput and error count for the batch
+    """
+    pending = iter(calls)
+    errors = 0
+    
+    async def worker():
+        nonlocal errors
+        for call in pending:
+            start = time.perf_counter()
+            text = await call()
+            timer.add(stage, time.perf_counter() - start)
+            if text.startswith("❌") or text.startswith("Error executing"):
+                errors += 1
+    
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {"seconds": round(elapsed, 3), "ops_per_sec": round(len(calls) / elapsed, 1), "errors": errors}
+
+
+async def wait_for_outbox(index, timeout: float = 600.0) -> float:
+    """Wait until every spooled memory is indexed; returns the seconds waited."""
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        if (await index.context.outbox.get_stats())["pending"] == 0:
+            break
+        await asyncio.sleep(0.01)
+    return round(time.perf_counter() - start, 3)
+
+
+async def benchmark_size(args, size: int) -> Dict[str, Any]:
+    """Benchmark one corpus size in this process."""
+    sys.path.insert(0, os.path.abspath(SRC_DIR))
+    import index
+    import ingest
+    import outbox
+    
+    async def call(name: str, arguments: Dict[str, Any]) -> str:
+        return (await index.call_tool(name, arguments))[0].text
+    
+    rng = random.Random(args.seed)
+    timer = StageTimer()
+    # Inner stages: embedding, vector database calls
+    timer.instrument(index, "generate_embedding", "embed_query")
+    timer.instrument(outbox, "generate_embeddings", "embed_batch")
+    timer.instrument(ingest, "generate_embeddings", "embed_batch")
+    
+    start = time.perf_counter()
+    await index.initialize_context()
+    startup_seconds = time.perf_counter() - start
+    client = index.context.pinecone_client
+    timer.instrument(client, "query_memories", "vector_query")
+    timer.instrument(client, "upsert_memories", "vector_upsert")
+    
+    # Ingest the corpus through remember_many
+    memories = (make_memory(rng, number) for number in range(size))
+    ingest_errors = 0
+    start = time.perf_counter()
+    for offset in range(0, size, args.ingest_batch):
+        batch = [next(memories) for _ in range(min(args.ingest_batch, size - offset))]
+        call_start = time.perf_counter()
+        text = await call("remember_many", {"memories": batch})
+        timer.add("remember_many", time.perf_counter() - call_start)
+        if not text.startswith("✅ Stored"):
+            ingest_errors += 1
+    ingest_seconds = time.perf_counter() - start
+    stored = len(await index.context.memory_store.get_all_memory_ids())
+    result = {
+        "memories": size,
+        "startup_seconds": round(startup_seconds, 3),
+        "ingest": {
+            "seconds": round(ingest_seconds, 3),
+            "memories_per_sec": round(size / ingest_seconds, 1) if ingest_seconds else None,
+            "stored": stored,
+            "errors": ingest_errors,
+            "stages": timer.drain()
+        },
+        "levels": []
+    }
+    
+    next_number = size
+    for concurrency in args.concurrency:
+        level = {"concurrency": concurrency, "tools": {}}
+        
+        recalls = [make_query(rng) for _ in range(args.operations)]
+        level["tools"]["recall_memory"] = await run_concurrently(
+            [lambda q=q: call("recall_memory", {"query": q, "top_k": 5}) for q in recalls],
+            concurrency, "recall_memory", timer
+        )
+        
+        level["tools"]["show_my_memories"] = await run_concurrently(
+            [
+                lambda c=category: call("show_my_memories", {"limit": 10, **({"category": c} if c else {})})
+                for category in (rng.choice([None, "work", "personal", "learning"]) for _ in range(args.operations))
+            ],
+            concurrency, "show_my_memories", timer
+        )
+        
+        new_memories = [make_memory(rng, number) for number in range(next_number, next_number + args.operations)]
+        next_number += args.operations
+        level["tools"]["remember_this"] = await run_concurrently(
+            [lambda m=m: call("remember_this", m) for m in new_memories],
+            concurrency, "remember_this", timer
+        )
+        # Time until the background worker has indexed every new memory
+        level["tools"]["remember_this"]["index_drain_seconds"] = await wait_for_outbox(index)
+        
+        level["stages"] = timer.drain()
+        result["levels"].append(level)
+    
+    await index.shutdown_context()
+    result["peak_rss_mb"] = peak_rss_mb()
+    return result
+
+
+def run_child(args) -> int:
+    """Benchmark the single size given by --child and write its result file."""
+    workdir = tempfile.mkdtemp(prefix="bench-memory-")
+    configure_environment(args, workdir)
+    result = asyncio.run(benchmark_size(args, args.child))
+    with open(args.result_file, "w") as f:
+        json.dump(result, f)
+    return 0
+
+
+def git_revision() -> Optional[str]:
+    """Current commit, if the benchmark runs from a git checkout."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def child_arguments(args, size: int, result_file: str) -> List[str]:
+    """Command line for one child process."""
+    command = [
+        sys.executable, os.path.abspath(__file__),
+        "--child", str(size), "--result-file", result_file,
+        "--concurrency", ",".join(str(level) for level in args.concurrency),
+        "--operations", str(args.operations),
+        "--ingest-batch", str(args.ingest_batch),
+        "--store", args.store,
+        "--dimension", str(args.dimension),
+        "--backend-latency-ms", str(args.backend_latency_ms),
+        "--backend-jitter-ms", str(args.backend_jitter_ms),
+        "--seed", str(args.seed)
+    ]
+    if args.query_cache:
+        command.append("--query-cache")
+    if args.mirror:
+        command.append("--mirror")
+    return command
+
+
+def compare_reports(baseline: Dict[str, Any], current: Dict[str, Any]) -> List[str]:
+    """
+    Describe how latencies and throughput moved against a baseline report.
+    
+    Returns:
+        One line per metric present in both reports
+    """
+    def change(old: Optional[float], new: Optional[float]) -> str:
+        if not old or new is None:
+            return "n/a"
+        return f"{(new - old) / old * 100:+.1f}%"
+    
+    lines = []
+    baseline_sizes = {result["memories"]: result for result in baseline.get("results", [])}
+    for result in current["results"]:
+        old = baseline_sizes.get(result["memories"])
+        if old is None:
+            continue
+        prefix = f"{result['memories']:>8} memories"
+        lines.append(
+            f"{prefix}  ingest memories/s {old['ingest']['memories_per_sec']} -> "
+            f"{result['ingest']['memories_per_sec']} ({change(old['ingest']['memories_per_sec'], result['ingest']['memories_per_sec'])})"
+        )
+        lines.append(f"{prefix}  peak RSS MiB {old['peak_rss_mb']} -> {result['peak_rss_mb']} ({change(old['peak_rss_mb'], result['peak_rss_mb'])})")
+        old_levels = {level["concurrency"]: level for level in old["levels"]}
+        for level in result["levels"]:
+            old_level = old_levels.get(level["concurrency"])
+            if old_level is None:
+                continue
+            for stage, summary in level["stages"].items():
+                old_summary = old_level["stages"].get(stage)
+                if not old_summary or not summary.get("count"):
+                    continue
+                lines.append(
+                    f"{prefix}  c={level['concurrency']:<3} {stage:<18} "
+                    + "  ".join(
+                        f"{key[:-3]} {old_summary[key]} -> {summary[key]} ({change(old_summary[key], summary[key])})"
+                        for key in ("p50_ms", "p95_ms", "p99_ms")
+                    )
+                )
+    return lines
+
+
+def main():
+    """Benchmark CLI entry point."""
+    parser = argparse.ArgumentParser(
+        description="Pinecone Memory MCP - end-to-end benchmark with local stand-ins",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python benchmarks/bench_server.py
+  python benchmarks/bench_server.py --sizes 100000 --concurrency 1,16,64 --store sqlite
+  python benchmarks/bench_server.py --sizes 1000000 --store sqlite --dimension 384 --output big.json
+  python benchmarks/bench_server.py --backend-latency-ms 20 --backend-jitter-ms 30
+  python benchmarks/bench_server.py --output new.json --compare old.json
+        """
+    )
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Comma-separated corpus sizes (e.g. 1000,10000,100000,1000000)")
+    parser.add_argument("--concurrency", default=DEFAULT_CONCURRENCY, help="Comma-separated concurrent clients per level")
+    parser.add_argument("--operations", type=int, default=DEFAULT_OPERATIONS, help="Calls per tool at each concurrency level")
+    parser.add_argument("--ingest-batch", type=int, default=DEFAULT_INGEST_BATCH, help="Memories per remember_many call")
+    parser.add_argument("--store", choices=["json", "sqlite"], default="json", help="Local memory store backend")
+    parser.add_argument("--dimension", type=int, default=1536, help="Embedding dimension (384 keeps 1M-memory runs in RAM)")
+    parser.add_argument("--backend-latency-ms", type=float, default=0.0, help="Injected vector backend latency per call")
+    parser.add_argument("--backend-jitter-ms", type=float, default=0.0, help="Random extra vector backend latency per call")
+    parser.add_argument("--query-cache", action="store_true", help="Keep the query result cache enabled")
+    parser.add_argument("--mirror", action="store_true", help="Enable the local vector mirror")
+    parser.add_argument("--seed", type=int, default=42, help="Seed for the synthetic corpus and queries")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    parser.add_argument("--compare", help="Earlier JSON report to compare against")
+    parser.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--result-file", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    args.concurrency = [int(level) for level in args.concurrency.split(",") if level]
+    
+    if args.child is not None:
+        sys.exit(run_child(args))
+    
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    results = []
+    for size in sizes:
+        print(f"⏱️ Benchmarking {size} memories...", file=sys.stderr)
+        with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as f:
+            result_file = f.name
+        try:
+            # Server output goes to stderr so stdout stays machine-readable
+            completed = subprocess.run(child_arguments(args, size, result_file), stdout=sys.stderr)
+            if completed.returncode != 0:
+                print(f"❌ Benchmark for {size} memories failed", file=sys.stderr)
+                sys.exit(completed.returncode)
+            with open(result_file) as f:
+                results.append(json.load(f))
+        finally:
+            os.unlink(result_file)
+    
+    report = {
+        "report_version": REPORT_VERSION,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "git_revision": git_revision(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count()
+        },
+        "config": {
+            "sizes": sizes,
+            "concurrency": args.concurrency,
+            "operations": args.operations,
+            "ingest_batch": args.ingest_batch,
+            "store": args.store,
+            "dimension": args.dimension,
+            "backend_latency_ms": args.backend_latency_ms,
+            "backend_jitter_ms": args.backend_jitter_ms,
+            "query_cache": args.query_cache,
+            "mirror": args.mirror,
+            "seed": args.seed
+        },
+        "results": results
+    }
+    
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+        print(f"✅ Report written to {args.output}", file=sys.stderr)
+    else:
+        print(text)
+    
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        for line in compare_reports(baseline, report):
+            print(line, file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,6 @@
+"""Shared pytest setup: make the server modules in src/ importable."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "src"))
\ No newline at end of file
@@ -28,7 +28,7 @@ SCRIPT_DIR="$( cd "$( dirname "${BASH_SOURCE[0]}" )" && pwd )"
 # Install dependencies
 echo ""
 echo "📦 Installing dependencies..."
-pip3 install -q mcp pinecone-client python-dotenv openai aiofiles 2>/dev/null || {
+pip3 install -q mcp pinecone-client python-dotenv openai 2>/dev/null || {
     echo "⚠️  Some dependencies may need to be installed manually"
 }
 
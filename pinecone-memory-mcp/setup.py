@@ -26,16 +26,17 @@ setup(
         "pinecone-client>=3.0.0",
         "python-dotenv>=1.0.0",
         "openai>=1.0.0",
-        "aiofiles>=23.0.0",
     ],
     extras_require={
         "sse": ["aiohttp>=3.8.0"],
+        "onnx": ["onnxruntime>=1.15.0", "tokenizers>=0.13.0", "numpy>=1.21.0"],
         "dev": ["pytest", "pytest-asyncio", "black", "flake8"],
     },
     entry_points={
         "console_scripts": [
             "pinecone-memory=index:main",
             "pinecone-memory-mcp=index:main",
+            "pinecone-memory-manage=manage:main",
         ],
     },
     classifiers=[
@@ -0,0 +1,199 @@
+"""
+Non-blocking I/O helpers for the memory server.
+Gives each external backend its own bounded executor and concurrency limit so
+a slow service never stalls the event loop or starves the other backends.
+"""
+
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+# Default number of concurrent requests allowed per backend
+DEFAULT_CONCURRENCY = {
+    "pinecone": 16,
+    "openai": 16,
+    "local": 4
+}
+
+
+class BackendIO:
+    """Concurrency limit plus dedicated thread pool for one backend."""
+    
+    def __init__(self, name: str, max_concurrency: int):
+        """
+        Initialize the backend I/O lane.
+        
+        Args:
+            name: Backend name, used for thread names and stats
+            max_concurrency: Maximum number of requests in flight at once
+        """
+        self.name = name
+        self.max_concurrency = max(1, max_concurrency)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        
+        self._stats = {
+            "calls": 0,
+            "in_flight": 0,
+            "waiting": 0
+        }
+    
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """Get the semaphore bound to the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._semaphore
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Create the backend's thread pool on first use."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_concurrency,
+                thread_name_prefix=f"{self.name}-io"
+            )
+        return self._executor
+    
+    async def _acquire(self) -> asyncio.Semaphore:
+        """Wait for a concurrency slot; returns the semaphore to release it on."""
+        semaphore = self._get_semaphore()
+        self._stats["waiting"] += 1
+        try:
+            await semaphore.acquire()
+        finally:
+            self._stats["waiting"] -= 1
+        self._stats["calls"] += 1
+        self._stats["in_flight"] += 1
+        return semaphore
+    
+    def _release(self, semaphore: asyncio.Semaphore):
+        """Give back a slot taken by _acquire."""
+        self._stats["in_flight"] -= 1
+        semaphore.release()
+    
+    def slot(self) -> "_Slot":
+        """
+        Reserve one concurrency slot for a natively async call.
+        
+        Returns:
+            Async context manager that holds the slot for its body
+        """
+        return _Slot(self)
+    
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run a blocking call on the backend's executor without blocking the loop.
+        
+        Args:
+            func: Synchronous callable to run
+            *args: Positional arguments for func
+            **kwargs: Keyword arguments for func
+        
+        Returns:
+            Whatever func returns
+        """
+        semaphore = await self._acquire()
+        loop = asyncio.get_running_loop()
+        try:
+            future = self._get_executor().submit(functools.partial(func, *args, **kwargs))
+        except BaseException:
+            self._release(semaphore)
+            raise
+        
+        def release(_):
+            # The slot is held until the thread finishes, not until the caller
+            # stops waiting, so cancelled calls still count against the limit
+            try:
+                loop.call_soon_threadsafe(self._release, semaphore)
+            except RuntimeError:
+                # The loop is closed, and its semaphore with it
+                pass
+        
+        future.add_done_callback(release)
+        return await asyncio.wrap_future(future, loop=loop)
+    
+    def shutdown(self):
+        """Release the thread pool."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get concurrency statistics for this backend.
+        
+        Returns:
+            Dictionary with call count, in-flight and waiting requests
+        """
+        return {**self._stats, "max_concurrency": self.max_concurrency}
+
+
+class _Slot:
+    """Async context manager holding one BackendIO concurrency slot."""
+    
+    def __init__(self, backend: BackendIO):
+        self._backend = backend
+        self._semaphore: Optional[asyncio.Semaphore] = None
+    
+    async def __aenter__(self):
+        self._semaphore = await self._backend._acquire()
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        self._backend._release(self._semaphore)
+        return False
+
+
+_backends: Dict[str, BackendIO] = {}
+
+
+def get_backend_io(name: str) -> BackendIO:
+    """
+    Get the shared I/O lane for a backend, creating it on first use.
+    
+    The concurrency limit is read from <NAME>_MAX_CONCURRENCY, e.g.
+    PINECONE_MAX_CONCURRENCY or OPENAI_MAX_CONCURRENCY.
+    
+    Args:
+        name: Backend name
+    
+    Returns:
+        The backend's BackendIO instance
+    """
+    backend = _backends.get(name)
+    if backend is None:
+        default = DEFAULT_CONCURRENCY.get(name, 4)
+        limit = int(os.getenv(f"{name.upper()}_MAX_CONCURRENCY", default))
+        backend = BackendIO(name, limit)
+        _backends[name] = backend
+    return backend
+
+
+async def run_blocking(backend: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Run a blocking call on a backend's executor.
+    
+    Args:
+        backend: Backend name (e.g. "pinecone", "local")
+        func: Synchronous callable to run
+        *args: Positional arguments for func
+        **kwargs: Keyword arguments for func
+    
+    Returns:
+        Whatever func returns
+    """
+    return await get_backend_io(backend).run(func, *args, **kwargs)
+
+
+def get_io_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Get concurrency statistics for every backend used so far.
+    
+    Returns:
+        Mapping of backend name to its stats
+    """
+    return {name: backend.get_stats() for name, backend in _backends.items()}
\ No newline at end of file
@@ -0,0 +1,185 @@
+"""
+Micro-batching for embedding requests.
+Collects texts from concurrent callers for a few milliseconds, sends them as
+one embeddings request and shares in-flight results between identical texts.
+"""
+
+import asyncio
+from typing import List, Dict, Any, Callable, Awaitable, Optional
+
+from resilience import CircuitOpenError, is_retryable
+
+# OpenAI accepts up to 2048 inputs and ~300k tokens per embeddings request
+DEFAULT_MAX_BATCH_SIZE = 256
+DEFAULT_MAX_BATCH_CHARS = 600000
+DEFAULT_MAX_DELAY_MS = 5.0
+
+
+class EmbeddingBatcher:
+    """Coalesces single-text embedding requests into batched calls."""
+    
+    def __init__(
+        self,
+        embed_fn: Callable[[List[str]], Awaitable[List[List[float]]]],
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        max_delay_ms: float = DEFAULT_MAX_DELAY_MS,
+        max_batch_chars: int = DEFAULT_MAX_BATCH_CHARS
+    ):
+        """
+        Initialize the batcher.
+        
+        Args:
+            embed_fn: Coroutine embedding a list of texts in one request,
+                returning vectors in input order and raising on failure
+            max_batch_size: Flush once this many distinct texts are queued
+            max_delay_ms: Flush queued texts at most this long after the
+                first one arrived
+            max_batch_chars: Flush before the queued texts exceed this many
+                characters, keeping requests under the token limit
+        """
+        self._embed_fn = embed_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_delay = max(0.0, max_delay_ms) / 1000.0
+        self.max_batch_chars = max_batch_chars
+        
+        # Futures for texts that are queued or in flight (singleflight)
+        self._futures: Dict[str, asyncio.Future] = {}
+        self._queue: List[str] = []
+        self._queue_chars = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._inflight: set = set()
+        
+        self._stats = {
+            "texts_requested": 0,
+            "texts_deduplicated": 0,
+            "texts_embedded": 0,
+            "batches_sent": 0,
+            "batch_failures": 0,
+            "batch_retries": 0
+        }
+    
+    async def embed(self, text: str) -> List[float]:
+        """
+        Embed one text as part of the next batch.
+        
+        Args:
+            text: Text to embed
+        
+        Returns:
+            Embedding vector
+        """
+        self._stats["texts_requested"] += 1
+        
+        future = self._futures.get(text)
+        if future is not None:
+            self._stats["texts_deduplicated"] += 1
+            return await asyncio.shield(future)
+        
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        # Mark failures as retrieved even if every waiter was cancelled
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._futures[text] = future
+        
+        if self._queue and self._queue_chars + len(text) > self.max_batch_chars:
+            self._flush_queue()
+        self._queue.append(text)
+        self._queue_chars += len(text)
+        
+        if len(self._queue) >= self.max_batch_size:
+            self._flush_queue()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self._flush_queue)
+        
+        return await asyncio.shield(future)
+    
+    async def embed_many(self, texts: List[str]) -> List[Any]:
+        """
+        Embed several texts through the batcher.
+        
+        Args:
+            texts: Texts to embed
+        
+        Returns:
+            Vectors in input order; failed texts hold their exception instead
+        """
+        return await asyncio.gather(
+            *(self.embed(text) for text in texts),
+            return_exceptions=True
+        )
+    
+    def _flush_queue(self):
+        """Send the queued texts as one background request."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        
+        if not self._queue:
+            return
+        
+        batch = self._queue
+        self._queue = []
+        self._queue_chars = 0
+        
+        task = asyncio.ensure_future(self._run_batch(batch))
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+    
+    async def _run_batch(self, texts: List[str]):
+        """
+        Embed one batch and resolve every waiter, bisecting on rejection so
+        one bad input does not fail the texts batched with it.
+        
+        Args:
+            texts: Distinct texts in the batch
+        """
+        self._stats["batches_sent"] += 1
+        try:
+            vectors = await self._embed_fn(texts)
+            if len(vectors) != len(texts):
+                raise ValueError(f"Expected {len(texts)} embeddings, got {len(vectors)}")
+        except Exception as e:
+            self._stats["batch_failures"] += 1
+            # A rejected request (e.g. one input over the token limit) is
+            # narrowed down by splitting; outages fail the whole batch once
+            transient = isinstance(e, CircuitOpenError) or is_retryable(e)
+            if len(texts) > 1 and not transient:
+                self._stats["batch_retries"] += 1
+                middle = len(texts) // 2
+                await asyncio.gather(
+                    self._run_batch(texts[:middle]),
+                    self._run_batch(texts[middle:])
+                )
+                return
+            
+            for text in texts:
+                future = self._futures.pop(text, None)
+                if future is not None and not future.done():
+                    future.set_exception(e)
+            return
+        
+        self._stats["texts_embedded"] += len(texts)
+        for text, vector in zip(texts, vectors):
+            future = self._futures.pop(text, None)
+            if future is not None and not future.done():
+                future.set_result(vector)
+    
+    async def flush(self):
+        """Send queued texts now and wait for in-flight batches."""
+        self._flush_queue()
+        while self._inflight:
+            await asyncio.gather(*list(self._inflight), return_exceptions=True)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get batching statistics.
+        
+        Returns:
+            Dictionary of counters plus the current queue depth
+        """
+        batches = self._stats["batches_sent"] - self._stats["batch_failures"]
+        return {
+            **self._stats,
+            "queued": len(self._queue),
+            "avg_batch_size": (self._stats["texts_embedded"] / batches) if batches else 0.0
+        }
\ No newline at end of file
@@ -0,0 +1,217 @@
+"""
+Content-addressed cache for text embeddings.
+Keeps recently used vectors in an in-memory LRU and persists every vector to
+SQLite so repeated texts skip the embedding API, even across restarts.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+import unicodedata
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+
+from async_io import run_blocking
+
+DEFAULT_CACHE_PATH = "embedding_cache.db"
+DEFAULT_MEMORY_ENTRIES = 4096
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize text so trivially different inputs share a cache entry.
+    
+    Args:
+        text: Raw text
+    
+    Returns:
+        NFC-normalized text with collapsed whitespace
+    """
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def make_cache_key(text: str, model: str) -> str:
+    """
+    Build the cache key for a (model, text) pair.
+    
+    Args:
+        text: Text that was embedded
+        model: Embedding model name
+    
+    Returns:
+        Hex SHA-256 digest of the model and normalized text
+    """
+    payload = f"{model}\0{normalize_text(text)}".encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+
+class EmbeddingCache:
+    """Two-tier (memory LRU + SQLite) embedding cache."""
+    
+    def __init__(
+        self,
+        path: Optional[str] = DEFAULT_CACHE_PATH,
+        max_memory_entries: int = DEFAULT_MEMORY_ENTRIES
+    ):
+        """
+        Initialize the cache.
+        
+        Args:
+            path: SQLite file for the persistent tier, or None/"" for memory only
+            max_memory_entries: Number of vectors kept in the in-memory LRU
+        """
+        self.path = Path(path) if path else None
+        self.max_memory_entries = max(0, max_memory_entries)
+        
+        # Vectors are held as float32 arrays: ~6KB each instead of ~50KB as lists
+        self._memory: "OrderedDict[str, array]" = OrderedDict()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        
+        self._stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "writes": 0
+        }
+        
+        if self.path:
+            self._open_db()
+    
+    def _open_db(self):
+        """Open the SQLite tier and create its table."""
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                dimension INTEGER NOT NULL,
+                vector BLOB NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+    
+    def _remember(self, key: str, vector: array):
+        """Insert into the memory tier, evicting the least recently used entry."""
+        if self.max_memory_entries == 0:
+            return
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+            self._stats["evictions"] += 1
+    
+    def _read_disk(self, key: str) -> Optional[array]:
+        """Look a key up in the SQLite tier."""
+        with self._db_lock:
+            row = self._conn.execute(
+                "SELECT vector FROM embeddings WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        vector = array("f")
+        vector.frombytes(row[0])
+        return vector
+    
+    def _write_disk(self, model: str, entries: List[Tuple[str, array]]):
+        """Persist vectors to the SQLite tier in one transaction."""
+        now = time.time()
+        with self._db_lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, model, dimension, vector, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(key, model, len(vector), vector.tobytes(), now) for key, vector in entries]
+            )
+            self._conn.commit()
+    
+    async def get(self, text: str, model: str) -> Optional[List[float]]:
+        """
+        Look up a cached embedding.
+        
+        Args:
+            text: Text to look up
+            model: Embedding model name
+        
+        Returns:
+            The cached embedding, or None on a miss
+        """
+        key = make_cache_key(text, model)
+        
+        vector = self._memory.get(key)
+        if vector is not None:
+            self._memory.move_to_end(key)
+            self._stats["memory_hits"] += 1
+            return vector.tolist()
+        
+        if self._conn is not None:
+            vector = await run_blocking("local", self._read_disk, key)
+            if vector is not None:
+                self._stats["disk_hits"] += 1
+                self._remember(key, vector)
+                return vector.tolist()
+        
+        self._stats["misses"] += 1
+        return None
+    
+    async def put(self, text: str, model: str, embedding: List[float]):
+        """
+        Store an embedding in both tiers.
+        
+        Args:
+            text: Text that was embedded
+            model: Embedding model name
+            embedding: The embedding vector
+        """
+        await self.put_many([text], model, [embedding])
+    
+    async def put_many(self, texts: List[str], model: str, embeddings: List[List[float]]):
+        """
+        Store several embeddings, writing the disk tier in one transaction.
+        
+        Args:
+            texts: Texts that were embedded
+            model: Embedding model name
+            embeddings: Embedding vectors in the same order as texts
+        """
+        entries = []
+        for text, embedding in zip(texts, embeddings):
+            key = make_cache_key(text, model)
+            vector = array("f", embedding)
+            self._remember(key, vector)
+            entries.append((key, vector))
+        self._stats["writes"] += len(entries)
+        
+        if self._conn is not None and entries:
+            await run_blocking("local", self._write_disk, model, entries)
+    
+    def close(self):
+        """Close the SQLite tier."""
+        if self._conn is not None:
+            with self._db_lock:
+                self._conn.close()
+            self._conn = None
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+        
+        Returns:
+            Dictionary of hit/miss/eviction counters and tier sizes
+        """
+        hits = self._stats["memory_hits"] + self._stats["disk_hits"]
+        lookups = hits + self._stats["misses"]
+        return {
+            **self._stats,
+            "hit_rate": (hits / lookups) if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "disk_path": str(self.path) if self.path else None
+        }
\ No newline at end of file
@@ -0,0 +1,417 @@
+"""
+Embedding providers.
+OpenAI is the default. The ONNX provider runs a sentence-embedding model on
+the local CPU, removing the network round trip from recall. The hashing
+provider embeds text locally by feature hashing of word and character n-grams;
+it is deterministic across processes and fast, for offline development, tests
+and reproducible benchmarks.
+"""
+
+import os
+import re
+import math
+import asyncio
+import hashlib
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from async_io import get_backend_io, run_blocking
+
+# Try to import OpenAI (optional for testing)
+try:
+    import openai
+    OPENAI_AVAILABLE = True
+except ImportError:
+    OPENAI_AVAILABLE = False
+
+# Try to import NumPy (optional; the hashing provider has a pure-Python path)
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# Try to import ONNX Runtime and the tokenizer (optional; for the ONNX provider)
+try:
+    import onnxruntime
+    from tokenizers import Tokenizer
+    ONNX_AVAILABLE = True
+except ImportError:
+    ONNX_AVAILABLE = False
+
+# OpenAI text-embedding-3-small
+EMBEDDING_DIMENSION = 1536
+DEFAULT_EMBEDDING_MODEL = "text-embedding-3-small"
+
+HASH_MODEL_NAME = "blake2b-ngram-v1"
+# Character n-grams catch shared word stems, at a lower weight than whole words
+HASH_CHAR_NGRAM = 3
+HASH_CHAR_WEIGHT = 0.5
+# Batches larger than this are hashed off the event loop
+HASH_INLINE_BATCH_SIZE = 32
+
+# all-MiniLM-L6-v2 and similar small sentence-embedding models
+ONNX_DEFAULT_DIMENSION = 384
+ONNX_DEFAULT_MAX_TOKENS = 256
+# Texts per inference call; a batch is split into chunks run in parallel
+ONNX_DEFAULT_CHUNK_SIZE = 16
+# Preferred over model.onnx when both exist
+ONNX_QUANTIZED_FILE = "model_quantized.onnx"
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def available_cores() -> int:
+    """Count the CPU cores this process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+class EmbeddingProvider(ABC):
+    """
+    Interface for an embedding model.
+    
+    embed() raises on failure; generate_embeddings() handles caching, batching
+    and the zero-vector fallback around it.
+    """
+    
+    name = ""
+    # Cheap enough to compute on every call: skip the cache and micro-batcher
+    inline = False
+    
+    def __init__(self, model: str, dimension: int):
+        """
+        Initialize the provider.
+        
+        Args:
+            model: Default model name, also part of the embedding cache key
+            dimension: Length of the vectors produced
+        """
+        self.model = model
+        self.dimension = dimension
+    
+    @abstractmethod
+    async def embed(self, texts: List[str], model: str) -> List[List[float]]:
+        """
+        Embed a batch of texts.
+        
+        Args:
+            texts: Texts to embed
+            model: Model to use
+        
+        Returns:
+            Embeddings in input order
+        """
+    
+    def close(self):
+        """Release any resources held by the provider."""
+
+
+class OpenAIEmbeddingProvider(EmbeddingProvider):
+    """OpenAI embeddings API through the native async client."""
+    
+    name = "openai"
+    
+    def __init__(self, model: str = DEFAULT_EMBEDDING_MODEL, dimension: int = EMBEDDING_DIMENSION):
+        super().__init__(model, dimension)
+        self._client = None
+    
+    def get_client(self):
+        """
+        Get the async OpenAI client, created on first use.
+        
+        Returns:
+            openai.AsyncOpenAI instance
+        """
+        if self._client is None:
+            self._client = openai.AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        return self._client
+    
+    async def embed(self, texts: List[str], model: str) -> List[List[float]]:
+        async with get_backend_io("openai").slot():
+            response = await self.get_client().embeddings.create(
+                input=texts,
+                model=model
+            )
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+
+class OnnxEmbeddingProvider(EmbeddingProvider):
+    """
+    Sentence-embedding model run on the local CPU with ONNX Runtime.
+    
+    Expects a directory with the exported model (model_quantized.onnx for an
+    int8 model, or model.onnx) and its tokenizer.json. The model is loaded
+    and warmed up on first use. Texts from concurrent callers arrive batched
+    by generate_embeddings; each batch is split into chunks that run in
+    parallel on a thread pool sized to the available cores.
+    """
+    
+    name = "onnx"
+    
+    def __init__(
+        self,
+        model_dir: str,
+        model_file: Optional[str] = None,
+        dimension: int = ONNX_DEFAULT_DIMENSION,
+        max_tokens: int = ONNX_DEFAULT_MAX_TOKENS,
+        chunk_size: int = ONNX_DEFAULT_CHUNK_SIZE,
+        threads: Optional[int] = None
+    ):
+        """
+        Initialize the provider without loading the model.
+        
+        Args:
+            model_dir: Directory holding the ONNX model and tokenizer.json
+            model_file: Model file name; defaults to model_quantized.onnx if
+                present, otherwise model.onnx
+            dimension: Embedding size; checked against the model when it loads
+            max_tokens: Longer texts are truncated to this many tokens
+            chunk_size: Texts per inference call
+            threads: Inference threads; defaults to the available cores
+        
+        Raises:
+            ValueError: If the model or tokenizer file is missing
+        """
+        root = Path(model_dir)
+        if model_file is None:
+            model_file = ONNX_QUANTIZED_FILE if (root / ONNX_QUANTIZED_FILE).exists() else "model.onnx"
+        self.model_path = root / model_file
+        self.tokenizer_path = root / "tokenizer.json"
+        for path in (self.model_path, self.tokenizer_path):
+            if not path.exists():
+                raise ValueError(f"ONNX embedding model file not found: {path}")
+        
+        # The model file is part of the name: int8 and fp32 vectors differ
+        super().__init__(f"{root.name}/{model_file}", dimension)
+        self.max_tokens = max_tokens
+        self.chunk_size = max(1, chunk_size)
+        self.threads = threads or available_cores()
+        
+        self._executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="onnx-embed")
+        self._load_lock = threading.Lock()
+        self._session = None
+        self._tokenizer = None
+        self._input_names: List[str] = []
+    
+    def _load(self):
+        """
+        Load the tokenizer and model, then run one warm-up inference.
+        
+        Raises:
+            ValueError: If the model's output size is not the configured dimension
+        """
+        with self._load_lock:
+            if self._session is not None:
+                return
+            tokenizer = Tokenizer.from_file(str(self.tokenizer_path))
+            tokenizer.enable_truncation(max_length=self.max_tokens)
+            tokenizer.enable_padding()
+            
+            options = onnxruntime.SessionOptions()
+            # Parallelism comes from running chunks side by side; one thread
+            # per call avoids oversubscribing the cores
+            options.intra_op_num_threads = 1
+            options.inter_op_num_threads = 1
+            options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+            session = onnxruntime.InferenceSession(
+                str(self.model_path), sess_options=options, providers=["CPUExecutionProvider"]
+            )
+            
+            self._tokenizer = tokenizer
+            self._input_names = [model_input.name for model_input in session.get_inputs()]
+            warmup = self._infer(session, ["warm up"])
+            if warmup.shape[1] != self.dimension:
+                # The index was sized from the configured dimension
+                raise ValueError(
+                    f"ONNX model {self.model} produces {warmup.shape[1]}-dimensional embeddings, "
+                    f"not {self.dimension}; set ONNX_EMBEDDING_DIMENSION to match"
+                )
+            self._session = session
+    
+    def _infer(self, session, texts: List[str]) -> "np.ndarray":
+        """Embed one chunk: tokenize, run the model, mean-pool and normalize."""
+        encodings = self._tokenizer.encode_batch(texts)
+        mask = np.asarray([encoding.attention_mask for encoding in encodings], dtype=np.int64)
+        feeds = {
+            "input_ids": np.asarray([encoding.ids for encoding in encodings], dtype=np.int64),
+            "attention_mask": mask,
+            "token_type_ids": np.asarray([encoding.type_ids for encoding in encodings], dtype=np.int64)
+        }
+        output = session.run(None, {name: feeds[name] for name in self._input_names})[0]
+        
+        if output.ndim == 3:
+            # Token embeddings: average over the real (unpadded) tokens
+            weights = mask[:, :, None].astype(np.float32)
+            output = (output * weights).sum(axis=1) / np.maximum(weights.sum(axis=1), 1e-9)
+        norms = np.linalg.norm(output, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return (output / norms).astype(np.float32)
+    
+    def _embed_chunk(self, texts: List[str]) -> "np.ndarray":
+        """Embed one chunk on a pool thread, loading the model first if needed."""
+        self._load()
+        return self._infer(self._session, texts)
+    
+    async def embed(self, texts: List[str], model: str) -> List[List[float]]:
+        # Similar lengths share a chunk, so little compute goes to padding
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        chunks = [order[start:start + self.chunk_size] for start in range(0, len(order), self.chunk_size)]
+        loop = asyncio.get_running_loop()
+        results = await asyncio.gather(*(
+            loop.run_in_executor(self._executor, self._embed_chunk, [texts[i] for i in chunk])
+            for chunk in chunks
+        ))
+        
+        embeddings: List[Optional[List[float]]] = [None] * len(texts)
+        for chunk, vectors in zip(chunks, results):
+            for i, vector in zip(chunk, vectors.tolist()):
+                embeddings[i] = vector
+        return embeddings
+    
+    def close(self):
+        self._executor.shutdown(wait=False)
+
+
+@lru_cache(maxsize=65536)
+def _hash_feature(feature: str, dimension: int) -> Tuple[int, float]:
+    """Map a feature to a (bucket, sign) pair."""
+    digest = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+    # The top bit picks the sign, so colliding features tend to cancel out
+    return digest % dimension, (1.0 if digest >> 63 else -1.0)
+
+
+@lru_cache(maxsize=65536)
+def _token_features(token: str, dimension: int) -> Tuple[Tuple[int, ...], Tuple[float, ...]]:
+    """Hash a word and its character n-grams into buckets and signed weights."""
+    padded = f"#{token}#"
+    features = [("w:" + token, 1.0)]
+    features.extend(
+        ("c:" + padded[i:i + HASH_CHAR_NGRAM], HASH_CHAR_WEIGHT)
+        for i in range(len(padded) - HASH_CHAR_NGRAM + 1)
+    )
+    buckets, weights = [], []
+    for feature, weight in features:
+        bucket, sign = _hash_feature(feature, dimension)
+        buckets.append(bucket)
+        weights.append(sign * weight)
+    return tuple(buckets), tuple(weights)
+
+
+def _text_features(text: str, dimension: int) -> Tuple[List[int], List[float]]:
+    """Hash a text's words, word pairs and character n-grams into buckets and signed weights."""
+    tokens = _TOKEN_PATTERN.findall(text.lower())
+    if not tokens:
+        # Never produce a zero vector; it reads as a failed embedding
+        bucket, sign = _hash_feature("e:" + text.strip(), dimension)
+        return [bucket], [sign]
+    
+    buckets: List[int] = []
+    weights: List[float] = []
+    # Words are memoized with their n-grams, since vocabularies repeat
+    for token in tokens:
+        token_buckets, token_weights = _token_features(token, dimension)
+        buckets.extend(token_buckets)
+        weights.extend(token_weights)
+    for first, second in zip(tokens, tokens[1:]):
+        bucket, sign = _hash_feature("b:" + first + " " + second, dimension)
+        buckets.append(bucket)
+        weights.append(sign)
+    return buckets, weights
+
+
+class HashEmbeddingProvider(EmbeddingProvider):
+    """Deterministic feature-hashing embedder that runs in-process."""
+    
+    name = "hash"
+    inline = True
+    
+    def __init__(self, dimension: int = EMBEDDING_DIMENSION):
+        super().__init__(HASH_MODEL_NAME, dimension)
+    
+    def embed_sync(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed texts on the calling thread.
+        
+        Args:
+            texts: Texts to embed
+        
+        Returns:
+            Unit-length embeddings in input order
+        """
+        if NUMPY_AVAILABLE:
+            # One bincount over the whole batch, each text offset into its own row
+            buckets: List[int] = []
+            weights: List[float] = []
+            for row, text in enumerate(texts):
+                offset = row * self.dimension
+                text_buckets, text_weights = _text_features(text, self.dimension)
+                buckets.extend(bucket + offset for bucket in text_buckets)
+                weights.extend(text_weights)
+            matrix = np.bincount(
+                np.asarray(buckets, dtype=np.int64),
+                weights=np.asarray(weights, dtype=np.float64),
+                minlength=len(texts) * self.dimension
+            ).reshape(len(texts), self.dimension)
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            return (matrix / norms).astype(np.float32).tolist()
+        
+        embeddings = []
+        for text in texts:
+            vector = [0.0] * self.dimension
+            for bucket, weight in zip(*_text_features(text, self.dimension)):
+                vector[bucket] += weight
+            norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+            embeddings.append([x / norm for x in vector])
+        return embeddings
+    
+    async def embed(self, texts: List[str], model: str) -> List[List[float]]:
+        if len(texts) > HASH_INLINE_BATCH_SIZE:
+            return await run_blocking("local", self.embed_sync, texts)
+        return self.embed_sync(texts)
+
+
+def create_embedding_provider(name: Optional[str] = None) -> EmbeddingProvider:
+    """
+    Create an embedding provider.
+    
+    Args:
+        name: "openai", "onnx" or "hash"; defaults to EMBEDDING_PROVIDER, or "openai"
+            if the openai package is installed and "hash" otherwise
+    
+    Returns:
+        EmbeddingProvider instance
+    
+    Raises:
+        ValueError: If the provider is unknown or its dependencies are missing
+    """
+    name = (name or os.getenv("EMBEDDING_PROVIDER") or ("openai" if OPENAI_AVAILABLE else "hash")).lower()
+    
+    if name == "openai":
+        if not OPENAI_AVAILABLE:
+            raise ValueError("The openai package is required for EMBEDDING_PROVIDER=openai")
+        return OpenAIEmbeddingProvider(os.getenv("EMBEDDING_MODEL", DEFAULT_EMBEDDING_MODEL))
+    if name == "onnx":
+        if not (ONNX_AVAILABLE and NUMPY_AVAILABLE):
+            raise ValueError("onnxruntime, tokenizers and numpy are required for EMBEDDING_PROVIDER=onnx")
+        model_dir = os.getenv("ONNX_EMBEDDING_MODEL_DIR")
+        if not model_dir:
+            raise ValueError("ONNX_EMBEDDING_MODEL_DIR environment variable is required for EMBEDDING_PROVIDER=onnx")
+        threads = os.getenv("ONNX_EMBEDDING_THREADS")
+        return OnnxEmbeddingProvider(
+            model_dir,
+            model_file=os.getenv("ONNX_EMBEDDING_MODEL_FILE") or None,
+            dimension=int(os.getenv("ONNX_EMBEDDING_DIMENSION", ONNX_DEFAULT_DIMENSION)),
+            max_tokens=int(os.getenv("ONNX_EMBEDDING_MAX_TOKENS", ONNX_DEFAULT_MAX_TOKENS)),
+            chunk_size=int(os.getenv("ONNX_EMBEDDING_CHUNK_SIZE", ONNX_DEFAULT_CHUNK_SIZE)),
+            threads=int(threads) if threads else None
+        )
+    if name == "hash":
+        return HashEmbeddingProvider(int(os.getenv("HASH_EMBEDDING_DIMENSION", EMBEDDING_DIMENSION)))
+    raise ValueError(f"Unknown embedding provider: {name}")
\ No newline at end of file
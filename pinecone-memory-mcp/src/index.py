@@ -5,8 +5,9 @@ An MCP server that provides memory storage and retrieval using Pinecone vector d
 
 Tools:
 1. remember_this - Store a new memory with automatic embedding and metadata
-2. show_my_memories - Display all stored memories
-3. recall_memory - Find contextually relevant memories using semantic search
+2. remember_many - Store many memories at once through a batched pipeline
+3. show_my_memories - Display all stored memories
+4. recall_memory - Find contextually relevant memories using semantic search
 """
 
 import asyncio
@@ -14,7 +15,7 @@ import os
 import sys
 import json
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from contextlib import asynccontextmanager
 from collections.abc import AsyncIterator
 
@@ -35,14 +36,20 @@ from dotenv import load_dotenv
 # Import our modules
 from pinecone_client import PineconeMemoryClient
 from memory_store import MemoryStore
+from async_io import run_blocking, get_io_stats
+from outbox import WriteOutbox, OutboxWorker, DEFAULT_OUTBOX_PATH, DEFAULT_MAX_ATTEMPTS
+from ingest import prepare_memory, ingest_memories
 from utils import (
     generate_embedding,
-    generate_memory_id,
-    extract_keywords,
-    categorize_memory,
+    get_embedding_provider,
+    embedding_metadata,
     format_memory_for_display,
-    extract_context_from_query
+    extract_context_from_query,
+    build_metadata_filter,
+    split_keywords,
+    get_embedding_cache_stats
 )
+from metrics import track_tool, stage, register_collector, render_metrics, CONTENT_TYPE
 
 # Load environment variables
 load_dotenv()
@@ -53,19 +60,45 @@ class MemoryContext:
     def __init__(self):
         self.pinecone_client: Optional[PineconeMemoryClient] = None
         self.memory_store: Optional[MemoryStore] = None
+        self.outbox: Optional[WriteOutbox] = None
+        self.outbox_worker: Optional[OutboxWorker] = None
         self.initialized: bool = False
+        self.init_lock: Optional[asyncio.Lock] = None
 
 
 # Global context
 context = MemoryContext()
 
+# Tools listed by list_tools; other names are reported as "unknown" in metrics
+TOOL_NAMES = ("remember_this", "remember_many", "show_my_memories", "recall_memory")
+
 
 async def initialize_context():
     """Initialize the application context."""
-    if not context.initialized:
+    if context.initialized:
+        return
+    
+    # Concurrent tool calls must not race to build a second client
+    if context.init_lock is None:
+        context.init_lock = asyncio.Lock()
+    
+    async with context.init_lock:
+        if context.initialized:
+            return
         try:
-            context.pinecone_client = PineconeMemoryClient()
+            # Client construction lists/creates the index over the network
+            context.pinecone_client = await run_blocking("pinecone", PineconeMemoryClient)
+            await check_embedding_dimension()
             context.memory_store = MemoryStore()
+            context.outbox = WriteOutbox(os.getenv("OUTBOX_PATH", DEFAULT_OUTBOX_PATH))
+            context.outbox_worker = OutboxWorker(
+                context.outbox,
+                context.pinecone_client,
+                max_attempts=int(os.getenv("OUTBOX_MAX_ATTEMPTS", DEFAULT_MAX_ATTEMPTS))
+            )
+            context.pinecone_client.start_mirror()
+            await restore_spooled_memories()
+            context.outbox_worker.start()
             context.initialized = True
             print("✅ Memory system initialized successfully")
         except Exception as e:
@@ -73,6 +106,137 @@ async def initialize_context():
             raise
 
 
+async def check_embedding_dimension():
+    """
+    Refuse to start when the index dimension does not match the embedding provider's vectors.
+    
+    Raises:
+        ValueError: If the dimensions differ
+    """
+    provider = get_embedding_provider()
+    dimension = (await context.pinecone_client.get_stats()).get("dimension")
+    if dimension and dimension != provider.dimension:
+        raise ValueError(
+            f"The index holds {dimension}-dimensional vectors but {provider.name} model "
+            f"{provider.model} produces {provider.dimension}; use an index created for this model"
+        )
+
+
+def resilience_families(backend: str, operations: Dict[str, Dict[str, int]]) -> List[Any]:
+    """
+    Turn ResilientCaller per-operation counters into metric families.
+    
+    Args:
+        backend: Backend the caller guards, e.g. pinecone
+        operations: The "operations" part of ResilientCaller.get_stats()
+    
+    Returns:
+        Counter families labelled by backend, operation and, where an event
+        has several outcomes, kind
+    """
+    def samples(*counters: Tuple[str, Optional[str]]):
+        return [
+            ({"backend": backend, "operation": operation, **({"kind": kind} if kind else {})}, stats[counter])
+            for operation, stats in sorted(operations.items())
+            for counter, kind in counters
+        ]
+    
+    return [
+        ("memory_backend_calls_total", "counter",
+         "Backend calls by outcome (success, failure or short_circuited by the open breaker).",
+         samples(("successes", "success"), ("failures", "failure"), ("short_circuited", "short_circuited"))),
+        ("memory_backend_retries_total", "counter", "Backend call attempts repeated after a transient error.",
+         samples(("retries", None))),
+        ("memory_backend_timeouts_total", "counter", "Backend call attempts that ran out of their deadline.",
+         samples(("timeouts", None))),
+        ("memory_backend_hedges_total", "counter",
+         "Duplicate requests sent for slow calls (launched), and those that answered first (won).",
+         samples(("hedges", "launched"), ("hedge_wins", "won"))),
+        ("memory_backend_fallbacks_total", "counter", "Backend calls answered by a fallback instead.",
+         samples(("fallbacks", None)))
+    ]
+
+
+async def collect_metrics() -> List[Any]:
+    """
+    Read executor, cache, outbox and resilience state for /metrics.
+    
+    Returns:
+        Metric families, as expected by register_collector
+    """
+    io_stats = get_io_stats()
+    families = [
+        ("memory_backend_in_flight", "gauge", "Backend calls currently running.",
+         [({"backend": name}, stats["in_flight"]) for name, stats in sorted(io_stats.items())]),
+        ("memory_backend_waiting", "gauge", "Backend calls waiting for a concurrency slot.",
+         [({"backend": name}, stats["waiting"]) for name, stats in sorted(io_stats.items())])
+    ]
+    
+    hit_ratios = []
+    embedding_cache = get_embedding_cache_stats()
+    if embedding_cache["enabled"]:
+        hit_ratios.append(({"cache": "embedding"}, embedding_cache["hit_rate"]))
+    
+    client = context.pinecone_client
+    if client is not None:
+        query_cache = client.get_query_cache_stats()
+        if query_cache["enabled"]:
+            hit_ratios.append(({"cache": "query"}, query_cache["hit_rate"]))
+        mirror = client.get_mirror_stats()
+        mirror_queries = mirror["local_queries"] + mirror["remote_queries"]
+        if mirror["enabled"]:
+            hit_ratios.append(({"cache": "mirror"}, mirror["local_queries"] / mirror_queries if mirror_queries else 0.0))
+        resilience = client.get_resilience_stats()
+        families.append(("memory_circuit_open", "gauge", "1 while the Pinecone circuit breaker is open.",
+                         [({}, 1 if resilience["breaker"]["state"] == "open" else 0)]))
+        families.extend(resilience_families("pinecone", resilience["operations"]))
+    families.append(("memory_cache_hit_ratio", "gauge", "Share of lookups answered from each cache.", hit_ratios))
+    
+    if context.initialized and context.outbox is not None:
+        outbox_stats = await context.outbox.get_stats()
+        families.append(("memory_outbox_pending", "gauge", "Memories waiting to be indexed.",
+                         [({}, outbox_stats["pending"])]))
+        families.append(("memory_outbox_dead_lettered", "gauge", "Memories that gave up on indexing.",
+                         [({}, outbox_stats["dead_lettered"])]))
+    
+    return families
+
+
+register_collector(collect_metrics)
+
+
+async def restore_spooled_memories():
+    """
+    Make sure memories spooled before a restart are in the local store.
+    
+    remember_this spools a memory before writing it locally, so a crash in
+    between leaves it only in the outbox. The outbox worker indexes it in
+    Pinecone once started.
+    """
+    pending = await context.outbox.pending()
+    if not pending:
+        return
+    
+    print(f"🔄 {len(pending)} spooled memories are waiting to be indexed")
+    # put, not add: the local write usually happened before the restart
+    await context.memory_store.put_memories([
+        (entry["id"], context.memory_store.record_from_metadata(entry["payload"]["metadata"]))
+        for entry in pending
+    ])
+
+
+async def shutdown_context():
+    """Flush buffered writes before the process exits."""
+    if context.outbox_worker is not None:
+        await context.outbox_worker.stop()
+    if context.initialized and context.pinecone_client:
+        await context.pinecone_client.aclose()
+    if context.initialized and context.memory_store:
+        await context.memory_store.aclose()
+    if context.initialized and context.outbox:
+        context.outbox.close()
+
+
 # Create the MCP server
 server = Server("pinecone-memory-server")
 
@@ -100,6 +264,34 @@ async def list_tools() -> list[Tool]:
                 "required": ["memory"]
             }
         ),
+        Tool(
+            name="remember_many",
+            description="Store many memories at once, e.g. when importing notes",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "memories": {
+                        "type": "array",
+                        "description": "Memories to store: strings, or objects with 'memory' and optional 'context' and 'timestamp'",
+                        "items": {
+                            "anyOf": [
+                                {"type": "string"},
+                                {
+                                    "type": "object",
+                                    "properties": {
+                                        "memory": {"type": "string"},
+                                        "context": {"type": "string"},
+                                        "timestamp": {"type": "string"}
+                                    },
+                                    "required": ["memory"]
+                                }
+                            ]
+                        }
+                    }
+                },
+                "required": ["memories"]
+            }
+        ),
         Tool(
             name="show_my_memories",
             description="Display all stored memories with their metadata and categories",
@@ -115,6 +307,22 @@ async def list_tools() -> list[Tool]:
                         "type": "integer",
                         "description": "Maximum number of memories to show (default: 10)",
                         "optional": True
+                    },
+                    "verify": {
+                        "type": "boolean",
+                        "description": "Check each memory against Pinecone instead of only the local store (default: false)",
+                        "optional": True
+                    },
+                    "order": {
+                        "type": "string",
+                        "enum": ["newest", "oldest"],
+                        "description": "Show newest (default) or oldest memories first",
+                        "optional": True
+                    },
+                    "cursor": {
+                        "type": "string",
+                        "description": "Cursor from a previous page to continue listing",
+                        "optional": True
                     }
                 }
             }
@@ -133,6 +341,12 @@ async def list_tools() -> list[Tool]:
                         "type": "integer",
                         "description": "Number of relevant memories to return (default: 5)",
                         "optional": True
+                    },
+                    "keywords": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Only return memories tagged with at least one of these keywords (#hashtags in the query work too)",
+                        "optional": True
                     }
                 },
                 "required": ["query"]
@@ -148,156 +362,256 @@ async def call_tool(name: str, arguments: Dict[str, Any]) -> list[TextContent]:
     # Ensure context is initialized
     await initialize_context()
     
-    try:
-        if name == "remember_this":
-            result = await remember_this(
-                memory=arguments.get("memory"),
-                context=arguments.get("context")
-            )
-        elif name == "show_my_memories":
-            result = await show_my_memories(
-                category=arguments.get("category"),
-                limit=arguments.get("limit", 10)
-            )
-        elif name == "recall_memory":
-            result = await recall_memory(
-                query=arguments.get("query"),
-                top_k=arguments.get("top_k", 5)
-            )
-        else:
-            result = f"Unknown tool: {name}"
-        
-        return [TextContent(type="text", text=result)]
+    with track_tool(name if name in TOOL_NAMES else "unknown") as call:
+        try:
+            if name == "remember_this":
+                result = await remember_this(
+                    memory=arguments.get("memory"),
+                    extra_context=arguments.get("context")
+                )
+            elif name == "remember_many":
+                result = await remember_many(
+                    memories=arguments.get("memories") or []
+                )
+            elif name == "show_my_memories":
+                result = await show_my_memories(
+                    category=arguments.get("category"),
+                    limit=arguments.get("limit", 10),
+                    verify=arguments.get("verify", False),
+                    order=arguments.get("order", "newest"),
+                    cursor=arguments.get("cursor")
+                )
+            elif name == "recall_memory":
+                result = await recall_memory(
+                    query=arguments.get("query"),
+                    top_k=arguments.get("top_k", 5),
+                    keywords=arguments.get("keywords")
+                )
+            else:
+                result = f"Unknown tool: {name}"
+            
+            call.failed = name not in TOOL_NAMES or result.startswith("❌")
+            return [TextContent(type="text", text=result)]
         
-    except Exception as e:
-        error_msg = f"Error executing {name}: {str(e)}"
-        print(f"❌ {error_msg}")
-        return [TextContent(type="text", text=error_msg)]
+        except Exception as e:
+            call.failed = True
+            error_msg = f"Error executing {name}: {str(e)}"
+            print(f"❌ {error_msg}")
+            return [TextContent(type="text", text=error_msg)]
 
 
-async def remember_this(memory: str, context: Optional[str] = None) -> str:
+async def remember_this(memory: str, extra_context: Optional[str] = None) -> str:
     """
-    Store a new memory in Pinecone with automatic metadata extraction.
+    Store a new memory with automatic metadata extraction.
+    
+    The memory is spooled durably and written to the local store; the outbox
+    worker then embeds it and upserts it to Pinecone in the background, so
+    the call does not wait on OpenAI or Pinecone.
     
     Args:
         memory: The memory text to store
-        context: Optional additional context
+        extra_context: Optional additional context
     
     Returns:
         Success message with memory ID
     """
     try:
-        # Combine memory with context if provided
-        full_text = memory
-        if context:
-            full_text = f"{memory}\n\nContext: {context}"
-        
-        # Generate unique ID
-        memory_id = generate_memory_id(memory)
-        
-        # Extract metadata
-        keywords = extract_keywords(full_text)
-        category = categorize_memory(full_text)
-        
-        # Generate embedding
-        embedding = await generate_embedding(full_text)
-        
-        # Prepare metadata for Pinecone
-        metadata = {
-            "memory_text": memory,
-            "context": context or "",
-            "timestamp": datetime.now().isoformat(),
-            "category": category,
-            "keywords": ", ".join(keywords),
-            "char_count": len(memory)
-        }
-        
-        # Store in Pinecone
-        success = await context.pinecone_client.upsert_memory(
+        with stage("keyword_extraction"):
+            prepared = await run_blocking("local", prepare_memory, memory, extra_context)
+        memory_id = prepared["id"]
+        keywords = prepared["keywords"]
+        category = prepared["category"]
+        metadata = prepared["metadata"]
+        
+        # Spooled before the local write, so a crash in between is repaired
+        # by restore_spooled_memories on the next start
+        with stage("local_store"):
+            await context.outbox.record(memory_id, prepared)
+        context.outbox_worker.notify()
+        
+        await context.memory_store.add_memory_id(
             memory_id=memory_id,
-            embedding=embedding,
-            metadata=metadata
+            memory_text=memory,
+            category=category,
+            keywords=keywords,
+            context=extra_context,
+            timestamp=metadata["timestamp"],
+            created_ts=metadata["created_ts"]
         )
         
-        if success:
-            # Store ID in local storage
-            await context.memory_store.add_memory_id(
-                memory_id=memory_id,
-                memory_text=memory,
-                category=category,
-                keywords=keywords
+        status = "Your memory has been securely stored and will be indexed for retrieval in a moment."
+        if not context.outbox_worker.healthy:
+            pending = (await context.outbox.get_stats())["pending"]
+            status = (
+                f"⏳ Indexing is currently failing ({context.outbox_worker.last_error}). "
+                f"Your memory is saved locally and will be indexed automatically "
+                f"({pending} waiting)."
             )
-            
-            return f"""✅ Memory stored successfully!
+        
+        return f"""✅ Memory stored successfully!
 
 📝 Memory ID: {memory_id}
 🏷️ Category: {category}
 🔑 Keywords: {', '.join(keywords)}
 📅 Timestamp: {metadata['timestamp']}
 
-Your memory has been securely stored and indexed for future retrieval."""
-        else:
-            return "❌ Failed to store memory in Pinecone. Please check your configuration."
+{status}"""
             
     except Exception as e:
         return f"❌ Error storing memory: {str(e)}"
 
 
-async def show_my_memories(category: Optional[str] = None, limit: int = 10) -> str:
+async def remember_many(memories: List[Any]) -> str:
+    """
+    Store many memories through the batched ingest pipeline.
+    
+    Memories are embedded and upserted inline for throughput; any that fail
+    are spooled to the outbox like remember_this, so an OpenAI or Pinecone
+    outage delays their indexing instead of losing them.
+    
+    Args:
+        memories: Strings, or dictionaries with memory and optional context/timestamp
+    
+    Returns:
+        Summary of how many memories were stored
+    """
+    try:
+        if not memories:
+            return "📭 No memories given."
+        
+        totals = await ingest_memories(
+            memories,
+            context.pinecone_client,
+            context.memory_store,
+            outbox=context.outbox
+        )
+        if totals["spooled"]:
+            context.outbox_worker.notify()
+        
+        output = f"✅ Stored {totals['stored'] + totals['spooled']} of {len(memories)} memories"
+        problems = [
+            f"{totals[key]} {label}"
+            for key, label in (
+                ("spooled", "waiting to be indexed"),
+                ("failed", "failed"),
+                ("invalid", "invalid"),
+                ("duplicates", "duplicates")
+            )
+            if totals[key]
+        ]
+        if problems:
+            output += f" ({', '.join(problems)})"
+        return output
+    
+    except Exception as e:
+        return f"❌ Error storing memories: {str(e)}"
+
+
+async def show_my_memories(
+    category: Optional[str] = None,
+    limit: int = 10,
+    verify: bool = False,
+    order: str = "newest",
+    cursor: Optional[str] = None
+) -> str:
     """
     Display all stored memories or filter by category.
     
+    Memories are listed from the local store. Pinecone is only contacted for
+    older records saved without their full text, or when verify is set.
+    
     Args:
         category: Optional category filter
         limit: Maximum number of memories to show
+        verify: Fetch every listed memory from Pinecone and flag missing ones
+        order: "newest" or "oldest" first
+        cursor: Cursor returned with the previous page
     
     Returns:
         Formatted list of memories
     """
     try:
-        # Get all memory IDs from local storage
-        all_memory_ids = await context.memory_store.get_all_memory_ids()
+        stats = await context.memory_store.get_stats()
         
-        if not all_memory_ids:
+        if not stats.get("total_memories"):
             return "📭 No memories stored yet. Use 'remember_this' to store your first memory!"
         
-        # Filter by category if specified
-        if category:
-            filtered_memories = await context.memory_store.get_memories_by_category(category)
-            memory_ids = [m["id"] for m in filtered_memories][:limit]
-        else:
-            memory_ids = all_memory_ids[:limit]
+        page = await context.memory_store.list_memories(
+            limit=limit,
+            category=category,
+            order=order,
+            cursor=cursor
+        )
+        records = page["memories"]
         
-        if not memory_ids:
+        if not records:
+            if cursor:
+                return "📭 No more memories."
             return f"📭 No memories found in category '{category}'"
         
-        # Fetch memories from Pinecone
-        result = await context.pinecone_client.fetch_memories(memory_ids)
-        
-        if "error" in result:
-            return f"❌ Error fetching memories: {result['error']}"
+        # Older records hold truncated text and no context
+        incomplete = [r["id"] for r in records if not r.get("full_payload")]
+        fetch_ids = [r["id"] for r in records] if verify else incomplete
+        remote = None
+        
+        if fetch_ids:
+            result = await context.pinecone_client.fetch_memories(fetch_ids)
+            if "error" in result:
+                if verify:
+                    return f"❌ Error fetching memories: {result['error']}"
+            else:
+                remote = {m["id"]: m["metadata"] for m in result["memories"]}
+                # Upgrade incomplete records so the next listing stays local
+                backfill = {
+                    memory_id: MemoryStore.record_from_metadata(remote[memory_id])
+                    for memory_id in incomplete
+                    if memory_id in remote
+                }
+                if backfill:
+                    await context.memory_store.put_memories(list(backfill.items()))
+                    records = [
+                        {"id": r["id"], **backfill[r["id"]]} if r["id"] in backfill else r
+                        for r in records
+                    ]
         
         # Format output
-        output = f"📚 Showing {len(result['memories'])} memories"
-        if category:
-            output += f" (category: {category})"
-        output += f" out of {len(all_memory_ids)} total:\n\n"
-        
-        for memory in result['memories']:
-            memory_text = memory['metadata'].get('memory_text', 'No text available')
-            output += format_memory_for_display(
-                memory_id=memory['id'],
-                memory_text=memory_text,
-                metadata=memory['metadata']
+        with stage("formatting"):
+            output = f"📚 Showing {len(records)} memories"
+            if category:
+                output += f" (category: {category})"
+            output += f" out of {stats['total_memories']} total ({order} first):\n\n"
+            
+            for record in records:
+                output += format_memory_for_display(
+                    memory_id=record["id"],
+                    memory_text=record.get("text", "No text available"),
+                    metadata={
+                        "timestamp": record.get("created_at"),
+                        "category": record.get("category"),
+                        "keywords": record.get("keywords", [])
+                    }
+                )
+                if verify and remote is not None and record["id"] not in remote:
+                    output += "\n⚠️ Not found in Pinecone"
+                output += "\n"
+            
+            if page["next_cursor"]:
+                output += f"\n➡️ More memories available. Next page cursor: {page['next_cursor']}\n"
+            
+            # Add stats
+            output += f"\n📊 Memory Statistics:\n"
+            output += f"Total memories: {stats['total_memories']}\n"
+            if stats.get('categories'):
+                output += "Categories: " + ", ".join([f"{cat}: {count}" for cat, count in stats['categories'].items()])
+        
+        outbox_stats = await context.outbox.get_stats()
+        if outbox_stats["pending"]:
+            output += f"\n⏳ Waiting to be indexed for recall: {outbox_stats['pending']}"
+        if outbox_stats["dead_lettered"]:
+            output += (
+                f"\n⚠️ Could not be indexed for recall: {outbox_stats['dead_lettered']} "
+                "(retry with: python src/manage.py requeue-outbox)"
             )
-            output += "\n"
-        
-        # Add stats
-        stats = await context.memory_store.get_stats()
-        output += f"\n📊 Memory Statistics:\n"
-        output += f"Total memories: {stats['total_memories']}\n"
-        if stats.get('categories'):
-            output += "Categories: " + ", ".join([f"{cat}: {count}" for cat, count in stats['categories'].items()])
         
         return output
         
@@ -305,34 +619,49 @@ async def show_my_memories(category: Optional[str] = None, limit: int = 10) -> s
         return f"❌ Error showing memories: {str(e)}"
 
 
-async def recall_memory(query: str, top_k: int = 5) -> str:
+async def recall_memory(query: str, top_k: int = 5, keywords: Optional[List[str]] = None) -> str:
     """
     Find memories contextually related to a query using semantic search.
     
     Args:
         query: What the user is trying to remember
         top_k: Number of results to return
+        keywords: Only return memories tagged with at least one of these keywords
     
     Returns:
         Most relevant memories with similarity scores
     """
     try:
         # Extract context from query
-        query_context = extract_context_from_query(query)
+        with stage("keyword_extraction"):
+            query_context = extract_context_from_query(query)
         
         # Generate query embedding
         query_embedding = await generate_embedding(query)
-        
-        # Build filter if category is detected
-        filter_dict = None
-        if query_context.get("filters", {}).get("category"):
-            filter_dict = {"category": query_context["filters"]["category"]}
+        if not any(query_embedding):
+            return "❌ Could not embed the query right now. Please try again in a moment."
+        
+        # Push detected category, keywords and time period down as metadata filters
+        filters = query_context.get("filters", {})
+        if keywords:
+            filters["keywords"] = list(dict.fromkeys(filters.get("keywords", []) + split_keywords(keywords)))
+        filter_dict = build_metadata_filter(filters)
+        
+        # Quoted phrases are resolved locally and restrict the search to
+        # memories that contain them
+        candidate_ids = None
+        if filters.get("exact_phrases"):
+            candidate_ids = await context.memory_store.find_memories_with_phrases(filters["exact_phrases"])
+            if candidate_ids == []:
+                phrases = ", ".join(f'"{p}"' for p in filters["exact_phrases"])
+                return f"🤔 No memories contain {phrases}. Try different wording or remove the quotes."
         
         # Query Pinecone for similar memories
         result = await context.pinecone_client.query_memories(
             query_embedding=query_embedding,
             top_k=top_k,
-            filter_dict=filter_dict
+            filter_dict=filter_dict,
+            ids=candidate_ids
         )
         
         if "error" in result:
@@ -342,22 +671,37 @@ async def recall_memory(query: str, top_k: int = 5) -> str:
             return "🤔 No relevant memories found. Try rephrasing your query or store more memories!"
         
         # Format output
-        output = f"🔍 Found {len(result['memories'])} relevant memories for: '{query}'\n\n"
-        
-        for i, memory in enumerate(result['memories'], 1):
-            memory_text = memory['metadata'].get('memory_text', 'No text available')
-            output += f"#{i} "
-            output += format_memory_for_display(
-                memory_id=memory['id'],
-                memory_text=memory_text,
-                metadata=memory['metadata'],
-                score=memory['score']
+        with stage("formatting"):
+            output = f"🔍 Found {len(result['memories'])} relevant memories for: '{query}'\n\n"
+            
+            if result.get("degraded"):
+                output += "⚠️ Pinecone is unavailable; these results come from the local mirror and may be incomplete.\n\n"
+            
+            current_model = embedding_metadata()["embedding_model"]
+            other_models = sorted(
+                {memory['metadata'].get('embedding_model') for memory in result['memories']} - {None, current_model}
             )
-            output += "\n"
-        
-        # Add search context if filters were applied
-        if filter_dict:
-            output += f"\n🔎 Search filters applied: {filter_dict}"
+            if other_models:
+                output += (
+                    f"⚠️ Some memories were embedded with {', '.join(other_models)} instead of {current_model}; "
+                    "their scores are not comparable. Export and re-import to re-embed them.\n\n"
+                )
+            
+            for i, memory in enumerate(result['memories'], 1):
+                memory_text = memory['metadata'].get('memory_text', 'No text available')
+                output += f"#{i} "
+                output += format_memory_for_display(
+                    memory_id=memory['id'],
+                    memory_text=memory_text,
+                    metadata=memory['metadata'],
+                    score=memory['score']
+                )
+                output += "\n"
+            
+            # Add search context if filters were applied
+            if filter_dict or candidate_ids is not None:
+                applied = {k: filters[k] for k in ("category", "keywords", "time_period", "exact_phrases") if filters.get(k)}
+                output += f"\n🔎 Search filters applied: {applied}"
         
         return output
         
@@ -370,6 +714,14 @@ async def main():
     # Initialize context at startup
     await initialize_context()
     
+    try:
+        await run_transport()
+    finally:
+        await shutdown_context()
+
+
+async def run_transport():
+    """Run the MCP server over the configured transport."""
     # Determine transport from environment or command line
     transport = os.getenv("MCP_TRANSPORT", "stdio")
     
@@ -388,7 +740,7 @@ Usage:
     
 Options:
     --stdio, -i    Use stdio transport (default)
-    --sse, -s      Use SSE/HTTP transport
+    --sse, -s      Use SSE/HTTP transport (serves /health and /metrics too)
     --help, -h     Show this help message
     
 Environment Variables:
@@ -405,7 +757,8 @@ Environment Variables:
         
         print(f"🚀 Starting Pinecone Memory MCP Server (SSE mode)")
         print(f"📡 Listening on http://{host}:{port}")
-        print(f"📝 Tools available: remember_this, show_my_memories, recall_memory")
+        print(f"📈 Metrics at http://{host}:{port}/metrics")
+        print(f"📝 Tools available: remember_this, remember_many, show_my_memories, recall_memory")
         
         from aiohttp import web
         app = web.Application()
@@ -427,6 +780,12 @@ Environment Variables:
         
         app.router.add_get("/health", health_check)
         
+        # Prometheus scrape endpoint
+        async def metrics_endpoint(request):
+            return web.Response(body=(await render_metrics()).encode("utf-8"), headers={"Content-Type": CONTENT_TYPE})
+        
+        app.router.add_get("/metrics", metrics_endpoint)
+        
         # Run the web server
         runner = web.AppRunner(app)
         await runner.setup()
@@ -0,0 +1,270 @@
+"""
+Bulk memory ingestion.
+Runs memories through a staged pipeline - metadata extraction, batched
+embedding, batched Pinecone upsert and one group-committed local store write
+per chunk - with a bounded number of chunks in flight. Given the write outbox,
+memories that fail to embed or upsert are spooled for the background worker
+instead of being dropped.
+"""
+
+import asyncio
+import json
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Iterable, Callable
+
+from utils import (
+    generate_embeddings,
+    embedding_metadata,
+    generate_memory_id,
+    extract_keywords,
+    categorize_memory
+)
+
+# Memories per pipeline chunk (one embedding batch, one store commit)
+DEFAULT_CHUNK_SIZE = 256
+# Chunks processed concurrently; bounds memory use and API pressure
+DEFAULT_MAX_CHUNKS_IN_FLIGHT = 4
+
+
+def embedding_text(memory: str, extra_context: Optional[str] = None) -> str:
+    """
+    Build the text that is embedded for a memory.
+    
+    Args:
+        memory: The memory text
+        extra_context: Optional additional context
+    
+    Returns:
+        The memory, followed by its context if any
+    """
+    if extra_context:
+        return f"{memory}\n\nContext: {extra_context}"
+    return memory
+
+
+def prepare_memory(
+    memory: str,
+    extra_context: Optional[str] = None,
+    timestamp: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Build the ID, embedding text and metadata for a new memory.
+    
+    Args:
+        memory: The memory text
+        extra_context: Optional additional context
+        timestamp: ISO creation time; defaults to now
+    
+    Returns:
+        Dictionary with id, full_text (the text to embed), keywords,
+        category and metadata (the Pinecone metadata)
+    """
+    full_text = embedding_text(memory, extra_context)
+    keywords = extract_keywords(full_text)
+    category = categorize_memory(full_text)
+    created = datetime.fromisoformat(timestamp) if timestamp else datetime.now()
+    
+    return {
+        "id": generate_memory_id(memory),
+        "full_text": full_text,
+        "keywords": keywords,
+        "category": category,
+        "metadata": {
+            "memory_text": memory,
+            "context": extra_context or "",
+            "timestamp": created.isoformat(),
+            # Numeric copy of the timestamp so queries can range-filter on it
+            "created_ts": created.timestamp(),
+            "category": category,
+            # A list, so recall can filter on keywords with $in
+            "keywords": keywords,
+            "char_count": len(memory)
+        }
+    }
+
+
+def parse_memory_item(item: Any) -> Dict[str, Any]:
+    """
+    Normalize one input memory.
+    
+    Args:
+        item: A string, or a dictionary with "memory" (or "text") and optional
+            "context" and "timestamp"
+    
+    Returns:
+        Dictionary with memory, context and timestamp
+    
+    Raises:
+        ValueError: If the item has no memory text, or a context or
+            timestamp that is not a string
+    """
+    if isinstance(item, str):
+        item = {"memory": item}
+    if not isinstance(item, dict):
+        raise ValueError(f"Expected a string or object, got {type(item).__name__}")
+    
+    memory = item.get("memory") or item.get("text")
+    if not isinstance(memory, str) or not memory.strip():
+        raise ValueError("Memory text is missing")
+    context = item.get("context")
+    if context is not None and not isinstance(context, str):
+        raise ValueError(f"Context must be a string, got {type(context).__name__}")
+    timestamp = item.get("timestamp")
+    if timestamp is not None and not isinstance(timestamp, str):
+        raise ValueError(f"Timestamp must be an ISO 8601 string, got {type(timestamp).__name__}")
+    return {
+        "memory": memory,
+        "context": context,
+        "timestamp": timestamp
+    }
+
+
+def read_jsonl(lines: Iterable[str]) -> Iterable[Any]:
+    """
+    Parse a JSONL stream lazily, skipping blank lines.
+    
+    Args:
+        lines: Lines of JSON (objects or strings)
+    
+    Yields:
+        Parsed items; None for lines that are not valid JSON, which the
+        pipeline then counts as invalid
+    """
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            print(f"Invalid JSON on line {number}: {str(e)}")
+            yield None
+
+
+async def _ingest_chunk(items: List[Any], pinecone_client, memory_store, outbox=None) -> Dict[str, int]:
+    """Run one chunk through every pipeline stage."""
+    stats = {"stored": 0, "spooled": 0, "failed": 0, "invalid": 0, "duplicates": 0}
+    
+    prepared = []
+    for item in items:
+        try:
+            parsed = parse_memory_item(item)
+            prepared.append(prepare_memory(parsed["memory"], parsed["context"], parsed["timestamp"]))
+        except (TypeError, ValueError) as e:
+            # One malformed memory must not fail the rest of its chunk
+            print(f"Skipping memory: {str(e)}")
+            stats["invalid"] += 1
+    if not prepared:
+        return stats
+    
+    embeddings = await generate_embeddings([p["full_text"] for p in prepared])
+    
+    # A zero vector means embedding failed; Pinecone would reject it anyway
+    model_metadata = embedding_metadata()
+    vectors, embedded, unindexed = [], [], []
+    for memory, embedding in zip(prepared, embeddings):
+        if any(embedding):
+            vectors.append({"id": memory["id"], "values": embedding, "metadata": {**memory["metadata"], **model_metadata}})
+            embedded.append(memory)
+        else:
+            unindexed.append(memory)
+    
+    results = await pinecone_client.upsert_memories(vectors) if vectors else []
+    upserted = [memory for memory, ok in zip(embedded, results) if ok]
+    unindexed.extend(memory for memory, ok in zip(embedded, results) if not ok)
+    
+    # Spooled before the local write, as in remember_this, so the worker
+    # indexes them once OpenAI or Pinecone recovers
+    spooled = []
+    if outbox is not None:
+        await outbox.record_many([(memory["id"], memory) for memory in unindexed])
+        spooled = unindexed
+    else:
+        stats["failed"] += len(unindexed)
+    
+    added = await memory_store.add_memories([
+        (
+            memory["id"],
+            memory_store.build_record(
+                memory["metadata"]["memory_text"],
+                memory["category"],
+                memory["keywords"],
+                memory["metadata"]["context"],
+                memory["metadata"]["timestamp"],
+                memory["metadata"]["created_ts"]
+            )
+        )
+        for memory in upserted + spooled
+    ])
+    stats["stored"] += sum(added[:len(upserted)])
+    stats["spooled"] += sum(added[len(upserted):])
+    stats["duplicates"] += len(added) - sum(added)
+    return stats
+
+
+async def ingest_memories(
+    items: Iterable[Any],
+    pinecone_client,
+    memory_store,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    max_chunks_in_flight: int = DEFAULT_MAX_CHUNKS_IN_FLIGHT,
+    on_progress: Optional[Callable[[Dict[str, int]], None]] = None,
+    outbox=None
+) -> Dict[str, int]:
+    """
+    Store many memories.
+    
+    Items are read lazily in chunks, and at most max_chunks_in_flight chunks
+    are held at once, so arbitrarily long streams use bounded memory.
+    
+    Args:
+        items: Memories as accepted by parse_memory_item
+        pinecone_client: PineconeMemoryClient to upsert into
+        memory_store: MemoryStore to record stored memories in
+        chunk_size: Memories per chunk
+        max_chunks_in_flight: Chunks processed concurrently
+        on_progress: Called with the running totals after each chunk
+        outbox: WriteOutbox to spool memories that could not be indexed; they
+            are then kept locally and indexed later by the outbox worker
+            instead of counting as failed
+    
+    Returns:
+        Totals: stored, spooled (stored locally, waiting in the outbox),
+        failed (embedding or upsert failed and not spooled), invalid
+        (unparseable input) and duplicates (ID already in the local store)
+    """
+    chunk_size = max(1, chunk_size)
+    totals = {"stored": 0, "spooled": 0, "failed": 0, "invalid": 0, "duplicates": 0}
+    slots = asyncio.Semaphore(max(1, max_chunks_in_flight))
+    tasks = set()
+    
+    async def run(chunk: List[Any]):
+        try:
+            try:
+                stats = await _ingest_chunk(chunk, pinecone_client, memory_store, outbox)
+            except Exception as e:
+                print(f"Error ingesting chunk: {str(e)}")
+                stats = {"failed": len(chunk)}
+            for key, value in stats.items():
+                totals[key] += value
+            if on_progress is not None:
+                on_progress(dict(totals))
+        finally:
+            slots.release()
+    
+    chunk: List[Any] = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= chunk_size:
+            await slots.acquire()
+            task = asyncio.ensure_future(run(chunk))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            chunk = []
+    if chunk:
+        await slots.acquire()
+        tasks.add(asyncio.ensure_future(run(chunk)))
+    
+    if tasks:
+        await asyncio.gather(*tasks)
+    return totals
\ No newline at end of file
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Maintenance commands for the Pinecone Memory MCP Server.
+
+Usage:
+    python manage.py migrate-store         # Copy memory_ids.json into a SQLite store
+    python manage.py backfill-timestamps   # Add created_ts to older memories in Pinecone
+    python manage.py backfill-keywords     # Store older memories' keywords as lists
+    python manage.py ingest notes.jsonl    # Bulk-import memories from JSONL
+    python manage.py export backup/        # Export vectors and metadata
+    python manage.py import backup/        # Import an export into the current index
+    python manage.py requeue-outbox        # Retry memories that gave up on indexing
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime
+from typing import Dict, Any, Optional, Callable
+
+from storage_backends import DEFAULT_JSON_PATH, DEFAULT_SQLITE_PATH, migrate_json_to_sqlite
+from vector_index import DEFAULT_SNAPSHOT_PATH
+from utils import split_keywords
+from ingest import DEFAULT_CHUNK_SIZE, DEFAULT_MAX_CHUNKS_IN_FLIGHT
+from transfer import DEFAULT_PART_SIZE, EXPORT_FORMATS
+from outbox import WriteOutbox, DEFAULT_OUTBOX_PATH
+
+
+def migrate_store(args) -> bool:
+    """Migrate the JSON memory store to SQLite."""
+    print(f"🔄 Migrating {args.source} → {args.target}...")
+    count = migrate_json_to_sqlite(args.source, args.target)
+    print(f"✅ Migrated {count} memories")
+    print(f"   Set MEMORY_STORE_BACKEND=sqlite and MEMORY_STORE_PATH={args.target} to use it")
+    return True
+
+
+async def _backfill_metadata(fields_for: Callable[[Dict[str, Any]], Optional[Dict[str, Any]]]) -> int:
+    """
+    Update metadata on every memory in Pinecone that needs it.
+    
+    Args:
+        fields_for: Returns the fields to set for a memory's metadata, or None
+            if it is already up to date
+    
+    Returns:
+        Number of memories updated
+    """
+    # Imported here so store-only commands work without Pinecone configured
+    from pinecone_client import PineconeMemoryClient
+    
+    client = PineconeMemoryClient()
+    updated = 0
+    async for ids in client.list_memory_id_pages():
+        result = await client.fetch_memories(ids)
+        if "error" in result:
+            raise RuntimeError(result["error"])
+        
+        updates = []
+        for memory in result["memories"]:
+            fields = fields_for(memory["metadata"] or {})
+            if fields:
+                updates.append(client.update_metadata(memory["id"], fields))
+        
+        updated += sum(await asyncio.gather(*updates))
+    return updated
+
+
+def _run_backfill(description: str, fields_for: Callable[[Dict[str, Any]], Optional[Dict[str, Any]]]) -> bool:
+    """Run a metadata backfill and invalidate the saved vector mirror."""
+    print(f"🔄 Backfilling {description} in Pinecone metadata...")
+    count = asyncio.run(_backfill_metadata(fields_for))
+    print(f"✅ Updated {count} memories")
+    
+    # A saved mirror would keep serving the old metadata
+    snapshot = os.getenv("LOCAL_VECTOR_SNAPSHOT", DEFAULT_SNAPSHOT_PATH)
+    if count and snapshot and os.path.exists(snapshot):
+        os.remove(snapshot)
+        print(f"   Removed {snapshot}; the local vector mirror will resync on next start")
+    return True
+
+
+def _timestamp_fields(metadata: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """created_ts derived from the ISO timestamp, if missing."""
+    if "created_ts" in metadata or not metadata.get("timestamp"):
+        return None
+    return {"created_ts": datetime.fromisoformat(metadata["timestamp"]).timestamp()}
+
+
+def _keyword_fields(metadata: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Keywords as a list, if stored as a comma-joined string."""
+    keywords = metadata.get("keywords")
+    if not isinstance(keywords, str):
+        return None
+    return {"keywords": split_keywords(keywords)}
+
+
+def backfill_timestamps(args) -> bool:
+    """Add numeric timestamps to memories stored before they were recorded."""
+    return _run_backfill("created_ts", _timestamp_fields)
+
+
+def backfill_keywords(args) -> bool:
+    """Convert comma-joined keyword strings to lists so they can be filtered on."""
+    return _run_backfill("keyword lists", _keyword_fields)
+
+
+async def _ingest(args) -> dict:
+    """Run the ingest pipeline over a JSONL file or stdin."""
+    from pinecone_client import PineconeMemoryClient
+    from memory_store import MemoryStore
+    from ingest import ingest_memories, read_jsonl
+    
+    client = PineconeMemoryClient()
+    store = MemoryStore()
+    
+    def progress(totals):
+        done = sum(totals.values())
+        print(f"\r   {done} processed, {totals['stored']} stored", end="", flush=True)
+    
+    source = sys.stdin if args.path == "-" else open(args.path, "r", encoding="utf-8")
+    try:
+        totals = await ingest_memories(
+            read_jsonl(source),
+            client,
+            store,
+            chunk_size=args.chunk_size,
+            max_chunks_in_flight=args.concurrency,
+            on_progress=progress
+        )
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        await client.aclose()
+        await store.aclose()
+    print()
+    return totals
+
+
+def ingest(args) -> bool:
+    """Bulk-import memories from a JSONL file."""
+    print(f"🔄 Ingesting memories from {'stdin' if args.path == '-' else args.path}...")
+    start = time.monotonic()
+    totals = asyncio.run(_ingest(args))
+    elapsed = time.monotonic() - start
+    print(f"✅ Stored {totals['stored']} memories in {elapsed:.1f}s")
+    for key in ("failed", "invalid", "duplicates"):
+        if totals[key]:
+            print(f"   {totals[key]} {key}")
+    return totals["failed"] == 0 and totals["invalid"] == 0
+
+
+async def _export(args) -> dict:
+    """Export the index into a directory of part files."""
+    from pinecone_client import PineconeMemoryClient
+    from transfer import export_memories
+    
+    client = PineconeMemoryClient()
+    
+    def progress(manifest):
+        print(f"\r   {manifest['exported']} exported in {len(manifest['parts'])} parts", end="", flush=True)
+    
+    try:
+        manifest = await export_memories(
+            client,
+            args.directory,
+            fmt=args.format,
+            part_size=args.part_size,
+            on_progress=progress
+        )
+    finally:
+        await client.aclose()
+    print()
+    return manifest
+
+
+def export(args) -> bool:
+    """Export every memory's vector and metadata; reruns resume a partial export."""
+    print(f"🔄 Exporting memories to {args.directory}...")
+    start = time.monotonic()
+    manifest = asyncio.run(_export(args))
+    elapsed = time.monotonic() - start
+    print(f"✅ Exported {manifest['exported']} memories in {len(manifest['parts'])} parts in {elapsed:.1f}s")
+    return True
+
+
+async def _import(args) -> dict:
+    """Import an export directory into the configured index."""
+    from pinecone_client import PineconeMemoryClient
+    from memory_store import MemoryStore
+    from transfer import import_memories
+    
+    client = PineconeMemoryClient()
+    store = None if args.skip_local_store else MemoryStore()
+    
+    def progress(totals):
+        print(f"\r   {totals['imported']} imported, {totals['reembedded']} re-embedded", end="", flush=True)
+    
+    try:
+        totals = await import_memories(client, args.directory, store, on_progress=progress)
+    finally:
+        await client.aclose()
+        if store is not None:
+            await store.aclose()
+    print()
+    return totals
+
+
+def import_(args) -> bool:
+    """Import an export; reruns skip parts that were already imported."""
+    print(f"🔄 Importing memories from {args.directory}...")
+    start = time.monotonic()
+    totals = asyncio.run(_import(args))
+    elapsed = time.monotonic() - start
+    print(f"✅ Imported {totals['imported']} memories in {elapsed:.1f}s")
+    if totals["reembedded"]:
+        print(f"   {totals['reembedded']} re-embedded for the target index's dimension")
+    if totals["skipped_parts"]:
+        print(f"   {totals['skipped_parts']} parts already imported")
+    if totals["failed"]:
+        print(f"   {totals['failed']} failed; rerun to retry them")
+    return totals["failed"] == 0
+
+
+async def _requeue_outbox(path: str) -> int:
+    """Move dead-lettered outbox entries back into the spool."""
+    outbox = WriteOutbox(path)
+    try:
+        return await outbox.requeue_dead_letters()
+    finally:
+        outbox.close()
+
+
+def requeue_outbox(args) -> bool:
+    """Retry memories the outbox worker gave up on; the server indexes them on its next round."""
+    count = asyncio.run(_requeue_outbox(args.path))
+    print(f"✅ Requeued {count} memories for indexing")
+    return True
+
+
+def main():
+    """Main CLI entry point."""
+    parser = argparse.ArgumentParser(
+        description="Pinecone Memory MCP - Maintenance Commands",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python manage.py migrate-store
+  python manage.py migrate-store --source memory_ids.json --target memory_store.db
+  python manage.py backfill-timestamps
+  python manage.py backfill-keywords
+  python manage.py ingest notes.jsonl
+  cat notes.jsonl | python manage.py ingest -
+  python manage.py export backup/ --format npz
+  python manage.py import backup/
+  python manage.py requeue-outbox
+        """
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    migrate_parser = subparsers.add_parser(
+        "migrate-store",
+        help="Copy the JSON memory store into a SQLite store"
+    )
+    migrate_parser.add_argument("--source", default=DEFAULT_JSON_PATH, help="JSON store to read")
+    migrate_parser.add_argument("--target", default=DEFAULT_SQLITE_PATH, help="SQLite store to write")
+    migrate_parser.set_defaults(handler=migrate_store)
+    
+    backfill_parser = subparsers.add_parser(
+        "backfill-timestamps",
+        help="Add numeric created_ts metadata to older memories so time filters match them"
+    )
+    backfill_parser.set_defaults(handler=backfill_timestamps)
+    
+    keywords_parser = subparsers.add_parser(
+        "backfill-keywords",
+        help="Store older memories' comma-joined keywords as lists so keyword filters match them"
+    )
+    keywords_parser.set_defaults(handler=backfill_keywords)
+    
+    ingest_parser = subparsers.add_parser(
+        "ingest",
+        help="Bulk-import memories from JSONL (one string or {\"memory\", \"context\", \"timestamp\"} object per line)"
+    )
+    ingest_parser.add_argument("path", help="JSONL file to read, or - for stdin")
+    ingest_parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Memories per batch")
+    ingest_parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_MAX_CHUNKS_IN_FLIGHT,
+        help="Batches processed at once"
+    )
+    ingest_parser.set_defaults(handler=ingest)
+    
+    export_parser = subparsers.add_parser(
+        "export",
+        help="Export every memory's vector and metadata to a directory (rerun to resume)"
+    )
+    export_parser.add_argument("directory", help="Directory to write the manifest and part files to")
+    export_parser.add_argument("--format", choices=EXPORT_FORMATS, default="jsonl", help="Part file format")
+    export_parser.add_argument("--part-size", type=int, default=DEFAULT_PART_SIZE, help="Memories per part file")
+    export_parser.set_defaults(handler=export)
+    
+    import_parser = subparsers.add_parser(
+        "import",
+        help="Import an export into the configured index (rerun to resume)"
+    )
+    import_parser.add_argument("directory", help="Directory written by export")
+    import_parser.add_argument(
+        "--skip-local-store",
+        action="store_true",
+        help="Only write to Pinecone, not the local memory store"
+    )
+    import_parser.set_defaults(handler=import_)
+    
+    requeue_parser = subparsers.add_parser(
+        "requeue-outbox",
+        help="Retry memories that were dead-lettered after failing to index too many times"
+    )
+    requeue_parser.add_argument(
+        "--path",
+        default=os.getenv("OUTBOX_PATH", DEFAULT_OUTBOX_PATH),
+        help="Outbox database"
+    )
+    requeue_parser.set_defaults(handler=requeue_outbox)
+    
+    args = parser.parse_args()
+    success = args.handler(args)
+    sys.exit(0 if success else 1)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n⚠️  Operation cancelled")
+        sys.exit(1)
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
\ No newline at end of file
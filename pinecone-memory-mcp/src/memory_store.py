@@ -3,48 +3,346 @@ Local storage system for managing memory IDs and metadata.
 Provides fast access to memory identifiers without querying Pinecone.
 """
 
-import json
-import os
-from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple, Callable
 from datetime import datetime
-import aiofiles
 import asyncio
-from threading import Lock
+import base64
+import json
+
+from async_io import run_blocking
+from storage_backends import StorageBackend, Operation, SortKey, create_storage_backend
+from text_index import InvertedIndex, tokenize
+from utils import split_keywords
+from metrics import stage, count_backend_error
+
+# Upper bound on mutations applied in one group commit
+DEFAULT_MAX_GROUP_SIZE = 1000
+
+# Most memories an exact-phrase lookup hands on to vector rescoring
+MAX_PHRASE_CANDIDATES = 1000
+
+
+async def _run_local(func: Callable[..., Any], *args: Any) -> Any:
+    """
+    Run a blocking storage call on the local executor, timed as a store stage.
+    
+    Args:
+        func: Storage backend method
+        *args: Positional arguments for func
+    
+    Returns:
+        Whatever func returns
+    """
+    with stage("local_store"):
+        try:
+            return await run_blocking("local", func, *args)
+        except Exception as e:
+            count_backend_error("local_store", func.__name__, e)
+            raise
+
+
+def encode_cursor(key: SortKey) -> str:
+    """
+    Encode a listing position as an opaque cursor string.
+    
+    Args:
+        key: (created_at, memory_id) of the last memory on a page
+    
+    Returns:
+        URL-safe cursor
+    """
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> SortKey:
+    """
+    Decode a cursor produced by encode_cursor.
+    
+    Args:
+        cursor: Cursor string
+    
+    Returns:
+        (created_at, memory_id) sort key
+    
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        created_at, memory_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except Exception:
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return (str(created_at), str(memory_id))
+
+
+class GroupCommitWriter:
+    """
+    Single writer task for a storage backend.
+    
+    Mutations from concurrent callers are queued; while one commit is being
+    written, later mutations accumulate and are applied together in the next.
+    """
+    
+    def __init__(
+        self,
+        backend: StorageBackend,
+        max_group_size: int = DEFAULT_MAX_GROUP_SIZE,
+        on_commit: Optional[Callable[[List[Operation], List[bool]], None]] = None
+    ):
+        """
+        Initialize the writer.
+        
+        Args:
+            backend: Storage backend to write to
+            max_group_size: Maximum number of mutations per commit
+            on_commit: Called with the operations and their results after
+                each successful commit
+        """
+        self.backend = backend
+        self.max_group_size = max(1, max_group_size)
+        self.on_commit = on_commit
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        
+        self._stats = {
+            "operations": 0,
+            "commits": 0,
+            "largest_group": 0
+        }
+    
+    def _ensure_started(self):
+        """Start the writer task in the running event loop."""
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue()
+            self._task = asyncio.ensure_future(self._run())
+    
+    async def submit(self, operations: List[Operation]) -> List[bool]:
+        """
+        Queue mutations and wait until they are committed.
+        
+        Args:
+            operations: Mutations to apply in order
+        
+        Returns:
+            Per-operation result from the backend
+        """
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((operations, future))
+        # Shield so a cancelled caller cannot abort a commit shared with others
+        with stage("local_store"):
+            return await asyncio.shield(future)
+    
+    async def _run(self):
+        """Apply queued mutations until a close sentinel arrives."""
+        closing = False
+        while not closing:
+            item = await self._queue.get()
+            if item is None:
+                break
+            
+            group: List[Tuple[List[Operation], asyncio.Future]] = [item]
+            size = len(item[0])
+            while size < self.max_group_size and not self._queue.empty():
+                item = self._queue.get_nowait()
+                if item is None:
+                    closing = True
+                    break
+                group.append(item)
+                size += len(item[0])
+            
+            operations = [op for ops, _ in group for op in ops]
+            try:
+                results = await run_blocking("local", self.backend.apply, operations)
+            except Exception as e:
+                count_backend_error("local_store", "apply", e)
+                for _, future in group:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            
+            self._stats["operations"] += len(operations)
+            self._stats["commits"] += 1
+            self._stats["largest_group"] = max(self._stats["largest_group"], len(operations))
+            
+            if self.on_commit is not None:
+                try:
+                    self.on_commit(operations, results)
+                except Exception as e:
+                    print(f"Error in commit hook: {str(e)}")
+            
+            offset = 0
+            for ops, future in group:
+                if not future.done():
+                    future.set_result(results[offset:offset + len(ops)])
+                offset += len(ops)
+    
+    async def aclose(self):
+        """Commit everything queued so far and stop the writer task."""
+        if self._task is not None and not self._task.done():
+            self._queue.put_nowait(None)
+            await self._task
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get group commit statistics.
+        
+        Returns:
+            Dictionary of operation and commit counters
+        """
+        commits = self._stats["commits"]
+        return {
+            **self._stats,
+            "avg_group_size": (self._stats["operations"] / commits) if commits else 0.0
+        }
 
 
 class MemoryStore:
     """Manages local storage of memory IDs and metadata."""
     
-    def __init__(self, storage_path: str = "memory_ids.json"):
+    def __init__(
+        self,
+        storage_path: Optional[str] = None,
+        backend: Optional[str] = None
+    ):
         """
         Initialize the memory store.
         
         Args:
-            storage_path: Path to the JSON file for storing memory IDs
-        """
-        self.storage_path = Path(storage_path)
-        self.lock = Lock()
-        self._ensure_storage_exists()
-    
-    def _ensure_storage_exists(self):
-        """Create storage file if it doesn't exist."""
-        if not self.storage_path.exists():
-            initial_data = {
-                "vector_ids": [],
-                "memories": {},
-                "last_updated": datetime.now().isoformat(),
-                "total_memories": 0
-            }
-            with open(self.storage_path, 'w') as f:
-                json.dump(initial_data, f, indent=2)
+            storage_path: Path to the storage file; defaults to MEMORY_STORE_PATH
+                or memory_ids.json / memory_store.db depending on the backend
+            backend: "json" (default) or "sqlite"; defaults to MEMORY_STORE_BACKEND
+        """
+        self.backend: StorageBackend = create_storage_backend(backend, storage_path)
+        self.storage_path = self.backend.path
+        
+        # All mutations go through one writer so concurrent adds never race
+        self.writer = GroupCommitWriter(self.backend, on_commit=self._on_commit)
+        
+        # Full-text index over memory text and keywords, built on first search
+        self.text_index: Optional[InvertedIndex] = None
+        self._text_index_version: Any = None
+        self._text_index_lock: Optional[asyncio.Lock] = None
+        # Commits that land while the index is being rebuilt, replayed afterwards
+        self._commits_during_build: Optional[List[Tuple[List[Operation], List[bool]]]] = None
+    
+    @staticmethod
+    def _indexed_text(record: Dict[str, Any]) -> str:
+        """Text searched for a record: the memory followed by its context."""
+        return f"{record.get('text', '')}\n{record.get('context', '')}"
+    
+    @classmethod
+    def _apply_to_text_index(cls, index: InvertedIndex, operations: List[Operation], results: List[bool]):
+        """Mirror committed mutations into a text index."""
+        for (op, memory_id, record), applied in zip(operations, results):
+            if not applied:
+                continue
+            if op in ("add", "put"):
+                index.add(memory_id, cls._indexed_text(record), record.get("keywords", []))
+            elif op == "remove":
+                index.remove(memory_id)
+    
+    def _on_commit(self, operations: List[Operation], results: List[bool]):
+        """Keep the text index in step with the store."""
+        if self._commits_during_build is not None:
+            self._commits_during_build.append((operations, results))
+        if self.text_index is not None:
+            self._apply_to_text_index(self.text_index, operations, results)
+    
+    def _build_text_index(self) -> Tuple[InvertedIndex, Any]:
+        """Index every stored memory. Runs on the executor."""
+        version = self.backend.data_version()
+        index = InvertedIndex()
+        for memory_id, record in self.backend.iter_memories():
+            index.add(memory_id, self._indexed_text(record), record.get("keywords", []))
+        return index, version
+    
+    async def _ensure_text_index(self) -> InvertedIndex:
+        """Build the text index on first use or after another writer changed the store."""
+        if self._text_index_lock is None:
+            self._text_index_lock = asyncio.Lock()
+        
+        async with self._text_index_lock:
+            version = await _run_local(self.backend.data_version)
+            if self.text_index is not None and version == self._text_index_version:
+                return self.text_index
+            
+            self._commits_during_build = []
+            try:
+                index, version = await _run_local(self._build_text_index)
+                # Replay our own commits that may have missed the snapshot;
+                # add/remove are idempotent so overlap is harmless
+                for operations, results in self._commits_during_build:
+                    self._apply_to_text_index(index, operations, results)
+            finally:
+                self._commits_during_build = None
+            
+            self.text_index = index
+            self._text_index_version = version
+            return index
+    
+    @staticmethod
+    def build_record(
+        memory_text: str,
+        category: str = "general",
+        keywords: List[str] = None,
+        context: Optional[str] = None,
+        timestamp: Optional[str] = None,
+        created_ts: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Build the stored record holding everything needed to display a memory.
+        
+        Args:
+            memory_text: The full memory text
+            category: Category of the memory
+            keywords: List of keywords associated with the memory
+            context: Optional additional context
+            timestamp: ISO creation time; defaults to now
+            created_ts: Creation time in epoch seconds; derived from timestamp if None
+        
+        Returns:
+            Record dictionary
+        """
+        created = datetime.fromisoformat(timestamp) if timestamp else datetime.now()
+        return {
+            "text": memory_text,
+            "context": context or "",
+            "category": category,
+            "keywords": keywords or [],
+            "created_at": timestamp or created.isoformat(),
+            "created_ts": created_ts if created_ts is not None else created.timestamp(),
+            "full_payload": True
+        }
+    
+    @classmethod
+    def record_from_metadata(cls, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Build a stored record from a memory's Pinecone metadata.
+        
+        Args:
+            metadata: Pinecone metadata written by remember_this
+        
+        Returns:
+            Record dictionary
+        """
+        return cls.build_record(
+            metadata.get("memory_text", ""),
+            category=metadata.get("category", "general"),
+            keywords=split_keywords(metadata.get("keywords", [])),
+            context=metadata.get("context"),
+            timestamp=metadata.get("timestamp"),
+            created_ts=metadata.get("created_ts")
+        )
     
     async def add_memory_id(
         self,
         memory_id: str,
         memory_text: str,
         category: str = "general",
-        keywords: List[str] = None
+        keywords: List[str] = None,
+        context: Optional[str] = None,
+        timestamp: Optional[str] = None,
+        created_ts: Optional[float] = None
     ) -> bool:
         """
         Add a new memory ID to the store.
@@ -54,42 +352,60 @@ class MemoryStore:
             memory_text: The actual memory text
             category: Category of the memory
             keywords: List of keywords associated with the memory
+            context: Optional additional context
+            timestamp: ISO creation time, matching the Pinecone metadata
+            created_ts: Creation time in epoch seconds, matching the Pinecone metadata
         
         Returns:
             Success status
         """
         try:
-            # Read current data
-            async with aiofiles.open(self.storage_path, 'r') as f:
-                data = json.loads(await f.read())
-            
-            # Add new memory ID if not already present
-            if memory_id not in data["vector_ids"]:
-                data["vector_ids"].append(memory_id)
-                
-                # Store memory metadata
-                data["memories"][memory_id] = {
-                    "text": memory_text[:500],  # Store first 500 chars
-                    "category": category,
-                    "keywords": keywords or [],
-                    "created_at": datetime.now().isoformat()
-                }
-                
-                data["total_memories"] = len(data["vector_ids"])
-                data["last_updated"] = datetime.now().isoformat()
-                
-                # Write updated data
-                async with aiofiles.open(self.storage_path, 'w') as f:
-                    await f.write(json.dumps(data, indent=2))
-                
-                return True
-            
-            return False  # Memory ID already exists
+            record = self.build_record(memory_text, category, keywords, context, timestamp, created_ts)
+            # False means the memory ID already exists
+            results = await self.writer.submit([("add", memory_id, record)])
+            return results[0]
             
         except Exception as e:
             print(f"Error adding memory ID: {str(e)}")
             return False
     
+    async def add_memories(self, records: List[Tuple[str, Dict[str, Any]]]) -> List[bool]:
+        """
+        Add several memories in one commit.
+        
+        Args:
+            records: (memory_id, record) pairs, records built with build_record
+        
+        Returns:
+            Per-memory success; False if the ID already exists or the write failed
+        """
+        if not records:
+            return []
+        try:
+            return await self.writer.submit([("add", memory_id, record) for memory_id, record in records])
+        
+        except Exception as e:
+            print(f"Error adding memories: {str(e)}")
+            return [False] * len(records)
+    
+    async def put_memories(self, records: List[Tuple[str, Dict[str, Any]]]) -> bool:
+        """
+        Insert or replace records, e.g. to backfill full payloads from Pinecone.
+        
+        Args:
+            records: (memory_id, record) pairs
+        
+        Returns:
+            Success status
+        """
+        try:
+            await self.writer.submit([("put", memory_id, record) for memory_id, record in records])
+            return True
+        
+        except Exception as e:
+            print(f"Error writing memories: {str(e)}")
+            return False
+    
     async def get_all_memory_ids(self) -> List[str]:
         """
         Get all stored memory IDs.
@@ -98,9 +414,7 @@ class MemoryStore:
             List of memory IDs
         """
         try:
-            async with aiofiles.open(self.storage_path, 'r') as f:
-                data = json.loads(await f.read())
-            return data.get("vector_ids", [])
+            return await _run_local(self.backend.get_memory_ids)
         except Exception as e:
             print(f"Error getting memory IDs: {str(e)}")
             return []
@@ -116,9 +430,7 @@ class MemoryStore:
             Memory metadata or None if not found
         """
         try:
-            async with aiofiles.open(self.storage_path, 'r') as f:
-                data = json.loads(await f.read())
-            return data.get("memories", {}).get(memory_id)
+            return await _run_local(self.backend.get_memory, memory_id)
         except Exception as e:
             print(f"Error getting memory metadata: {str(e)}")
             return None
@@ -134,25 +446,9 @@ class MemoryStore:
             Success status
         """
         try:
-            async with aiofiles.open(self.storage_path, 'r') as f:
-                data = json.loads(await f.read())
-            
-            if memory_id in data["vector_ids"]:
-                data["vector_ids"].remove(memory_id)
-                
-                # Remove memory metadata
-                if memory_id in data["memories"]:
-                    del data["memories"][memory_id]
-                
-                data["total_memories"] = len(data["vector_ids"])
-                data["last_updated"] = datetime.now().isoformat()
-                
-                async with aiofiles.open(self.storage_path, 'w') as f:
-                    await f.write(json.dumps(data, indent=2))
-                
-                return True
-            
-            return False  # Memory ID not found
+            # False means the memory ID was not found
+            results = await self.writer.submit([("remove", memory_id, None)])
+            return results[0]
             
         except Exception as e:
             print(f"Error removing memory ID: {str(e)}")
@@ -169,57 +465,132 @@ class MemoryStore:
             List of memories in the category
         """
         try:
-            async with aiofiles.open(self.storage_path, 'r') as f:
-                data = json.loads(await f.read())
-            
-            memories = []
-            for memory_id, metadata in data.get("memories", {}).items():
-                if metadata.get("category") == category:
-                    memories.append({
-                        "id": memory_id,
-                        **metadata
-                    })
-            
-            return memories
+            return await _run_local(self.backend.get_memories_by_category, category)
             
         except Exception as e:
             print(f"Error getting memories by category: {str(e)}")
             return []
     
-    async def search_memories_by_keyword(self, keyword: str) -> List[Dict[str, Any]]:
+    async def list_memories(
+        self,
+        limit: int = 10,
+        category: Optional[str] = None,
+        order: str = "newest",
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
         """
-        Search memories by keyword.
+        List one page of stored memories ordered by creation time.
         
         Args:
-            keyword: The keyword to search for
+            limit: Maximum number of memories to return
+            category: Optional category filter
+            order: "newest" (default) or "oldest" first
+            cursor: next_cursor from the previous page, or None for the first page
         
         Returns:
-            List of memories containing the keyword
+            Dictionary with "memories" (records including their "id") and
+            "next_cursor" (None on the last page)
         """
+        after = decode_cursor(cursor) if cursor else None
         try:
-            async with aiofiles.open(self.storage_path, 'r') as f:
-                data = json.loads(await f.read())
-            
-            keyword_lower = keyword.lower()
-            memories = []
-            
-            for memory_id, metadata in data.get("memories", {}).items():
-                # Check if keyword is in the text or keywords list
-                text_match = keyword_lower in metadata.get("text", "").lower()
-                keyword_match = keyword_lower in [k.lower() for k in metadata.get("keywords", [])]
-                
-                if text_match or keyword_match:
-                    memories.append({
-                        "id": memory_id,
-                        **metadata
-                    })
+            # One extra row tells us whether another page exists
+            records = await _run_local(
+                self.backend.list_memories, limit + 1, category, order, after
+            )
+        except Exception as e:
+            print(f"Error listing memories: {str(e)}")
+            return {"memories": [], "next_cursor": None, "error": str(e)}
+        
+        page = records[:limit]
+        next_cursor = None
+        if len(records) > limit and page:
+            last = page[-1]
+            next_cursor = encode_cursor((last.get("created_at", ""), last["id"]))
+        return {"memories": page, "next_cursor": next_cursor}
+    
+    async def search_memories_by_keyword(
+        self,
+        keyword: str,
+        mode: str = "and",
+        prefix: bool = True,
+        limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Search memories by keyword using the local full-text index.
+        
+        Args:
+            keyword: One or more search terms
+            mode: "and" to require every term, "or" to match any
+            prefix: Match terms that start with each search term
+            limit: Maximum number of results
+        
+        Returns:
+            List of matching memories ranked by BM25 relevance, each with a "score"
+        """
+        try:
+            index = await self._ensure_text_index()
+            hits = index.search(keyword, mode=mode, prefix=prefix, limit=limit)
+            if not hits:
+                return []
             
-            return memories
+            records = await _run_local(self.backend.get_memories, [memory_id for memory_id, _ in hits])
+            return [
+                {"id": memory_id, **records[memory_id], "score": score}
+                for memory_id, score in hits
+                if memory_id in records
+            ]
             
         except Exception as e:
             print(f"Error searching memories: {str(e)}")
             return []
     
+    async def find_memories_with_phrases(
+        self,
+        phrases: List[str],
+        limit: int = MAX_PHRASE_CANDIDATES
+    ) -> Optional[List[str]]:
+        """
+        Find memories whose text or context contains every phrase verbatim.
+        
+        The text index narrows the search to memories holding all the
+        phrases' words; each candidate is then checked for the exact phrase
+        (case- and whitespace-insensitive).
+        
+        Args:
+            phrases: Phrases that must all appear
+            limit: Maximum number of memory IDs to return
+        
+        Returns:
+            Matching memory IDs ranked by BM25, or None if no phrase has
+            searchable words (no restriction applies)
+        """
+        wanted = [" ".join(p.lower().split()) for p in phrases if tokenize(p)]
+        if not wanted:
+            return None
+        
+        try:
+            index = await self._ensure_text_index()
+            hits = index.search(" ".join(wanted), mode="and", prefix=False)
+            if not hits:
+                return []
+            
+            records = await _run_local(self.backend.get_memories, [memory_id for memory_id, _ in hits])
+            matches = []
+            for memory_id, _ in hits:
+                record = records.get(memory_id)
+                if record is None:
+                    continue
+                text = " ".join(self._indexed_text(record).lower().split())
+                if all(phrase in text for phrase in wanted):
+                    matches.append(memory_id)
+                    if len(matches) >= limit:
+                        break
+            return matches
+        
+        except Exception as e:
+            print(f"Error searching phrases: {str(e)}")
+            return None
+    
     async def get_stats(self) -> Dict[str, Any]:
         """
         Get statistics about stored memories.
@@ -228,22 +599,17 @@ class MemoryStore:
             Dictionary containing memory statistics
         """
         try:
-            async with aiofiles.open(self.storage_path, 'r') as f:
-                data = json.loads(await f.read())
-            
-            # Count memories by category
-            category_counts = {}
-            for metadata in data.get("memories", {}).values():
-                category = metadata.get("category", "unknown")
-                category_counts[category] = category_counts.get(category, 0) + 1
-            
+            stats = await _run_local(self.backend.get_stats)
             return {
-                "total_memories": data.get("total_memories", 0),
-                "last_updated": data.get("last_updated"),
-                "categories": category_counts,
+                **stats,
                 "storage_file": str(self.storage_path)
             }
             
         except Exception as e:
             print(f"Error getting stats: {str(e)}")
-            return {"error": str(e)}
\ No newline at end of file
+            return {"error": str(e)}
+    
+    async def aclose(self):
+        """Commit pending writes and release the storage backend."""
+        await self.writer.aclose()
+        self.backend.close()
\ No newline at end of file
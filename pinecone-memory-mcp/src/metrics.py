@@ -0,0 +1,276 @@
+"""
+Prometheus metrics for the memory server.
+Latency histograms per tool and per stage (keyword extraction, embedding,
+Pinecone calls, local store I/O, formatting), in-flight gauges and backend
+error counters, plus gauges read from the caches and executors at scrape
+time. Rendered in the Prometheus text format for the SSE server's /metrics
+endpoint. Recording a sample costs a clock read, a bisect and a couple of
+dictionary updates, so instrumentation is always on.
+"""
+
+import asyncio
+import bisect
+import contextvars
+import inspect
+import time
+from typing import List, Dict, Any, Tuple, Callable
+
+from resilience import CircuitOpenError
+
+# Upper bounds in seconds, from fast local lookups to slow remote calls
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Tool whose call is running in this task; background work (the outbox
+# worker, mirror sync) is attributed to "background"
+_current_tool = contextvars.ContextVar("memory_current_tool", default="background")
+
+# A collected family: (name, type, help, [(labels, value), ...])
+Family = Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]
+
+
+def _escape(value: str) -> str:
+    """Escape a label value for the text format."""
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    """Render a label set, e.g. {tool="recall_memory"}."""
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    """Render a sample value, keeping integers free of a trailing .0."""
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """Labelled time series of one metric family."""
+    
+    type_name = ""
+    
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self._series: Dict[Tuple[str, ...], Any] = {}
+    
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.type_name}"]
+    
+    def _labels(self, values: Tuple[str, ...]) -> Dict[str, str]:
+        return dict(zip(self.labelnames, values))
+    
+    def render(self) -> List[str]:
+        """Render the family in the text format."""
+        lines = self._header()
+        for values, value in sorted(self._series.items()):
+            lines.append(f"{self.name}{_format_labels(self._labels(values))} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonically increasing count."""
+    
+    type_name = "counter"
+    
+    def inc(self, *labels: str, amount: float = 1.0):
+        """Add to the series for these label values."""
+        self._series[labels] = self._series.get(labels, 0.0) + amount
+
+
+class Gauge(_Metric):
+    """Value that goes up and down."""
+    
+    type_name = "gauge"
+    
+    def inc(self, *labels: str, amount: float = 1.0):
+        """Raise the series for these label values."""
+        self._series[labels] = self._series.get(labels, 0.0) + amount
+    
+    def dec(self, *labels: str, amount: float = 1.0):
+        """Lower the series for these label values."""
+        self._series[labels] = self._series.get(labels, 0.0) - amount
+
+
+class Histogram(_Metric):
+    """Distribution of observations over fixed buckets."""
+    
+    type_name = "histogram"
+    
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = LATENCY_BUCKETS
+    ):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+    
+    def observe(self, value: float, *labels: str):
+        """Record one observation."""
+        series = self._series.get(labels)
+        if series is None:
+            # Per-bucket counts (the last one is +Inf), then sum
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+    
+    def render(self) -> List[str]:
+        lines = self._header()
+        for values, (counts, total) in sorted(self._series.items()):
+            labels = self._labels(values)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{_format_labels({**labels, 'le': le})} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {repr(total)}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {cumulative}")
+        return lines
+
+
+TOOL_DURATION = Histogram(
+    "memory_tool_duration_seconds", "Time to answer a tool call.", ("tool",)
+)
+STAGE_DURATION = Histogram(
+    "memory_stage_duration_seconds",
+    "Time spent in one stage of a tool call (or of background work).",
+    ("tool", "stage")
+)
+TOOL_IN_FLIGHT = Gauge(
+    "memory_tool_in_flight", "Tool calls currently running.", ("tool",)
+)
+TOOL_ERRORS = Counter(
+    "memory_tool_errors_total", "Tool calls that returned an error.", ("tool",)
+)
+BACKEND_ERRORS = Counter(
+    "memory_backend_errors_total",
+    "Failed backend calls, after retries, by backend, operation and kind (timeout, circuit_open or error).",
+    ("backend", "operation", "kind")
+)
+
+_metrics: List[_Metric] = [TOOL_DURATION, STAGE_DURATION, TOOL_IN_FLIGHT, TOOL_ERRORS, BACKEND_ERRORS]
+_collectors: List[Callable[[], Any]] = []
+
+
+class stage:
+    """
+    Time a block as one stage of the current tool call.
+    
+    The block may await, e.g.:
+        
+        with stage("embedding"):
+            vector = await generate_embedding(text)
+    """
+    
+    __slots__ = ("name", "_start")
+    
+    def __init__(self, name: str):
+        self.name = name
+    
+    def __enter__(self) -> "stage":
+        self._start = time.perf_counter()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        STAGE_DURATION.observe(time.perf_counter() - self._start, _current_tool.get(), self.name)
+        return False
+
+
+class track_tool:
+    """
+    Time a tool call, count it in flight and attribute its stages to it.
+    
+    Set failed on the returned object when the call produced an error.
+    """
+    
+    __slots__ = ("tool", "failed", "_start", "_token")
+    
+    def __init__(self, tool: str):
+        self.tool = tool
+        self.failed = False
+    
+    def __enter__(self) -> "track_tool":
+        self._token = _current_tool.set(self.tool)
+        TOOL_IN_FLIGHT.inc(self.tool)
+        self._start = time.perf_counter()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        TOOL_DURATION.observe(time.perf_counter() - self._start, self.tool)
+        TOOL_IN_FLIGHT.dec(self.tool)
+        if self.failed or exc_type is not None:
+            TOOL_ERRORS.inc(self.tool)
+        _current_tool.reset(self._token)
+        return False
+
+
+def set_background_task(name: str = "background"):
+    """Attribute stages in the current task to a background job instead of the tool that started it."""
+    _current_tool.set(name)
+
+
+def count_backend_error(backend: str, operation: str, error: BaseException):
+    """
+    Count a failed backend call.
+    
+    Args:
+        backend: Backend name, e.g. pinecone, openai or local_store
+        operation: Operation that failed
+        error: The exception raised
+    """
+    if isinstance(error, CircuitOpenError):
+        kind = "circuit_open"
+    elif isinstance(error, (asyncio.TimeoutError, TimeoutError)):
+        kind = "timeout"
+    else:
+        kind = "error"
+    BACKEND_ERRORS.inc(backend, operation, kind)
+
+
+def register_collector(collector: Callable[[], Any]):
+    """
+    Add a source of gauges read at scrape time.
+    
+    Args:
+        collector: Function or coroutine function returning a list of
+            (name, type, help, [(labels, value), ...]) families
+    """
+    _collectors.append(collector)
+
+
+def _render_family(family: Family) -> List[str]:
+    name, type_name, help_text, samples = family
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {type_name}"]
+    lines.extend(f"{name}{_format_labels(labels)} {_format_value(value)}" for labels, value in samples)
+    return lines
+
+
+async def render_metrics() -> str:
+    """
+    Render every metric in the Prometheus text format.
+    
+    Returns:
+        Exposition text for a /metrics response
+    """
+    lines: List[str] = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+    for collector in _collectors:
+        try:
+            families = collector()
+            if inspect.isawaitable(families):
+                families = await families
+        except Exception as e:
+            print(f"Error collecting metrics: {str(e)}")
+            continue
+        for family in families:
+            lines.extend(_render_family(family))
+    return "\n".join(lines) + "\n"
\ No newline at end of file
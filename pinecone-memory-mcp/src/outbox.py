@@ -0,0 +1,436 @@
+"""
+Durable outbox for new memories.
+remember_this spools a memory here and returns; a background worker embeds and
+upserts spooled memories in batches, retrying with exponential backoff while
+OpenAI or Pinecone is unavailable. Entries survive restarts and are picked up
+again at startup, so an outage delays indexing but never loses a memory.
+Entries that still fail after many attempts are moved to a dead-letter table,
+where they stay until requeued, so one poison entry cannot keep the worker
+failing forever.
+"""
+
+import asyncio
+import json
+import random
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+
+from async_io import run_blocking
+from utils import generate_embeddings, embedding_metadata
+from metrics import set_background_task
+
+DEFAULT_OUTBOX_PATH = "memory_outbox.db"
+
+# Entries embedded and upserted together by the worker
+DEFAULT_WORKER_BATCH_SIZE = 64
+# Retry delay doubles per failed attempt, from the base up to the cap
+DEFAULT_RETRY_BASE_SECONDS = 1.0
+DEFAULT_RETRY_MAX_SECONDS = 300.0
+# Failed attempts before an entry is dead-lettered; with the default backoff
+# this is roughly half an hour of consecutive failures
+DEFAULT_MAX_ATTEMPTS = 20
+
+
+class WriteOutbox:
+    """SQLite-backed spool of memories waiting to be indexed in Pinecone."""
+    
+    def __init__(self, path: Optional[str] = DEFAULT_OUTBOX_PATH):
+        """
+        Initialize the outbox.
+        
+        Args:
+            path: SQLite file, or None/"" to keep the spool in memory only
+                (entries are then lost on restart)
+        """
+        self.path = Path(path) if path else None
+        self._db_lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path) if self.path else ":memory:", check_same_thread=False)
+        self._create_schema()
+    
+    def _create_schema(self):
+        """Create the table, adding retry columns to older outboxes."""
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # An entry must survive power loss once record() returns
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS outbox (
+                memory_id TEXT PRIMARY KEY,
+                payload TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(outbox)")}
+        for name, definition in (
+            ("attempts", "INTEGER NOT NULL DEFAULT 0"),
+            ("next_attempt_at", "REAL NOT NULL DEFAULT 0"),
+            ("last_error", "TEXT")
+        ):
+            if name not in columns:
+                self._conn.execute(f"ALTER TABLE outbox ADD COLUMN {name} {definition}")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_outbox_next_attempt ON outbox(next_attempt_at)"
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS dead_letter (
+                memory_id TEXT PRIMARY KEY,
+                payload TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                attempts INTEGER NOT NULL,
+                last_error TEXT,
+                dead_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+    
+    def _insert(self, entries: List[Tuple[str, Dict[str, Any]]]):
+        """Persist (memory_id, payload) entries in one transaction, due immediately."""
+        now = time.time()
+        with self._db_lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO outbox (memory_id, payload, created_at, attempts, next_attempt_at) "
+                "VALUES (?, ?, ?, 0, 0)",
+                [(memory_id, json.dumps(payload), now) for memory_id, payload in entries]
+            )
+            self._conn.commit()
+    
+    def _delete(self, memory_ids: List[str]):
+        """Remove entries."""
+        with self._db_lock:
+            self._conn.executemany(
+                "DELETE FROM outbox WHERE memory_id = ?", [(memory_id,) for memory_id in memory_ids]
+            )
+            self._conn.commit()
+    
+    def _reschedule(self, updates: List[Tuple[float, str, str]]):
+        """Record failed attempts as (next_attempt_at, error, memory_id)."""
+        with self._db_lock:
+            self._conn.executemany(
+                "UPDATE outbox SET attempts = attempts + 1, next_attempt_at = ?, last_error = ? "
+                "WHERE memory_id = ?",
+                updates
+            )
+            self._conn.commit()
+    
+    def _bury(self, failures: List[Tuple[str, str]]):
+        """Move entries that failed for the last time to the dead-letter table, as (memory_id, error)."""
+        now = time.time()
+        with self._db_lock:
+            for memory_id, error in failures:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO dead_letter "
+                    "(memory_id, payload, created_at, attempts, last_error, dead_at) "
+                    "SELECT memory_id, payload, created_at, attempts + 1, ?, ? FROM outbox WHERE memory_id = ?",
+                    (error, now, memory_id)
+                )
+                self._conn.execute("DELETE FROM outbox WHERE memory_id = ?", (memory_id,))
+            self._conn.commit()
+    
+    def _requeue(self) -> int:
+        """Move every dead-lettered entry back into the outbox, due immediately."""
+        with self._db_lock:
+            cursor = self._conn.execute(
+                "INSERT OR REPLACE INTO outbox (memory_id, payload, created_at, attempts, next_attempt_at, last_error) "
+                "SELECT memory_id, payload, created_at, 0, 0, last_error FROM dead_letter"
+            )
+            self._conn.execute("DELETE FROM dead_letter")
+            self._conn.commit()
+            return cursor.rowcount
+    
+    def _select(self, due_before: Optional[float], limit: int) -> List[Dict[str, Any]]:
+        """Read entries (only those due by due_before, if given), soonest first."""
+        query = "SELECT memory_id, payload, attempts, next_attempt_at, last_error FROM outbox"
+        params: List[Any] = []
+        if due_before is not None:
+            query += " WHERE next_attempt_at <= ?"
+            params.append(due_before)
+        query += " ORDER BY next_attempt_at, created_at LIMIT ?"
+        params.append(limit)
+        with self._db_lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [
+            {
+                "id": memory_id,
+                "payload": json.loads(payload),
+                "attempts": attempts,
+                "next_attempt_at": next_attempt_at,
+                "last_error": last_error
+            }
+            for memory_id, payload, attempts, next_attempt_at, last_error in rows
+        ]
+    
+    def _summary(self) -> Tuple[int, Optional[float], int]:
+        """Count entries, find the earliest retry time and count dead letters."""
+        with self._db_lock:
+            count, next_attempt_at = self._conn.execute(
+                "SELECT COUNT(*), MIN(next_attempt_at) FROM outbox"
+            ).fetchone()
+            dead = self._conn.execute("SELECT COUNT(*) FROM dead_letter").fetchone()[0]
+        return count, next_attempt_at, dead
+    
+    async def record(self, memory_id: str, payload: Dict[str, Any]):
+        """
+        Spool a memory durably.
+        
+        Args:
+            memory_id: ID of the memory
+            payload: prepare_memory() output for it (JSON-serializable)
+        """
+        await run_blocking("local", self._insert, [(memory_id, payload)])
+    
+    async def record_many(self, entries: List[Tuple[str, Dict[str, Any]]]):
+        """
+        Spool several memories durably with a single commit.
+        
+        Args:
+            entries: (memory_id, payload) pairs, as for record()
+        """
+        if entries:
+            await run_blocking("local", self._insert, entries)
+    
+    async def complete(self, memory_ids: List[str]):
+        """
+        Drop entries that have been indexed.
+        
+        Args:
+            memory_ids: IDs of the memories
+        """
+        if memory_ids:
+            await run_blocking("local", self._delete, memory_ids)
+    
+    async def reschedule(self, failures: List[Tuple[str, float, str]]):
+        """
+        Record failed attempts.
+        
+        Args:
+            failures: (memory_id, next attempt time in epoch seconds, error) triples
+        """
+        if failures:
+            await run_blocking(
+                "local",
+                self._reschedule,
+                [(next_attempt_at, error, memory_id) for memory_id, next_attempt_at, error in failures]
+            )
+    
+    async def dead_letter(self, failures: List[Tuple[str, str]]):
+        """
+        Give up on entries after their last failed attempt.
+        
+        Args:
+            failures: (memory_id, error) pairs
+        """
+        if failures:
+            await run_blocking("local", self._bury, failures)
+    
+    async def requeue_dead_letters(self) -> int:
+        """
+        Retry every dead-lettered entry, e.g. after fixing its cause.
+        
+        Returns:
+            Number of entries requeued
+        """
+        return await run_blocking("local", self._requeue)
+    
+    async def due(self, limit: int = DEFAULT_WORKER_BATCH_SIZE) -> List[Dict[str, Any]]:
+        """
+        Get entries whose next attempt is due.
+        
+        Args:
+            limit: Maximum entries to return
+        
+        Returns:
+            Entry dictionaries with id, payload, attempts, next_attempt_at and last_error
+        """
+        return await run_blocking("local", self._select, time.time(), limit)
+    
+    async def pending(self, limit: int = -1) -> List[Dict[str, Any]]:
+        """
+        Get every spooled entry, due or not.
+        
+        Args:
+            limit: Maximum entries to return (-1 for all)
+        
+        Returns:
+            Entry dictionaries, as returned by due()
+        """
+        return await run_blocking("local", self._select, None, limit)
+    
+    async def get_stats(self) -> Dict[str, Any]:
+        """
+        Get spool statistics.
+        
+        Returns:
+            Dictionary with the number of pending and dead-lettered entries
+            and the next retry time
+        """
+        count, next_attempt_at, dead = await run_blocking("local", self._summary)
+        return {"pending": count, "next_attempt_at": next_attempt_at, "dead_lettered": dead}
+    
+    def close(self):
+        """Close the database."""
+        if self._conn is not None:
+            with self._db_lock:
+                self._conn.close()
+            self._conn = None
+
+
+class OutboxWorker:
+    """Background task that indexes spooled memories."""
+    
+    def __init__(
+        self,
+        outbox: WriteOutbox,
+        pinecone_client,
+        batch_size: int = DEFAULT_WORKER_BATCH_SIZE,
+        retry_base: float = DEFAULT_RETRY_BASE_SECONDS,
+        retry_max: float = DEFAULT_RETRY_MAX_SECONDS,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS
+    ):
+        """
+        Initialize the worker.
+        
+        Args:
+            outbox: Spool to drain
+            pinecone_client: PineconeMemoryClient to upsert into
+            batch_size: Entries embedded and upserted per round
+            retry_base: Delay before the first retry, in seconds
+            retry_max: Longest delay between retries, in seconds
+            max_attempts: Failed attempts after which an entry is dead-lettered
+        """
+        self.outbox = outbox
+        self.pinecone_client = pinecone_client
+        self.batch_size = max(1, batch_size)
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.max_attempts = max(1, max_attempts)
+        
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.last_error: Optional[str] = None
+        
+        self._stats = {
+            "indexed": 0,
+            "failed_attempts": 0,
+            "dead_lettered": 0
+        }
+    
+    def start(self):
+        """Start draining the spool, including entries left from a previous run."""
+        if self._task is None:
+            self._wake = asyncio.Event()
+            self._task = asyncio.ensure_future(self._run())
+    
+    def notify(self):
+        """Wake the worker after spooling a new entry."""
+        if self._wake is not None:
+            self._wake.set()
+    
+    async def stop(self):
+        """Stop the worker; unfinished entries stay spooled for the next start."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    @property
+    def healthy(self) -> bool:
+        """Whether the last round indexed or dead-lettered everything it tried."""
+        return self.last_error is None
+    
+    def _retry_delay(self, attempts: int) -> float:
+        """Exponential backoff with full jitter."""
+        return random.uniform(0, min(self.retry_max, self.retry_base * (2 ** attempts)))
+    
+    async def _run(self):
+        """Process due entries until cancelled."""
+        set_background_task("outbox_worker")
+        while True:
+            # Cleared before reading, so a notify() during the round is not lost
+            self._wake.clear()
+            try:
+                entries = await self.outbox.due(self.batch_size)
+                if entries:
+                    await self.process(entries)
+                    continue
+                next_attempt_at = (await self.outbox.get_stats())["next_attempt_at"]
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error in outbox worker: {str(e)}")
+                next_attempt_at = time.time() + self.retry_base
+            
+            timeout = max(0.0, next_attempt_at - time.time()) if next_attempt_at is not None else None
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+    
+    async def process(self, entries: List[Dict[str, Any]]):
+        """
+        Embed and upsert one batch of entries.
+        
+        Args:
+            entries: Entries from WriteOutbox.due()
+        """
+        payloads = [entry["payload"] for entry in entries]
+        embeddings = await generate_embeddings([payload["full_text"] for payload in payloads])
+        
+        # A zero vector means embedding failed; it must never be indexed
+        errors: Dict[str, str] = {}
+        ready = []
+        for entry, embedding in zip(entries, embeddings):
+            if any(embedding):
+                ready.append((entry, embedding))
+            else:
+                errors[entry["id"]] = "embedding failed"
+        
+        model_metadata = embedding_metadata()
+        results = await self.pinecone_client.upsert_memories([
+            {"id": entry["id"], "values": embedding, "metadata": {**entry["payload"]["metadata"], **model_metadata}}
+            for entry, embedding in ready
+        ]) if ready else []
+        indexed = []
+        for (entry, _), ok in zip(ready, results):
+            if ok:
+                indexed.append(entry["id"])
+            else:
+                errors[entry["id"]] = "upsert failed"
+        
+        await self.outbox.complete(indexed)
+        self._stats["indexed"] += len(indexed)
+        
+        now = time.time()
+        failed = [entry for entry in entries if entry["id"] in errors]
+        retry = [entry for entry in failed if entry["attempts"] + 1 < self.max_attempts]
+        dead = [entry for entry in failed if entry["attempts"] + 1 >= self.max_attempts]
+        await self.outbox.reschedule([
+            (entry["id"], now + self._retry_delay(entry["attempts"]), errors[entry["id"]])
+            for entry in retry
+        ])
+        await self.outbox.dead_letter([(entry["id"], errors[entry["id"]]) for entry in dead])
+        for entry in dead:
+            print(
+                f"⚠️ Gave up indexing memory {entry['id']} after {entry['attempts'] + 1} attempts "
+                f"({errors[entry['id']]}); it is kept in the dead-letter table"
+            )
+        self._stats["failed_attempts"] += len(errors)
+        self._stats["dead_lettered"] += len(dead)
+        self.last_error = errors[retry[0]["id"]] if retry else None
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get worker statistics.
+        
+        Returns:
+            Dictionary of counters and the last error
+        """
+        return {**self._stats, "healthy": self.healthy, "last_error": self.last_error}
\ No newline at end of file
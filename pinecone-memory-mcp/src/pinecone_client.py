@@ -1,63 +1,140 @@
 """
 Pinecone client integration for memory storage and retrieval.
-Handles all vector database operations.
+Handles all vector database operations. Index calls go through a VectorBackend,
+so the same client runs against Pinecone or the in-process local backend.
 """
 
-from pinecone import Pinecone, ServerlessSpec
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterator, Tuple
 import os
 from dotenv import load_dotenv
 import logging
+import asyncio
+import random
+
+from async_io import get_backend_io, run_blocking
+from upsert_batcher import (
+    UpsertBatcher,
+    DEFAULT_MAX_BATCH_SIZE,
+    DEFAULT_MAX_BATCH_BYTES,
+    DEFAULT_MAX_DELAY_MS
+)
+from vector_index import LocalVectorIndex, NUMPY_AVAILABLE, DEFAULT_SNAPSHOT_PATH, rank_vectors, ids_digest
+from query_cache import QueryCache, DEFAULT_MAX_ENTRIES, DEFAULT_TTL_SECONDS
+from vector_backend import VectorBackend, create_vector_backend
+from utils import get_embedding_provider
+from metrics import stage, count_backend_error, set_background_task
+from resilience import (
+    ResilientCaller,
+    CircuitBreaker,
+    DEFAULT_MAX_ATTEMPTS,
+    DEFAULT_RETRY_BASE_SECONDS,
+    DEFAULT_RETRY_MAX_SECONDS,
+    DEFAULT_FAILURE_THRESHOLD,
+    DEFAULT_RESET_SECONDS
+)
 
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# IDs per fetch request; fetch is a GET, so IDs travel in the URL
+FETCH_BATCH_SIZE = 100
+
+# IDs per list request (the API maximum)
+LIST_PAGE_SIZE = 100
+
+# Snapshot vectors compared with Pinecone before a warm start trusts them
+DEFAULT_MIRROR_VERIFY_SAMPLE = 100
+
+# Time budget per index operation in seconds, retries included; override
+# with PINECONE_<OPERATION>_DEADLINE
+DEFAULT_DEADLINES = {
+    "query": 5.0,
+    "fetch": 10.0,
+    "list": 10.0,
+    "upsert": 30.0,
+    "update": 10.0,
+    "delete": 10.0,
+    "describe": 10.0
+}
+
 
 class PineconeMemoryClient:
     """Manages Pinecone operations for memory storage and retrieval."""
     
-    def __init__(self):
-        """Initialize Pinecone client and index."""
-        self.api_key = os.getenv("PINECONE_API_KEY")
+    def __init__(self, backend: Optional[VectorBackend] = None):
+        """
+        Initialize the client.
+        
+        Args:
+            backend: Vector database to use; defaults to the one selected by
+                VECTOR_BACKEND (Pinecone unless set to "local")
+        """
         self.index_name = os.getenv("PINECONE_INDEX_NAME", "memory-index")
         self.namespace = "memories"
         
-        if not self.api_key:
-            raise ValueError("PINECONE_API_KEY environment variable is required")
+        # Connects to Pinecone, creating the index if it doesn't exist, sized
+        # for the configured embedding provider
+        self.backend = backend or create_vector_backend(
+            index_name=self.index_name,
+            dimension=get_embedding_provider().dimension
+        )
         
-        # Initialize Pinecone
-        self.pc = Pinecone(api_key=self.api_key)
+        # Backend calls are synchronous, so every index call runs on a
+        # bounded executor instead of the event loop
+        self.io = get_backend_io("pinecone")
         
-        # Create index if it doesn't exist
-        self._ensure_index_exists()
+        # Deadlines, jittered retries and a circuit breaker around every index call
+        self.resilience = ResilientCaller(
+            deadlines={
+                operation: float(os.getenv(f"PINECONE_{operation.upper()}_DEADLINE", seconds))
+                for operation, seconds in DEFAULT_DEADLINES.items()
+            },
+            max_attempts=int(os.getenv("PINECONE_MAX_ATTEMPTS", DEFAULT_MAX_ATTEMPTS)),
+            retry_base=float(os.getenv("PINECONE_RETRY_BASE_MS", DEFAULT_RETRY_BASE_SECONDS * 1000)) / 1000,
+            retry_max=float(os.getenv("PINECONE_RETRY_MAX_MS", DEFAULT_RETRY_MAX_SECONDS * 1000)) / 1000,
+            breaker=CircuitBreaker(
+                failure_threshold=int(os.getenv("PINECONE_BREAKER_THRESHOLD", DEFAULT_FAILURE_THRESHOLD)),
+                reset_seconds=float(os.getenv("PINECONE_BREAKER_RESET_SECONDS", DEFAULT_RESET_SECONDS))
+            )
+        )
+        # Queries slower than this get a duplicate request; 0 disables hedging
+        hedge_ms = float(os.getenv("PINECONE_HEDGE_AFTER_MS", "0"))
+        self.hedge_after = hedge_ms / 1000 if hedge_ms > 0 else None
         
-        # Connect to index
-        self.index = self.pc.Index(self.index_name)
-    
-    def _ensure_index_exists(self):
-        """Create Pinecone index if it doesn't exist."""
-        try:
-            existing_indexes = self.pc.list_indexes()
-            index_names = [idx.name for idx in existing_indexes]
-            
-            if self.index_name not in index_names:
-                logger.info(f"Creating new index: {self.index_name}")
-                self.pc.create_index(
-                    name=self.index_name,
-                    dimension=1536,  # OpenAI embedding dimension
-                    metric="cosine",
-                    spec=ServerlessSpec(
-                        cloud="aws",
-                        region="us-east-1"
-                    )
-                )
-                logger.info(f"Index {self.index_name} created successfully")
+        # Coalesce concurrent single-memory upserts into batched requests
+        self.upsert_batcher = UpsertBatcher(
+            self._upsert_batch,
+            max_batch_size=int(os.getenv("PINECONE_UPSERT_BATCH_SIZE", DEFAULT_MAX_BATCH_SIZE)),
+            max_batch_bytes=int(os.getenv("PINECONE_UPSERT_BATCH_BYTES", DEFAULT_MAX_BATCH_BYTES)),
+            max_delay_ms=float(os.getenv("PINECONE_UPSERT_FLUSH_MS", DEFAULT_MAX_DELAY_MS))
+        )
+        
+        # Cache recent query results; any write to the index clears it
+        self.query_cache: Optional[QueryCache] = None
+        cache_size = int(os.getenv("QUERY_CACHE_SIZE", DEFAULT_MAX_ENTRIES))
+        if cache_size > 0:
+            threshold = os.getenv("QUERY_CACHE_SEMANTIC_THRESHOLD", "")
+            self.query_cache = QueryCache(
+                max_entries=cache_size,
+                ttl_seconds=float(os.getenv("QUERY_CACHE_TTL", DEFAULT_TTL_SECONDS)),
+                semantic_threshold=float(threshold) if threshold else None
+            )
+        
+        # Optional in-process copy of the namespace for local recall queries.
+        # Pinecone stays the source of truth; the mirror only serves queries
+        # once it has been synced.
+        self.mirror: Optional[LocalVectorIndex] = None
+        self.mirror_ready = False
+        self.mirror_snapshot = os.getenv("LOCAL_VECTOR_SNAPSHOT", DEFAULT_SNAPSHOT_PATH)
+        self.mirror_verify_sample = int(os.getenv("LOCAL_VECTOR_VERIFY_SAMPLE", DEFAULT_MIRROR_VERIFY_SAMPLE))
+        self._mirror_task: Optional[asyncio.Task] = None
+        self._mirror_stats = {"local_queries": 0, "remote_queries": 0, "synced_vectors": 0}
+        if os.getenv("LOCAL_VECTOR_INDEX", "").lower() in ("1", "true", "yes"):
+            if NUMPY_AVAILABLE:
+                self.mirror = LocalVectorIndex()
             else:
-                logger.info(f"Index {self.index_name} already exists")
-        except Exception as e:
-            logger.error(f"Error ensuring index exists: {str(e)}")
-            raise
+                logger.warning("LOCAL_VECTOR_INDEX is set but numpy is not installed; mirror disabled")
     
     async def upsert_memory(
         self,
@@ -76,26 +153,293 @@ class PineconeMemoryClient:
         Returns:
             Success status
         """
+        vector = {
+            "id": memory_id,
+            "values": embedding,
+            "metadata": metadata
+        }
+        
+        success = await self._submit(vector)
+        if success:
+            logger.info(f"Memory {memory_id} stored successfully")
+        return success
+    
+    async def upsert_memories(self, vectors: List[Dict[str, Any]]) -> List[bool]:
+        """
+        Store several memory vectors, batching them into as few requests as possible.
+        
+        Args:
+            vectors: List of vector dictionaries with id, values and metadata
+        
+        Returns:
+            Success status for each vector, in input order
+        """
+        results = await asyncio.gather(
+            *(self._submit(vector) for vector in vectors)
+        )
+        logger.info(f"Stored {sum(results)} of {len(vectors)} memories")
+        return list(results)
+    
+    async def _call(self, operation: str, func, hedge: bool = False, **kwargs) -> Any:
+        """
+        Run an index call on the Pinecone executor under the resilience policies.
+        
+        Args:
+            operation: Operation name (a DEFAULT_DEADLINES key)
+            func: Synchronous index method
+            hedge: Hedge slow calls with a duplicate (idempotent reads only)
+            **kwargs: Keyword arguments for func
+        
+        Returns:
+            Whatever func returns
+        """
+        with stage("pinecone"):
+            try:
+                return await self.resilience.call(
+                    operation,
+                    lambda: self.io.run(func, **kwargs),
+                    hedge_after=self.hedge_after if hedge else None
+                )
+            except Exception as e:
+                count_backend_error("pinecone", operation, e)
+                raise
+    
+    async def _submit(self, vector: Dict[str, Any]) -> bool:
+        """Queue one vector for upsert, refusing all-zero vectors."""
+        # generate_embeddings returns a zero vector when embedding fails; it has
+        # no direction, so indexing it would only pollute query results
+        if not any(vector["values"]):
+            logger.error(f"Refusing to store memory {vector['id']}: its embedding is all zeros")
+            return False
+        return await self.upsert_batcher.submit(vector)
+    
+    async def _upsert_batch(self, vectors: List[Dict[str, Any]]):
+        """
+        Write one batch of vectors to Pinecone. Raises on failure.
+        
+        Args:
+            vectors: Vectors to upsert in a single request
+        """
+        await self._call(
+            "upsert",
+            self.backend.upsert,
+            vectors=vectors,
+            namespace=self.namespace
+        )
+        if self.mirror is not None:
+            self.mirror.upsert(vectors)
+        if self.query_cache is not None:
+            self.query_cache.invalidate()
+    
+    async def flush(self):
+        """Write any buffered upserts to Pinecone."""
+        await self.upsert_batcher.flush()
+    
+    async def aclose(self):
+        """Flush buffered upserts, stop accepting new ones, snapshot the mirror and close the backend."""
+        await self.upsert_batcher.aclose()
+        if self._mirror_task is not None and not self._mirror_task.done():
+            self._mirror_task.cancel()
+        if self.mirror is not None and self.mirror_ready and self.mirror_snapshot:
+            try:
+                await run_blocking("local", self.mirror.save, self.mirror_snapshot)
+            except Exception as e:
+                logger.error(f"Error saving vector mirror snapshot: {str(e)}")
+        self.backend.close()
+    
+    def start_mirror(self):
+        """Warm the local mirror in the background, if it is enabled."""
+        if self.mirror is not None and self._mirror_task is None:
+            self._mirror_task = asyncio.ensure_future(self._warm_mirror())
+    
+    async def _warm_mirror(self):
+        """Load the mirror from its snapshot, or copy the namespace if the snapshot is stale."""
+        set_background_task("mirror_sync")
         try:
-            # Prepare vector for upsert
-            vector = {
-                "id": memory_id,
-                "values": embedding,
-                "metadata": metadata
-            }
+            stats = await self.get_stats()
+            remote_count = stats.get("total_memories", 0)
             
-            # Upsert to Pinecone
-            response = self.index.upsert(
-                vectors=[vector],
-                namespace=self.namespace
-            )
-            
-            logger.info(f"Memory {memory_id} stored successfully")
-            return True
+            if self.mirror_snapshot and os.path.exists(self.mirror_snapshot):
+                snapshot = await run_blocking("local", LocalVectorIndex.load, self.mirror_snapshot)
+                reason = await self._snapshot_staleness(snapshot, remote_count)
+                if reason is None:
+                    # Keep anything upserted while the snapshot was loading
+                    pending = self.mirror.fetch(self.mirror.ids())
+                    snapshot.upsert({"id": i, **v} for i, v in pending.items())
+                    self.mirror = snapshot
+                    self.mirror_ready = True
+                    logger.info(f"Loaded vector mirror snapshot with {len(snapshot)} vectors")
+                    return
+                logger.info(f"Vector mirror snapshot is stale ({reason}); resyncing")
             
+            await self.sync_mirror()
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
-            logger.error(f"Error storing memory: {str(e)}")
-            return False
+            logger.error(f"Error warming vector mirror: {str(e)}")
+    
+    async def _snapshot_staleness(self, snapshot: LocalVectorIndex, remote_count: int) -> Optional[str]:
+        """
+        Check a mirror snapshot against Pinecone before serving queries from it.
+        
+        Another server, manage.py ingest or import may have written to the
+        namespace since the snapshot was saved, so a matching vector count
+        alone proves nothing. The snapshot is trusted only if its watermark
+        still matches: the same ID set, nothing created after its newest
+        memory, and a random sample of vectors and metadata unchanged.
+        
+        Args:
+            snapshot: Mirror loaded from the snapshot file
+            remote_count: Vectors in the Pinecone namespace
+        
+        Returns:
+            Why the snapshot cannot be used, or None if it is current
+        """
+        watermark = snapshot.watermark
+        if watermark is None:
+            return "it has no watermark"
+        if watermark != snapshot.compute_watermark():
+            return "its watermark does not match its contents"
+        if watermark["count"] != remote_count:
+            return f"{watermark['count']} vs {remote_count} vectors"
+        if not remote_count:
+            return None
+        
+        ids = snapshot.ids()
+        if watermark["newest_ts"] is not None:
+            probe = snapshot.fetch(ids[:1])[ids[0]]["values"]
+            newer = await self._call(
+                "query",
+                self.backend.query,
+                vector=probe,
+                top_k=1,
+                namespace=self.namespace,
+                filter={"created_ts": {"$gt": watermark["newest_ts"]}}
+            )
+            if newer:
+                return "Pinecone has newer memories"
+        
+        sample = random.sample(ids, min(len(ids), max(0, self.mirror_verify_sample)))
+        if sample:
+            differing = snapshot.differing_ids(await self.fetch_vectors(sample), sample)
+            if differing:
+                return f"{len(differing)} of {len(sample)} sampled vectors changed"
+        
+        # The digest is a sum over IDs, so page digests add up to the whole
+        remote_digest = 0
+        async for page in self.list_memory_id_pages():
+            remote_digest = (remote_digest + int(ids_digest(page), 16)) % (1 << 64)
+        if f"{remote_digest:016x}" != watermark["ids_digest"]:
+            return "its IDs differ from Pinecone's"
+        return None
+    
+    async def sync_mirror(self):
+        """Copy every vector in the namespace into the local mirror."""
+        if self.mirror is None:
+            return
+        
+        async for ids in self.list_memory_id_pages():
+            vectors = await self.fetch_vectors(ids)
+            self.mirror.upsert({"id": vec_id, **vector} for vec_id, vector in vectors.items())
+            self._mirror_stats["synced_vectors"] += len(vectors)
+        
+        self.mirror_ready = True
+        logger.info(f"Vector mirror synced with {len(self.mirror)} vectors")
+        if self.mirror_snapshot:
+            await run_blocking("local", self.mirror.save, self.mirror_snapshot)
+    
+    async def list_memory_ids(
+        self,
+        pagination_token: Optional[str] = None,
+        limit: int = LIST_PAGE_SIZE
+    ) -> Tuple[List[str], Optional[str]]:
+        """
+        List one page of memory IDs in the namespace.
+        
+        Args:
+            pagination_token: Token returned with the previous page, or None to start
+            limit: Maximum IDs per page (at most 100)
+        
+        Returns:
+            (memory IDs, token for the next page or None on the last page)
+        """
+        return await self._call(
+            "list",
+            self.backend.list_ids,
+            namespace=self.namespace,
+            limit=limit,
+            pagination_token=pagination_token
+        )
+    
+    async def list_memory_id_pages(self) -> AsyncIterator[List[str]]:
+        """
+        Iterate over every memory ID in the namespace, one page at a time.
+        
+        Yields:
+            Lists of memory IDs
+        """
+        token = None
+        while True:
+            ids, token = await self.list_memory_ids(token)
+            if ids:
+                yield ids
+            if not token:
+                return
+    
+    async def fetch_vectors(self, memory_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Fetch memories with their vectors. Raises on failure.
+        
+        Args:
+            memory_ids: IDs to fetch; split into several requests if needed
+        
+        Returns:
+            Mapping of ID to {"values", "metadata"}; missing IDs are omitted
+        """
+        responses = await asyncio.gather(*(
+            self._call(
+                "fetch",
+                self.backend.fetch,
+                ids=memory_ids[start:start + FETCH_BATCH_SIZE],
+                namespace=self.namespace
+            )
+            for start in range(0, len(memory_ids), FETCH_BATCH_SIZE)
+        ))
+        return {vec_id: vec for response in responses for vec_id, vec in response.items()}
+    
+    def get_query_cache_stats(self) -> Dict[str, Any]:
+        """
+        Get query result cache statistics.
+        
+        Returns:
+            Dictionary of cache counters, or {"enabled": False}
+        """
+        if self.query_cache is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.query_cache.get_stats()}
+    
+    def get_resilience_stats(self) -> Dict[str, Any]:
+        """
+        Get retry, deadline, circuit breaker and hedging statistics.
+        
+        Returns:
+            Per-operation counters and the circuit breaker state
+        """
+        return self.resilience.get_stats()
+    
+    def get_mirror_stats(self) -> Dict[str, Any]:
+        """
+        Get local mirror statistics.
+        
+        Returns:
+            Dictionary with mirror state and query counters
+        """
+        return {
+            "enabled": self.mirror is not None,
+            "ready": self.mirror_ready,
+            "vectors": len(self.mirror) if self.mirror is not None else 0,
+            **self._mirror_stats
+        }
     
     async def fetch_memories(self, memory_ids: List[str]) -> Dict[str, Any]:
         """
@@ -108,16 +452,18 @@ class PineconeMemoryClient:
             Dictionary containing memory vectors and metadata
         """
         try:
-            response = self.index.fetch(
+            response = await self._call(
+                "fetch",
+                self.backend.fetch,
                 ids=memory_ids,
                 namespace=self.namespace
             )
             
             memories = []
-            for vec_id, vec_data in response.vectors.items():
+            for vec_id, vec_data in response.items():
                 memory = {
                     "id": vec_id,
-                    "metadata": vec_data.metadata,
+                    "metadata": vec_data["metadata"],
                     "score": 1.0  # Exact match
                 }
                 memories.append(memory)
@@ -132,7 +478,8 @@ class PineconeMemoryClient:
         self,
         query_embedding: List[float],
         top_k: int = 5,
-        filter_dict: Optional[Dict] = None
+        filter_dict: Optional[Dict] = None,
+        ids: Optional[List[str]] = None
     ) -> Dict[str, Any]:
         """
         Query for similar memories using semantic search.
@@ -141,29 +488,95 @@ class PineconeMemoryClient:
             query_embedding: Vector embedding of the query
             top_k: Number of results to return
             filter_dict: Optional metadata filters
+            ids: Optional candidate memory IDs to restrict the search to
         
         Returns:
             Dictionary containing matching memories with similarity scores
         """
+        # Candidate restrictions are part of the cached query
+        cache_scope = filter_dict if ids is None else {"filter": filter_dict, "ids": sorted(ids)}
+        
+        generation = None
+        if self.query_cache is not None:
+            cached = self.query_cache.get(query_embedding, top_k, cache_scope)
+            if cached is not None:
+                return cached
+            generation = self.query_cache.generation
+        
+        if ids is None:
+            result = await self._query_index(query_embedding, top_k, filter_dict)
+        else:
+            result = await self._rescore_candidates(query_embedding, top_k, filter_dict, ids)
+        # Errors and degraded fallbacks must not outlive the outage
+        if self.query_cache is not None and "error" not in result and not result.get("degraded"):
+            self.query_cache.put(query_embedding, top_k, cache_scope, result, generation)
+        return result
+    
+    async def _rescore_candidates(
+        self,
+        query_embedding: List[float],
+        top_k: int,
+        filter_dict: Optional[Dict],
+        ids: List[str]
+    ) -> Dict[str, Any]:
+        """
+        Rank a known set of memories against the query.
+        
+        Pinecone cannot filter on vector IDs, so candidates come from the local
+        mirror when it is ready, otherwise their vectors are fetched and scored here.
+        """
+        if not ids:
+            return {"memories": [], "count": 0}
+        
+        if self.mirror_ready:
+            memories = await run_blocking(
+                "local", self.mirror.query, query_embedding, top_k, filter_dict, ids
+            )
+            self._mirror_stats["local_queries"] += 1
+            return {"memories": memories, "count": len(memories)}
+        
         try:
+            candidates = await self.fetch_vectors(ids)
+            memories = await run_blocking(
+                "local", rank_vectors, query_embedding, candidates, top_k, filter_dict
+            )
+            return {"memories": memories, "count": len(memories)}
+        
+        except Exception as e:
+            logger.error(f"Error rescoring memories: {str(e)}")
+            fallback = await self._mirror_fallback(query_embedding, top_k, filter_dict, ids)
+            return fallback or {"memories": [], "count": 0, "error": str(e)}
+    
+    async def _query_index(
+        self,
+        query_embedding: List[float],
+        top_k: int,
+        filter_dict: Optional[Dict]
+    ) -> Dict[str, Any]:
+        """Run a query against the local mirror if it is ready, otherwise Pinecone."""
+        if self.mirror_ready:
+            try:
+                memories = await run_blocking(
+                    "local", self.mirror.query, query_embedding, top_k, filter_dict
+                )
+                self._mirror_stats["local_queries"] += 1
+                return {"memories": memories, "count": len(memories)}
+            except Exception as e:
+                logger.error(f"Local mirror query failed, falling back to Pinecone: {str(e)}")
+        
+        try:
+            self._mirror_stats["remote_queries"] += 1
             # Perform semantic search
-            response = self.index.query(
+            memories = await self._call(
+                "query",
+                self.backend.query,
+                hedge=True,
                 vector=query_embedding,
                 top_k=top_k,
                 namespace=self.namespace,
-                include_metadata=True,
                 filter=filter_dict
             )
             
-            memories = []
-            for match in response.matches:
-                memory = {
-                    "id": match.id,
-                    "metadata": match.metadata,
-                    "score": match.score
-                }
-                memories.append(memory)
-            
             return {
                 "memories": memories,
                 "count": len(memories)
@@ -171,7 +584,64 @@ class PineconeMemoryClient:
             
         except Exception as e:
             logger.error(f"Error querying memories: {str(e)}")
-            return {"memories": [], "count": 0, "error": str(e)}
+            fallback = await self._mirror_fallback(query_embedding, top_k, filter_dict)
+            return fallback or {"memories": [], "count": 0, "error": str(e)}
+    
+    async def _mirror_fallback(
+        self,
+        query_embedding: List[float],
+        top_k: int,
+        filter_dict: Optional[Dict],
+        ids: Optional[List[str]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Answer from the local mirror while Pinecone is unavailable.
+        
+        The mirror may still be syncing, so the result is marked degraded.
+        
+        Returns:
+            Query result with "degraded": True, or None if there is no mirror to use
+        """
+        if self.mirror is None or not len(self.mirror):
+            return None
+        try:
+            memories = await run_blocking(
+                "local", self.mirror.query, query_embedding, top_k, filter_dict, ids
+            )
+        except Exception as e:
+            logger.error(f"Local mirror fallback failed: {str(e)}")
+            return None
+        self.resilience.record_fallback("query")
+        return {"memories": memories, "count": len(memories), "degraded": True}
+    
+    async def update_metadata(self, memory_id: str, fields: Dict[str, Any]) -> bool:
+        """
+        Set metadata fields on an existing memory without rewriting its vector.
+        
+        Args:
+            memory_id: ID of the memory to update
+            fields: Metadata fields to set
+        
+        Returns:
+            Success status
+        """
+        try:
+            await self._call(
+                "update",
+                self.backend.update_metadata,
+                vector_id=memory_id,
+                fields=fields,
+                namespace=self.namespace
+            )
+            if self.mirror is not None:
+                self.mirror.update_metadata(memory_id, fields)
+            if self.query_cache is not None:
+                self.query_cache.invalidate()
+            return True
+        
+        except Exception as e:
+            logger.error(f"Error updating memory metadata: {str(e)}")
+            return False
     
     async def delete_memory(self, memory_id: str) -> bool:
         """
@@ -184,10 +654,16 @@ class PineconeMemoryClient:
             Success status
         """
         try:
-            self.index.delete(
+            await self._call(
+                "delete",
+                self.backend.delete,
                 ids=[memory_id],
                 namespace=self.namespace
             )
+            if self.mirror is not None:
+                self.mirror.delete([memory_id])
+            if self.query_cache is not None:
+                self.query_cache.invalidate()
             logger.info(f"Memory {memory_id} deleted successfully")
             return True
             
@@ -203,13 +679,12 @@ class PineconeMemoryClient:
             Dictionary containing index statistics
         """
         try:
-            stats = self.index.describe_index_stats()
-            namespace_stats = stats.namespaces.get(self.namespace, {})
+            stats = await self._call("describe", self.backend.describe_stats)
             
             return {
-                "total_memories": namespace_stats.get("vector_count", 0),
-                "index_fullness": stats.index_fullness,
-                "dimension": stats.dimension
+                "total_memories": stats["namespaces"].get(self.namespace, 0),
+                "index_fullness": stats["index_fullness"],
+                "dimension": stats["dimension"]
             }
             
         except Exception as e:
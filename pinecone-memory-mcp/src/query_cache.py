@@ -0,0 +1,238 @@
+"""
+Result cache for semantic queries.
+Remembers recent query results keyed on the query embedding, top_k and filter,
+with TTL and LRU eviction, and is cleared whenever the index is written to.
+"""
+
+import hashlib
+import json
+import math
+import operator
+import time
+from array import array
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
+
+# NumPy speeds up semantic lookups but is optional
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_TTL_SECONDS = 300.0
+
+
+def make_query_key(embedding: List[float], top_k: int, filter_dict: Optional[Dict]) -> str:
+    """
+    Build the cache key for a query.
+    
+    Args:
+        embedding: Query embedding
+        top_k: Number of results requested
+        filter_dict: Metadata filter, or None
+    
+    Returns:
+        Hex SHA-256 digest of the float32 embedding, top_k and canonical filter
+    """
+    digest = hashlib.sha256(array("f", embedding).tobytes())
+    digest.update(f"\0{top_k}\0{_canonical_filter(filter_dict)}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _canonical_filter(filter_dict: Optional[Dict]) -> str:
+    """Serialize a filter so equivalent dictionaries compare equal."""
+    return json.dumps(filter_dict or {}, sort_keys=True, separators=(",", ":"))
+
+
+def _unit(embedding: List[float]) -> Any:
+    """Get a unit-length float32 copy of a vector."""
+    if NUMPY_AVAILABLE:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm > 0 else vector
+    norm = math.sqrt(sum(x * x for x in embedding))
+    if norm == 0:
+        return array("f", embedding)
+    return array("f", (x / norm for x in embedding))
+
+
+def _dot(a: Any, b: Any) -> float:
+    """Dot product of two vectors returned by _unit."""
+    if NUMPY_AVAILABLE:
+        return float(np.dot(a, b))
+    return sum(map(operator.mul, a, b))
+
+
+class QueryCache:
+    """TTL + LRU cache of query results with optional near-duplicate reuse."""
+    
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        semantic_threshold: Optional[float] = None
+    ):
+        """
+        Initialize the cache.
+        
+        Args:
+            max_entries: Maximum number of cached results
+            ttl_seconds: How long a result stays valid
+            semantic_threshold: If set, reuse a cached result for a query whose
+                embedding has at least this cosine similarity to the cached
+                query's embedding (same top_k and filter)
+        """
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl_seconds
+        self.semantic_threshold = semantic_threshold
+        
+        # key -> (expires_at, result)
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        # (top_k, filter) -> {key: unit embedding}, for semantic lookups
+        self._vectors: Dict[Tuple[int, str], Dict[str, Any]] = {}
+        self._key_groups: Dict[str, Tuple[int, str]] = {}
+        
+        # Bumped on every invalidation so results of queries that were in
+        # flight during a write are not cached
+        self.generation = 0
+        
+        self._stats = {
+            "hits": 0,
+            "semantic_hits": 0,
+            "misses": 0,
+            "expirations": 0,
+            "evictions": 0,
+            "invalidations": 0
+        }
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def _drop(self, key: str):
+        """Remove one entry and its semantic vector."""
+        self._entries.pop(key, None)
+        group = self._key_groups.pop(key, None)
+        if group is not None:
+            vectors = self._vectors.get(group)
+            if vectors is not None:
+                vectors.pop(key, None)
+                if not vectors:
+                    del self._vectors[group]
+    
+    def _lookup(self, key: str, now: float) -> Optional[Dict[str, Any]]:
+        """Get a live entry by key, expiring it if stale."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, result = entry
+        if expires_at <= now:
+            self._stats["expirations"] += 1
+            self._drop(key)
+            return None
+        self._entries.move_to_end(key)
+        return result
+    
+    def _nearest(self, group: Tuple[int, str], unit: Any, now: float) -> Optional[Dict[str, Any]]:
+        """Find a cached result whose query is within the cosine threshold."""
+        best_key = None
+        best_score = self.semantic_threshold
+        for key, cached in list(self._vectors.get(group, {}).items()):
+            score = _dot(unit, cached)
+            if score >= best_score:
+                best_key, best_score = key, score
+        if best_key is None:
+            return None
+        return self._lookup(best_key, now)
+    
+    def get(
+        self,
+        embedding: List[float],
+        top_k: int,
+        filter_dict: Optional[Dict] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached result.
+        
+        Args:
+            embedding: Query embedding
+            top_k: Number of results requested
+            filter_dict: Metadata filter, or None
+        
+        Returns:
+            Copy of the cached result, or None on a miss
+        """
+        now = time.monotonic()
+        result = self._lookup(make_query_key(embedding, top_k, filter_dict), now)
+        if result is not None:
+            self._stats["hits"] += 1
+        elif self.semantic_threshold is not None:
+            group = (top_k, _canonical_filter(filter_dict))
+            result = self._nearest(group, _unit(embedding), now)
+            if result is not None:
+                self._stats["semantic_hits"] += 1
+        
+        if result is None:
+            self._stats["misses"] += 1
+            return None
+        return {**result, "memories": list(result["memories"])}
+    
+    def put(
+        self,
+        embedding: List[float],
+        top_k: int,
+        filter_dict: Optional[Dict],
+        result: Dict[str, Any],
+        generation: Optional[int] = None
+    ):
+        """
+        Cache a query result.
+        
+        Args:
+            embedding: Query embedding
+            top_k: Number of results requested
+            filter_dict: Metadata filter, or None
+            result: Result dictionary with a "memories" list
+            generation: Value of `generation` read before the query ran; the
+                result is discarded if the cache was invalidated since
+        """
+        if generation is not None and generation != self.generation:
+            return
+        
+        key = make_query_key(embedding, top_k, filter_dict)
+        self._drop(key)
+        self._entries[key] = (time.monotonic() + self.ttl, {**result, "memories": list(result["memories"])})
+        if self.semantic_threshold is not None:
+            group = (top_k, _canonical_filter(filter_dict))
+            self._vectors.setdefault(group, {})[key] = _unit(embedding)
+            self._key_groups[key] = group
+        
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._drop(oldest)
+            self._stats["evictions"] += 1
+    
+    def invalidate(self):
+        """Drop every cached result after the index changed."""
+        self.generation += 1
+        self._entries.clear()
+        self._vectors.clear()
+        self._key_groups.clear()
+        self._stats["invalidations"] += 1
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+        
+        Returns:
+            Dictionary of hit/miss counters, hit rate and entry count
+        """
+        hits = self._stats["hits"] + self._stats["semantic_hits"]
+        lookups = hits + self._stats["misses"]
+        return {
+            **self._stats,
+            "hit_rate": (hits / lookups) if lookups else 0.0,
+            "entries": len(self._entries),
+            "semantic_threshold": self.semantic_threshold
+        }
\ No newline at end of file
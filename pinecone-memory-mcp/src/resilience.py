@@ -0,0 +1,315 @@
+"""
+Resilience policies for backend calls.
+Wraps each call in a per-operation deadline, retries transient failures with
+jittered exponential backoff, trips a circuit breaker when the backend keeps
+failing, and can hedge slow calls with a duplicate request. Every policy keeps
+per-operation counters.
+"""
+
+import asyncio
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+# HTTP statuses worth retrying: throttling and server-side failures
+RETRYABLE_STATUSES = {408, 429, 500, 502, 503, 504}
+
+DEFAULT_DEADLINE_SECONDS = 10.0
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_RETRY_BASE_SECONDS = 0.1
+DEFAULT_RETRY_MAX_SECONDS = 2.0
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_SECONDS = 30.0
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a backend whose circuit breaker is open."""
+
+
+class DeadlineExceededError(asyncio.TimeoutError):
+    """Raised when an operation runs out of its time budget."""
+
+
+def is_retryable(error: BaseException) -> bool:
+    """
+    Decide whether a failed call is worth repeating.
+    
+    Args:
+        error: Exception raised by the call
+    
+    Returns:
+        True for timeouts, connection problems and throttling/5xx responses
+    """
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return True
+    status = getattr(error, "status", None) or getattr(error, "status_code", None)
+    if isinstance(status, int):
+        return status in RETRYABLE_STATUSES
+    # HTTP client transport errors (urllib3, aiohttp) that carry no status
+    return type(error).__module__.split(".")[0] in ("urllib3", "aiohttp")
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with a single half-open probe."""
+    
+    def __init__(
+        self,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        reset_seconds: float = DEFAULT_RESET_SECONDS
+    ):
+        """
+        Initialize the breaker.
+        
+        Args:
+            failure_threshold: Consecutive failures that open the circuit
+                (0 disables the breaker)
+            reset_seconds: How long the circuit stays open before a probe call
+                is let through
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        
+        self._stats = {
+            "opened": 0,
+            "short_circuited": 0
+        }
+    
+    def allow(self) -> bool:
+        """
+        Check whether a call may go to the backend.
+        
+        Returns:
+            False if the circuit is open (the call should fail fast)
+        """
+        if self.state == "closed":
+            return True
+        if self.state == "open" and time.monotonic() - self._opened_at >= self.reset_seconds:
+            self.state = "half_open"
+        if self.state == "half_open" and not self._probing:
+            self._probing = True
+            return True
+        self._stats["short_circuited"] += 1
+        return False
+    
+    def release_probe(self):
+        """Let another call probe after the half-open probe ended without an outcome (e.g. it was cancelled)."""
+        if self.state == "half_open":
+            self._probing = False
+    
+    def record_success(self):
+        """Close the circuit after a call reached a healthy backend."""
+        self.state = "closed"
+        self._failures = 0
+        self._probing = False
+    
+    def record_failure(self):
+        """Count a backend failure, opening the circuit past the threshold."""
+        self._failures += 1
+        self._probing = False
+        if self.failure_threshold <= 0:
+            return
+        if self.state == "half_open" or self._failures >= self.failure_threshold:
+            if self.state != "open":
+                self._stats["opened"] += 1
+            self.state = "open"
+            self._opened_at = time.monotonic()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get breaker statistics.
+        
+        Returns:
+            Dictionary with state, consecutive failures and counters
+        """
+        return {"state": self.state, "consecutive_failures": self._failures, **self._stats}
+
+
+class ResilientCaller:
+    """Applies deadlines, retries, a circuit breaker and hedging to backend calls."""
+    
+    def __init__(
+        self,
+        deadlines: Optional[Dict[str, float]] = None,
+        default_deadline: float = DEFAULT_DEADLINE_SECONDS,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        retry_base: float = DEFAULT_RETRY_BASE_SECONDS,
+        retry_max: float = DEFAULT_RETRY_MAX_SECONDS,
+        breaker: Optional[CircuitBreaker] = None
+    ):
+        """
+        Initialize the caller.
+        
+        Args:
+            deadlines: Total time budget per operation name, in seconds,
+                covering every attempt and backoff
+            default_deadline: Budget for operations not in deadlines
+            max_attempts: Attempts per call, including the first
+            retry_base: Backoff before the first retry, in seconds
+            retry_max: Longest backoff between attempts, in seconds
+            breaker: Circuit breaker shared by every operation, or None
+        """
+        self.deadlines = dict(deadlines or {})
+        self.default_deadline = default_deadline
+        self.max_attempts = max(1, max_attempts)
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.breaker = breaker or CircuitBreaker()
+        self._stats: Dict[str, Dict[str, int]] = {}
+    
+    def _count(self, operation: str, counter: str, amount: int = 1):
+        """Increment a per-operation counter."""
+        stats = self._stats.setdefault(operation, {
+            "calls": 0,
+            "successes": 0,
+            "failures": 0,
+            "retries": 0,
+            "timeouts": 0,
+            "short_circuited": 0,
+            "hedges": 0,
+            "hedge_wins": 0,
+            "fallbacks": 0
+        })
+        stats[counter] += amount
+    
+    def record_fallback(self, operation: str):
+        """Count a call answered by a fallback instead of the backend."""
+        self._count(operation, "fallbacks")
+    
+    def _backoff(self, attempt: int) -> float:
+        """Exponential backoff with full jitter."""
+        return random.uniform(0, min(self.retry_max, self.retry_base * (2 ** attempt)))
+    
+    async def call(
+        self,
+        operation: str,
+        factory: Callable[[], Awaitable[Any]],
+        hedge_after: Optional[float] = None
+    ) -> Any:
+        """
+        Run a backend call under the resilience policies.
+        
+        Args:
+            operation: Operation name, for deadlines and metrics
+            factory: Creates a fresh awaitable for each attempt
+            hedge_after: If set, start a duplicate request when an attempt
+                has not finished after this many seconds and use whichever
+                finishes first (only for idempotent reads)
+        
+        Returns:
+            Whatever the call returns
+        
+        Raises:
+            CircuitOpenError: If the breaker is open
+            DeadlineExceededError: If the operation's budget ran out
+            Exception: The last error, if it was not retryable or attempts ran out
+        """
+        self._count(operation, "calls")
+        if not self.breaker.allow():
+            self._count(operation, "short_circuited")
+            raise CircuitOpenError(f"{operation}: backend unavailable (circuit open)")
+        
+        deadline = time.monotonic() + self.deadlines.get(operation, self.default_deadline)
+        # Whether this call holds the half-open probe, which must be released
+        # if the call ends without recording an outcome
+        probing = self.breaker.state == "half_open"
+        attempt = 0
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                try:
+                    if remaining <= 0:
+                        raise DeadlineExceededError(f"{operation}: deadline exceeded")
+                    # Cancelling the wait does not stop a call already running in
+                    # a worker thread; it only stops this caller waiting for it
+                    if hedge_after is not None:
+                        result = await asyncio.wait_for(self._hedged(operation, factory, hedge_after), remaining)
+                    else:
+                        result = await asyncio.wait_for(factory(), remaining)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    timed_out = isinstance(e, asyncio.TimeoutError)
+                    if timed_out:
+                        self._count(operation, "timeouts")
+                    retryable = is_retryable(e)
+                    if retryable:
+                        self.breaker.record_failure()
+                    else:
+                        # The backend answered; the request itself was bad
+                        self.breaker.record_success()
+                    probing = False
+                    
+                    attempt += 1
+                    delay = self._backoff(attempt - 1)
+                    if (
+                        not retryable
+                        or attempt >= self.max_attempts
+                        or time.monotonic() + delay >= deadline
+                        or not self.breaker.allow()
+                    ):
+                        self._count(operation, "failures")
+                        if timed_out and not isinstance(e, DeadlineExceededError):
+                            raise DeadlineExceededError(f"{operation}: deadline exceeded") from e
+                        raise
+                    probing = self.breaker.state == "half_open"
+                    self._count(operation, "retries")
+                    await asyncio.sleep(delay)
+                    continue
+                
+                self.breaker.record_success()
+                probing = False
+                self._count(operation, "successes")
+                return result
+        finally:
+            if probing:
+                self.breaker.release_probe()
+    
+    async def _hedged(
+        self,
+        operation: str,
+        factory: Callable[[], Awaitable[Any]],
+        hedge_after: float
+    ) -> Any:
+        """Run one attempt, launching a duplicate if it is slow."""
+        primary = asyncio.ensure_future(factory())
+        tasks = [primary]
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=hedge_after)
+            if done:
+                return primary.result()
+            
+            self._count(operation, "hedges")
+            hedge = asyncio.ensure_future(factory())
+            tasks.append(hedge)
+            pending = {primary, hedge}
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self._count(operation, "hedge_wins")
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            # Also reached when the caller's deadline cancels this wait
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get resilience statistics.
+        
+        Returns:
+            Per-operation counters and the circuit breaker state
+        """
+        return {
+            "operations": {operation: dict(stats) for operation, stats in self._stats.items()},
+            "breaker": self.breaker.get_stats()
+        }
\ No newline at end of file
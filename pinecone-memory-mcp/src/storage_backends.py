@@ -0,0 +1,636 @@
+"""
+Storage backends for the local memory store.
+The JSON file backend is the simple default; the SQLite backend keeps records
+in a WAL-mode database with indexes on category and creation time.
+"""
+
+import bisect
+import json
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Iterator, Tuple
+
+# A mutation is ("add", memory_id, record), ("put", memory_id, record) or
+# ("remove", memory_id, None). "add" skips existing IDs; "put" replaces them
+# in place, keeping their position in insertion order.
+Operation = Tuple[str, str, Optional[Dict[str, Any]]]
+
+# Listing position of a record: (created_at, memory_id)
+SortKey = Tuple[str, str]
+
+DEFAULT_JSON_PATH = "memory_ids.json"
+DEFAULT_SQLITE_PATH = "memory_store.db"
+
+
+class StorageBackend(ABC):
+    """
+    Interface for persisting memory records.
+    
+    A record is a dictionary with text, context, category, keywords and
+    created_at. Records written with the complete display payload carry
+    full_payload=True; older records may hold truncated text and no context.
+    Methods are synchronous; MemoryStore runs them off the event loop.
+    """
+    
+    @abstractmethod
+    def apply(self, operations: List[Operation]) -> List[bool]:
+        """
+        Apply a group of mutations in one durable write.
+        
+        Args:
+            operations: Mutations to apply in order
+        
+        Returns:
+            Per-operation result: False for adding an existing ID or
+            removing a missing one; "put" always succeeds
+        """
+    
+    def add_memory(self, memory_id: str, record: Dict[str, Any]) -> bool:
+        """Add a record. Returns False if the ID already exists."""
+        return self.apply([("add", memory_id, record)])[0]
+    
+    def add_many(self, records: List[Tuple[str, Dict[str, Any]]]) -> int:
+        """Add several records in one write. Returns the number added."""
+        return sum(self.apply([("add", memory_id, record) for memory_id, record in records]))
+    
+    def remove_memory(self, memory_id: str) -> bool:
+        """Remove a record. Returns False if the ID does not exist."""
+        return self.apply([("remove", memory_id, None)])[0]
+    
+    @abstractmethod
+    def get_memory_ids(self) -> List[str]:
+        """Get all memory IDs in insertion order."""
+    
+    @abstractmethod
+    def get_memory(self, memory_id: str) -> Optional[Dict[str, Any]]:
+        """Get one record, or None if not found."""
+    
+    @abstractmethod
+    def get_memories(self, memory_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get several records at once, keyed by ID; missing IDs are omitted."""
+    
+    @abstractmethod
+    def get_memories_by_category(self, category: str) -> List[Dict[str, Any]]:
+        """Get all records in a category, each including its "id"."""
+    
+    @abstractmethod
+    def list_memories(
+        self,
+        limit: int,
+        category: Optional[str] = None,
+        order: str = "newest",
+        after: Optional[SortKey] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Get one page of records ordered by (created_at, id).
+        
+        Args:
+            limit: Maximum number of records
+            category: Optional category filter
+            order: "newest" or "oldest" first
+            after: Sort key of the last record on the previous page
+        
+        Returns:
+            Records, each including its "id"
+        """
+    
+    @abstractmethod
+    def iter_memories(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Iterate over (memory_id, record) pairs in insertion order."""
+    
+    @abstractmethod
+    def get_stats(self) -> Dict[str, Any]:
+        """Get total count, last update time and per-category counts."""
+    
+    @abstractmethod
+    def data_version(self) -> Any:
+        """Token that changes whenever another writer modifies the store."""
+    
+    def close(self):
+        """Release any resources held by the backend."""
+
+
+class JSONStorageBackend(StorageBackend):
+    """
+    Stores every record in a single JSON file.
+    
+    The parsed file is kept in memory as dict/set indexes and only re-read
+    when the file's inode, mtime or size changes (e.g. another process wrote it).
+    """
+    
+    def __init__(self, path: str = DEFAULT_JSON_PATH):
+        """
+        Initialize the JSON backend.
+        
+        Args:
+            path: Path to the JSON file for storing memory IDs
+        """
+        self.path = Path(path)
+        # Guards the in-memory index and read-modify-write cycles across executor threads
+        self.lock = threading.Lock()
+        
+        # memory_id -> record, in insertion order
+        self._records: Dict[str, Dict[str, Any]] = {}
+        # category -> memory IDs, in insertion order (dict used as an ordered set)
+        self._by_category: Dict[str, Dict[str, None]] = {}
+        # Sorted (created_at, id) keys, overall and per category, for paging
+        self._recency: List[SortKey] = []
+        self._recency_by_category: Dict[str, List[SortKey]] = {}
+        self._last_updated: Optional[str] = None
+        self._signature: Optional[Tuple[int, int, int]] = None
+        self.reloads = 0
+        
+        self._ensure_storage_exists()
+    
+    def _ensure_storage_exists(self):
+        """Create storage file if it doesn't exist."""
+        if not self.path.exists():
+            self._last_updated = datetime.now().isoformat()
+            self._write()
+    
+    def _file_signature(self) -> Tuple[int, int, int]:
+        """Identify the current file version by inode, mtime and size."""
+        st = os.stat(self.path)
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+    
+    @staticmethod
+    def _sort_key(memory_id: str, record: Dict[str, Any]) -> SortKey:
+        return (record.get("created_at", ""), memory_id)
+    
+    def _index(self, memory_id: str, record: Dict[str, Any]):
+        """Add a record to the in-memory indexes. Caller holds the lock."""
+        category = record.get("category", "unknown")
+        key = self._sort_key(memory_id, record)
+        self._by_category.setdefault(category, {})[memory_id] = None
+        bisect.insort(self._recency, key)
+        bisect.insort(self._recency_by_category.setdefault(category, []), key)
+    
+    def _unindex(self, memory_id: str, record: Dict[str, Any]):
+        """Remove a record from the in-memory indexes. Caller holds the lock."""
+        category = record.get("category", "unknown")
+        key = self._sort_key(memory_id, record)
+        self._by_category.get(category, {}).pop(memory_id, None)
+        for keys in (self._recency, self._recency_by_category.get(category, [])):
+            position = bisect.bisect_left(keys, key)
+            if position < len(keys) and keys[position] == key:
+                del keys[position]
+    
+    def _refresh(self):
+        """Re-parse the file if it changed since it was last loaded. Caller holds the lock."""
+        signature = self._file_signature()
+        if signature == self._signature:
+            return
+        
+        with open(self.path, 'r') as f:
+            data = json.load(f)
+        
+        memories = data.get("memories", {})
+        self._records = {
+            memory_id: memories[memory_id]
+            for memory_id in data.get("vector_ids", [])
+            if memory_id in memories
+        }
+        self._by_category = {}
+        self._recency_by_category = {}
+        for memory_id, record in self._records.items():
+            category = record.get("category", "unknown")
+            self._by_category.setdefault(category, {})[memory_id] = None
+            self._recency_by_category.setdefault(category, []).append(self._sort_key(memory_id, record))
+        self._recency = sorted(self._sort_key(memory_id, record) for memory_id, record in self._records.items())
+        for keys in self._recency_by_category.values():
+            keys.sort()
+        self._last_updated = data.get("last_updated")
+        self._signature = signature
+        self.reloads += 1
+    
+    def _write(self):
+        """Serialize the index and replace the file atomically."""
+        data = {
+            "vector_ids": list(self._records),
+            "memories": self._records,
+            "last_updated": self._last_updated,
+            "total_memories": len(self._records)
+        }
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        # Our own write must not trigger a reload
+        self._signature = self._file_signature()
+    
+    def apply(self, operations: List[Operation]) -> List[bool]:
+        with self.lock:
+            self._refresh()
+            results = []
+            
+            for op, memory_id, record in operations:
+                if op == "add":
+                    if memory_id in self._records:
+                        results.append(False)
+                        continue
+                    self._records[memory_id] = record
+                    self._index(memory_id, record)
+                    results.append(True)
+                elif op == "put":
+                    previous = self._records.get(memory_id)
+                    if previous is not None:
+                        self._unindex(memory_id, previous)
+                    self._records[memory_id] = record
+                    self._index(memory_id, record)
+                    results.append(True)
+                elif op == "remove":
+                    record = self._records.pop(memory_id, None)
+                    if record is None:
+                        results.append(False)
+                        continue
+                    self._unindex(memory_id, record)
+                    results.append(True)
+                else:
+                    raise ValueError(f"Unknown store operation: {op}")
+            
+            if any(results):
+                self._last_updated = datetime.now().isoformat()
+                try:
+                    self._write()
+                except Exception:
+                    # Drop the unsaved changes so memory matches disk again
+                    self._signature = None
+                    raise
+            return results
+    
+    def get_memory_ids(self) -> List[str]:
+        with self.lock:
+            self._refresh()
+            return list(self._records)
+    
+    def get_memory(self, memory_id: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            self._refresh()
+            record = self._records.get(memory_id)
+            return dict(record) if record is not None else None
+    
+    def get_memories(self, memory_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        with self.lock:
+            self._refresh()
+            return {
+                memory_id: dict(self._records[memory_id])
+                for memory_id in memory_ids
+                if memory_id in self._records
+            }
+    
+    def get_memories_by_category(self, category: str) -> List[Dict[str, Any]]:
+        with self.lock:
+            self._refresh()
+            return [
+                {"id": memory_id, **self._records[memory_id]}
+                for memory_id in self._by_category.get(category, {})
+            ]
+    
+    def list_memories(
+        self,
+        limit: int,
+        category: Optional[str] = None,
+        order: str = "newest",
+        after: Optional[SortKey] = None
+    ) -> List[Dict[str, Any]]:
+        limit = max(0, limit)
+        with self.lock:
+            self._refresh()
+            keys = self._recency if category is None else self._recency_by_category.get(category, [])
+            if order == "newest":
+                end = bisect.bisect_left(keys, tuple(after)) if after else len(keys)
+                page = keys[max(0, end - limit):end][::-1]
+            elif order == "oldest":
+                start = bisect.bisect_right(keys, tuple(after)) if after else 0
+                page = keys[start:start + limit]
+            else:
+                raise ValueError(f"Unknown order: {order}")
+            return [{"id": memory_id, **self._records[memory_id]} for _, memory_id in page]
+    
+    def iter_memories(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        with self.lock:
+            self._refresh()
+            items = list(self._records.items())
+        for memory_id, record in items:
+            yield memory_id, dict(record)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            self._refresh()
+            return {
+                "total_memories": len(self._records),
+                "last_updated": self._last_updated,
+                "categories": {
+                    category: len(ids) for category, ids in self._by_category.items() if ids
+                }
+            }
+    
+    def data_version(self) -> Any:
+        with self.lock:
+            self._refresh()
+            return self.reloads
+
+
+class SQLiteStorageBackend(StorageBackend):
+    """Stores records in an indexed SQLite database in WAL mode."""
+    
+    def __init__(self, path: str = DEFAULT_SQLITE_PATH):
+        """
+        Initialize the SQLite backend.
+        
+        Args:
+            path: Path to the SQLite database file
+        """
+        self.path = Path(path)
+        self.lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._create_schema()
+    
+    def _create_schema(self):
+        """Create tables and indexes if they don't exist."""
+        with self.lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            # Writes are group-committed, so a full sync per commit is affordable
+            self._conn.execute("PRAGMA synchronous=FULL")
+            self._conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS memories (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    id TEXT NOT NULL UNIQUE,
+                    category TEXT NOT NULL,
+                    created_at TEXT NOT NULL,
+                    text TEXT NOT NULL,
+                    data TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_memories_category ON memories (category);
+                -- Superseded by idx_memories_recency, which has it as a prefix
+                DROP INDEX IF EXISTS idx_memories_created_at;
+                CREATE INDEX IF NOT EXISTS idx_memories_recency ON memories (created_at, id);
+                CREATE INDEX IF NOT EXISTS idx_memories_category_recency ON memories (category, created_at, id);
+                
+                -- Keyword lookups are served by the in-memory text index
+                DROP TABLE IF EXISTS memory_keywords;
+                
+                CREATE TABLE IF NOT EXISTS store_meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                );
+                
+                -- Maintained by apply() so stats never scan the memories table
+                CREATE TABLE IF NOT EXISTS category_counts (
+                    category TEXT PRIMARY KEY,
+                    n INTEGER NOT NULL
+                );
+                """
+            )
+            with self._conn:
+                counted = self._conn.execute(
+                    "SELECT 1 FROM store_meta WHERE key = 'category_counts'"
+                ).fetchone()
+                if counted is None:
+                    # Databases created before the counts were kept: count once
+                    self._conn.execute("DELETE FROM category_counts")
+                    self._conn.execute(
+                        "INSERT INTO category_counts (category, n) "
+                        "SELECT category, COUNT(*) FROM memories GROUP BY category"
+                    )
+                    self._conn.execute("INSERT INTO store_meta (key, value) VALUES ('category_counts', '1')")
+    
+    @staticmethod
+    def _row_to_record(row: sqlite3.Row) -> Dict[str, Any]:
+        """Decode a stored record."""
+        return json.loads(row["data"])
+    
+    def _count(self, category: str, amount: int):
+        """Adjust a category's memory count inside the caller's transaction."""
+        self._conn.execute("INSERT OR IGNORE INTO category_counts (category, n) VALUES (?, 0)", (category,))
+        self._conn.execute("UPDATE category_counts SET n = n + ? WHERE category = ?", (amount, category))
+        if amount < 0:
+            self._conn.execute("DELETE FROM category_counts WHERE category = ? AND n <= 0", (category,))
+    
+    def _category_of(self, memory_id: str) -> Optional[str]:
+        """Get a stored record's category, or None if the ID does not exist."""
+        row = self._conn.execute("SELECT category FROM memories WHERE id = ?", (memory_id,)).fetchone()
+        return row["category"] if row is not None else None
+    
+    def _insert(self, memory_id: str, record: Dict[str, Any]) -> bool:
+        """Insert one record inside the caller's transaction."""
+        category = record.get("category", "general")
+        cursor = self._conn.execute(
+            "INSERT OR IGNORE INTO memories (id, category, created_at, text, data) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (
+                memory_id,
+                category,
+                record.get("created_at", datetime.now().isoformat()),
+                record.get("text", ""),
+                json.dumps(record)
+            )
+        )
+        if cursor.rowcount == 0:
+            return False
+        self._count(category, 1)
+        return True
+    
+    def _replace(self, memory_id: str, record: Dict[str, Any]) -> bool:
+        """Insert or overwrite one record inside the caller's transaction."""
+        previous = self._category_of(memory_id)
+        if previous is None:
+            return self._insert(memory_id, record)
+        
+        category = record.get("category", "general")
+        self._conn.execute(
+            "UPDATE memories SET category = ?, created_at = ?, text = ?, data = ? WHERE id = ?",
+            (
+                category,
+                record.get("created_at", datetime.now().isoformat()),
+                record.get("text", ""),
+                json.dumps(record),
+                memory_id
+            )
+        )
+        if category != previous:
+            self._count(previous, -1)
+            self._count(category, 1)
+        return True
+    
+    def _touch(self):
+        """Record the last update time inside the caller's transaction."""
+        self._conn.execute(
+            "INSERT OR REPLACE INTO store_meta (key, value) VALUES ('last_updated', ?)",
+            (datetime.now().isoformat(),)
+        )
+    
+    def _delete(self, memory_id: str) -> bool:
+        """Delete one record inside the caller's transaction."""
+        category = self._category_of(memory_id)
+        if category is None:
+            return False
+        self._conn.execute("DELETE FROM memories WHERE id = ?", (memory_id,))
+        self._count(category, -1)
+        return True
+    
+    def apply(self, operations: List[Operation]) -> List[bool]:
+        with self.lock:
+            with self._conn:
+                results = []
+                for op, memory_id, record in operations:
+                    if op == "add":
+                        results.append(self._insert(memory_id, record))
+                    elif op == "put":
+                        results.append(self._replace(memory_id, record))
+                    elif op == "remove":
+                        results.append(self._delete(memory_id))
+                    else:
+                        raise ValueError(f"Unknown store operation: {op}")
+                if any(results):
+                    self._touch()
+            return results
+    
+    def get_memory_ids(self) -> List[str]:
+        with self.lock:
+            rows = self._conn.execute("SELECT id FROM memories ORDER BY seq").fetchall()
+        return [row["id"] for row in rows]
+    
+    def get_memory(self, memory_id: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            row = self._conn.execute(
+                "SELECT data FROM memories WHERE id = ?", (memory_id,)
+            ).fetchone()
+        return self._row_to_record(row) if row else None
+    
+    def get_memories(self, memory_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        records = {}
+        with self.lock:
+            # Stay well under SQLite's bound-parameter limit
+            for start in range(0, len(memory_ids), 500):
+                chunk = memory_ids[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT id, data FROM memories WHERE id IN ({','.join('?' * len(chunk))})",
+                    chunk
+                ).fetchall()
+                for row in rows:
+                    records[row["id"]] = self._row_to_record(row)
+        return records
+    
+    def get_memories_by_category(self, category: str) -> List[Dict[str, Any]]:
+        with self.lock:
+            rows = self._conn.execute(
+                "SELECT id, data FROM memories WHERE category = ? ORDER BY seq", (category,)
+            ).fetchall()
+        return [{"id": row["id"], **self._row_to_record(row)} for row in rows]
+    
+    def list_memories(
+        self,
+        limit: int,
+        category: Optional[str] = None,
+        order: str = "newest",
+        after: Optional[SortKey] = None
+    ) -> List[Dict[str, Any]]:
+        if order not in ("newest", "oldest"):
+            raise ValueError(f"Unknown order: {order}")
+        
+        # Keyset pagination: seek past the cursor on the (created_at, id) index
+        conditions, params = [], []
+        if category is not None:
+            conditions.append("category = ?")
+            params.append(category)
+        if after:
+            conditions.append("(created_at, id) < (?, ?)" if order == "newest" else "(created_at, id) > (?, ?)")
+            params.extend(after)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        direction = "DESC" if order == "newest" else "ASC"
+        
+        with self.lock:
+            rows = self._conn.execute(
+                f"SELECT id, data FROM memories {where} "
+                f"ORDER BY created_at {direction}, id {direction} LIMIT ?",
+                params + [max(0, limit)]
+            ).fetchall()
+        return [{"id": row["id"], **self._row_to_record(row)} for row in rows]
+    
+    def iter_memories(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        with self.lock:
+            rows = self._conn.execute("SELECT id, data FROM memories ORDER BY seq").fetchall()
+        for row in rows:
+            yield row["id"], self._row_to_record(row)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            rows = self._conn.execute(
+                "SELECT category, n FROM category_counts ORDER BY category"
+            ).fetchall()
+            last_updated = self._conn.execute(
+                "SELECT value FROM store_meta WHERE key = 'last_updated'"
+            ).fetchone()
+        categories = {row["category"]: row["n"] for row in rows}
+        return {
+            "total_memories": sum(categories.values()),
+            "last_updated": last_updated["value"] if last_updated else None,
+            "categories": categories
+        }
+    
+    def data_version(self) -> Any:
+        # Changes only when another connection commits
+        with self.lock:
+            return self._conn.execute("PRAGMA data_version").fetchone()[0]
+    
+    def close(self):
+        with self.lock:
+            self._conn.close()
+
+
+def create_storage_backend(kind: Optional[str] = None, path: Optional[str] = None) -> StorageBackend:
+    """
+    Create a storage backend.
+    
+    Args:
+        kind: "json" or "sqlite"; defaults to MEMORY_STORE_BACKEND or "json"
+        path: Storage file; defaults to MEMORY_STORE_PATH or the backend's default
+    
+    Returns:
+        StorageBackend instance
+    """
+    kind = (kind or os.getenv("MEMORY_STORE_BACKEND", "json")).lower()
+    path = path or os.getenv("MEMORY_STORE_PATH")
+    
+    if kind == "json":
+        return JSONStorageBackend(path or DEFAULT_JSON_PATH)
+    if kind == "sqlite":
+        return SQLiteStorageBackend(path or DEFAULT_SQLITE_PATH)
+    raise ValueError(f"Unknown memory store backend: {kind}")
+
+
+def migrate_json_to_sqlite(
+    json_path: str = DEFAULT_JSON_PATH,
+    sqlite_path: str = DEFAULT_SQLITE_PATH
+) -> int:
+    """
+    Copy every record from a JSON store into a SQLite store.
+    
+    Records already present in the SQLite store are left untouched, so the
+    migration can safely be re-run.
+    
+    Args:
+        json_path: Existing JSON store file
+        sqlite_path: SQLite database to create or extend
+    
+    Returns:
+        Number of records migrated
+    """
+    if not Path(json_path).exists():
+        raise FileNotFoundError(f"JSON store not found: {json_path}")
+    
+    source = JSONStorageBackend(json_path)
+    target = SQLiteStorageBackend(sqlite_path)
+    try:
+        return target.add_many(list(source.iter_memories()))
+    finally:
+        target.close()
\ No newline at end of file
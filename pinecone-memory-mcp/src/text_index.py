@@ -0,0 +1,202 @@
+"""
+In-memory inverted index for local full-text search over memories.
+Supports prefix matching, AND/OR queries and BM25 ranking, and is updated
+incrementally as memories are added or removed.
+"""
+
+import bisect
+import heapq
+import math
+import re
+from typing import List, Dict, Iterable, Optional, Set, Tuple
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Query terms shorter than this only match exactly, to keep expansions small
+MIN_PREFIX_LENGTH = 2
+
+# Extra term frequency given to extracted keywords
+KEYWORD_WEIGHT = 2
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase alphanumeric tokens.
+    
+    Args:
+        text: Text to tokenize
+    
+    Returns:
+        List of tokens
+    """
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class InvertedIndex:
+    """Term -> postings index with BM25 scoring."""
+    
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        """
+        Initialize an empty index.
+        
+        Args:
+            k1: BM25 term frequency saturation
+            b: BM25 document length normalization
+        """
+        self.k1 = k1
+        self.b = b
+        
+        # term -> {doc_id: term frequency}
+        self._postings: Dict[str, Dict[str, int]] = {}
+        # doc_id -> {term: term frequency}, needed to remove a document
+        self._doc_terms: Dict[str, Dict[str, int]] = {}
+        self._doc_lengths: Dict[str, int] = {}
+        self._total_length = 0
+        # All indexed terms in sorted order, for prefix lookups
+        self._sorted_terms: List[str] = []
+    
+    def __len__(self) -> int:
+        return len(self._doc_lengths)
+    
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._doc_lengths
+    
+    def add(self, doc_id: str, text: str, keywords: Iterable[str] = ()):
+        """
+        Index a document, replacing any previous version with the same ID.
+        
+        Args:
+            doc_id: Document identifier
+            text: Document text
+            keywords: Extra keywords, weighted above plain text
+        """
+        if doc_id in self._doc_lengths:
+            self.remove(doc_id)
+        
+        term_counts: Dict[str, int] = {}
+        for token in tokenize(text):
+            term_counts[token] = term_counts.get(token, 0) + 1
+        for keyword in keywords:
+            for token in tokenize(keyword):
+                term_counts[token] = term_counts.get(token, 0) + KEYWORD_WEIGHT
+        
+        length = sum(term_counts.values())
+        self._doc_terms[doc_id] = term_counts
+        self._doc_lengths[doc_id] = length
+        self._total_length += length
+        
+        for term, count in term_counts.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                bisect.insort(self._sorted_terms, term)
+            postings[doc_id] = count
+    
+    def remove(self, doc_id: str) -> bool:
+        """
+        Remove a document from the index.
+        
+        Args:
+            doc_id: Document identifier
+        
+        Returns:
+            True if the document was indexed
+        """
+        term_counts = self._doc_terms.pop(doc_id, None)
+        if term_counts is None:
+            return False
+        
+        self._total_length -= self._doc_lengths.pop(doc_id)
+        for term in term_counts:
+            postings = self._postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self._postings[term]
+                position = bisect.bisect_left(self._sorted_terms, term)
+                del self._sorted_terms[position]
+        return True
+    
+    def _expand(self, term: str, prefix: bool) -> List[str]:
+        """Get the indexed terms a query term matches."""
+        if not prefix or len(term) < MIN_PREFIX_LENGTH:
+            return [term] if term in self._postings else []
+        
+        matches = []
+        position = bisect.bisect_left(self._sorted_terms, term)
+        while position < len(self._sorted_terms) and self._sorted_terms[position].startswith(term):
+            matches.append(self._sorted_terms[position])
+            position += 1
+        return matches
+    
+    def search(
+        self,
+        query: str,
+        mode: str = "and",
+        prefix: bool = True,
+        limit: Optional[int] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Find documents matching a query, ranked by BM25.
+        
+        Args:
+            query: Free-text query
+            mode: "and" requires every query term, "or" any of them
+            prefix: Let each query term match indexed terms it prefixes
+            limit: Maximum number of results
+        
+        Returns:
+            (doc_id, score) pairs, best first
+        """
+        if mode not in ("and", "or"):
+            raise ValueError(f"Unknown search mode: {mode}")
+        
+        query_terms = list(dict.fromkeys(tokenize(query)))
+        if not query_terms or not self._doc_lengths:
+            return []
+        
+        expansions = [self._expand(term, prefix) for term in query_terms]
+        
+        candidates: Optional[Set[str]] = None
+        for terms in sorted(expansions, key=lambda t: sum(len(self._postings[x]) for x in t)):
+            if mode == "and" and candidates is not None:
+                # Narrow the (small) candidate set instead of materializing large postings
+                postings_list = [self._postings[term] for term in terms]
+                candidates = {d for d in candidates if any(d in p for p in postings_list)}
+                if not candidates:
+                    return []
+                continue
+            
+            docs: Set[str] = set()
+            for term in terms:
+                docs.update(self._postings[term])
+            candidates = docs if candidates is None else candidates | docs
+            if mode == "and" and not candidates:
+                return []
+        
+        doc_count = len(self._doc_lengths)
+        avg_length = self._total_length / doc_count
+        # BM25 length normalization k1 * (1 - b + b * len / avg), split so each
+        # posting costs one multiply-add instead of a division
+        norm_base = self.k1 * (1 - self.b)
+        norm_per_token = self.k1 * self.b / avg_length
+        doc_lengths = self._doc_lengths
+        scores: Dict[str, float] = {}
+        
+        for terms in expansions:
+            for term in terms:
+                postings = self._postings[term]
+                df = len(postings)
+                idf = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+                # Walk whichever side is smaller: the postings or the candidates
+                if len(candidates) < df:
+                    matches = ((doc_id, postings[doc_id]) for doc_id in candidates if doc_id in postings)
+                else:
+                    matches = ((doc_id, tf) for doc_id, tf in postings.items() if doc_id in candidates)
+                for doc_id, tf in matches:
+                    norm = norm_base + norm_per_token * doc_lengths[doc_id]
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        
+        if limit is not None:
+            # Partial selection instead of sorting every match
+            return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)
\ No newline at end of file
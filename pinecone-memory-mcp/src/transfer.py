@@ -0,0 +1,304 @@
+"""
+Streaming export and import of the memory corpus.
+An export pages through the index into numbered part files next to a manifest
+that doubles as its checkpoint; an import replays the parts through the
+batched upsert path and records finished parts per target index. Either can
+be interrupted and rerun to resume where it stopped.
+"""
+
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Callable
+
+from async_io import run_blocking
+from ingest import embedding_text
+from utils import generate_embeddings, embedding_metadata
+from vector_index import NUMPY_AVAILABLE
+
+if NUMPY_AVAILABLE:
+    import numpy as np
+
+MANIFEST_NAME = "manifest.json"
+IMPORT_STATE_NAME = "import-state.json"
+MANIFEST_VERSION = 1
+
+# Records per part file; one part is the unit of checkpointing
+DEFAULT_PART_SIZE = 1000
+EXPORT_FORMATS = ("jsonl", "npz")
+
+
+def _write_json_atomic(path: Path, data: Dict[str, Any]):
+    """Write a JSON file so a crash never leaves it half-written."""
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _read_json(path: Path) -> Optional[Dict[str, Any]]:
+    """Read a JSON file, or None if it does not exist."""
+    if not path.exists():
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_part(path: Path, records: List[Dict[str, Any]], fmt: str = "jsonl"):
+    """
+    Write one part file atomically.
+    
+    Args:
+        path: Part file path
+        records: {"id", "values", "metadata"} dictionaries
+        fmt: "jsonl" (one record per line) or "npz" (a float32 vector matrix
+            with IDs and metadata stored as JSON)
+    """
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        if fmt == "npz":
+            np.savez(
+                f,
+                vectors=np.asarray([record["values"] for record in records], dtype=np.float32),
+                ids=np.array(json.dumps([record["id"] for record in records])),
+                metadata=np.array(json.dumps([record["metadata"] for record in records]))
+            )
+        else:
+            for record in records:
+                f.write(json.dumps(record).encode("utf-8") + b"\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_part(path: Path, fmt: str = "jsonl") -> List[Dict[str, Any]]:
+    """
+    Read a part file written by write_part.
+    
+    Args:
+        path: Part file path
+        fmt: Format the part was written in
+    
+    Returns:
+        {"id", "values", "metadata"} dictionaries
+    """
+    if fmt == "npz":
+        with np.load(path, allow_pickle=False) as data:
+            vectors = data["vectors"]
+            ids = json.loads(str(data["ids"]))
+            metadata = json.loads(str(data["metadata"]))
+        return [
+            {"id": vector_id, "values": vectors[i].tolist(), "metadata": metadata[i]}
+            for i, vector_id in enumerate(ids)
+        ]
+    
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+async def export_memories(
+    pinecone_client,
+    directory: str,
+    fmt: str = "jsonl",
+    part_size: int = DEFAULT_PART_SIZE,
+    on_progress: Optional[Callable[[Dict[str, Any]], None]] = None
+) -> Dict[str, Any]:
+    """
+    Export every memory with its vector and metadata.
+    
+    Only one part is held in memory at a time. The manifest is rewritten after
+    each part with the list pagination token to continue from, so rerunning
+    an interrupted export picks up after the last complete part.
+    
+    Args:
+        pinecone_client: PineconeMemoryClient to read from
+        directory: Export directory; created if missing
+        fmt: Part format, "jsonl" or "npz" (needs NumPy)
+        part_size: Records per part file
+        on_progress: Called with the manifest after each part
+    
+    Returns:
+        The final manifest
+    
+    Raises:
+        ValueError: If the format is unknown or differs from a partial export
+            in the same directory
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    if fmt == "npz" and not NUMPY_AVAILABLE:
+        raise ValueError("The npz format requires numpy")
+    
+    root = Path(directory)
+    root.mkdir(parents=True, exist_ok=True)
+    manifest_path = root / MANIFEST_NAME
+    
+    manifest = _read_json(manifest_path)
+    if manifest is None:
+        manifest = {
+            "version": MANIFEST_VERSION,
+            "index": pinecone_client.index_name,
+            "namespace": pinecone_client.namespace,
+            "dimension": None,
+            "format": fmt,
+            "started_at": datetime.now().isoformat(),
+            "parts": [],
+            "exported": 0,
+            "next_token": None,
+            "complete": False
+        }
+    elif manifest["complete"]:
+        return manifest
+    elif manifest["format"] != fmt:
+        raise ValueError(f"{directory} holds a partial {manifest['format']} export")
+    
+    part_size = max(1, part_size)
+    token = manifest["next_token"]
+    records: List[Dict[str, Any]] = []
+    while True:
+        ids, token = await pinecone_client.list_memory_ids(token)
+        vectors = await pinecone_client.fetch_vectors(ids) if ids else {}
+        records.extend({"id": vector_id, **vectors[vector_id]} for vector_id in ids if vector_id in vectors)
+        
+        # Parts end on page boundaries so the saved token resumes exactly
+        # after the last record written
+        if len(records) < part_size and token:
+            continue
+        
+        if records:
+            name = f"part-{len(manifest['parts']):05d}.{fmt}"
+            await run_blocking("local", write_part, root / name, records, fmt)
+            manifest["parts"].append({"file": name, "count": len(records)})
+            manifest["exported"] += len(records)
+            manifest["dimension"] = manifest["dimension"] or len(records[0]["values"])
+        manifest["next_token"] = token
+        manifest["complete"] = not token
+        if manifest["complete"]:
+            manifest["completed_at"] = datetime.now().isoformat()
+        await run_blocking("local", _write_json_atomic, manifest_path, manifest)
+        if on_progress is not None:
+            on_progress(manifest)
+        
+        records = []
+        if not token:
+            return manifest
+
+
+async def _reembed(records: List[Dict[str, Any]], model: Optional[str]) -> List[Dict[str, Any]]:
+    """
+    Replace records' vectors with fresh embeddings of their text.
+    
+    Returns:
+        The records that embedded successfully
+    """
+    texts = [
+        embedding_text(record["metadata"].get("memory_text", ""), record["metadata"].get("context"))
+        for record in records
+    ]
+    embeddings = await generate_embeddings(texts, model)
+    model_metadata = embedding_metadata(model)
+    # A zero vector means embedding failed
+    return [
+        {**record, "values": embedding, "metadata": {**record["metadata"], **model_metadata}}
+        for record, embedding in zip(records, embeddings)
+        if any(embedding)
+    ]
+
+
+async def import_memories(
+    pinecone_client,
+    directory: str,
+    memory_store=None,
+    model: Optional[str] = None,
+    on_progress: Optional[Callable[[Dict[str, int]], None]] = None
+) -> Dict[str, int]:
+    """
+    Import an export into the client's index.
+    
+    Exported vectors are upserted as they are when their dimension matches
+    the target index and they were embedded with the current model (or do not
+    say which); only the others are re-embedded from their text.
+    Finished parts are recorded per target index, so rerunning an interrupted
+    import skips them.
+    
+    Args:
+        pinecone_client: PineconeMemoryClient to write to
+        directory: Directory written by export_memories
+        memory_store: MemoryStore to record imported memories in, or None
+        model: Embedding model for vectors that have to be re-embedded
+            (defaults to the provider's model)
+        on_progress: Called with the running totals after each part
+    
+    Returns:
+        Totals: imported, reembedded, failed and skipped_parts
+    
+    Raises:
+        ValueError: If the directory does not hold a complete export
+    """
+    root = Path(directory)
+    manifest = _read_json(root / MANIFEST_NAME)
+    if manifest is None:
+        raise ValueError(f"No export manifest in {directory}")
+    if not manifest["complete"]:
+        raise ValueError(f"The export in {directory} is incomplete; rerun the export to finish it")
+    
+    stats = await pinecone_client.get_stats()
+    if "error" in stats:
+        raise RuntimeError(stats["error"])
+    target_dimension = stats.get("dimension")
+    current_model = embedding_metadata(model)["embedding_model"]
+    
+    state_path = root / IMPORT_STATE_NAME
+    state = _read_json(state_path) or {}
+    target = f"{pinecone_client.index_name}/{pinecone_client.namespace}"
+    completed = set(state.get(target, []))
+    
+    totals = {"imported": 0, "reembedded": 0, "failed": 0, "skipped_parts": 0}
+    for part in manifest["parts"]:
+        if part["file"] in completed:
+            totals["skipped_parts"] += 1
+            continue
+        
+        records = await run_blocking("local", read_part, root / part["file"], manifest["format"])
+        reusable, stale = [], []
+        for record in records:
+            # Vectors from another model would not be comparable with the rest
+            source_model = record["metadata"].get("embedding_model")
+            if (
+                (target_dimension and len(record["values"]) != target_dimension)
+                or (source_model and source_model != current_model)
+            ):
+                stale.append(record)
+            else:
+                reusable.append(record)
+        if stale:
+            reembedded = await _reembed(stale, model)
+            totals["reembedded"] += len(reembedded)
+            reusable.extend(reembedded)
+        
+        results = await pinecone_client.upsert_memories(reusable) if reusable else []
+        imported = [record for record, ok in zip(reusable, results) if ok]
+        failed = len(records) - len(imported)
+        totals["imported"] += len(imported)
+        totals["failed"] += failed
+        
+        if memory_store is not None and imported:
+            if not await memory_store.put_memories([
+                (record["id"], memory_store.record_from_metadata(record["metadata"]))
+                for record in imported
+            ]):
+                failed += 1
+        
+        # Parts with failures are retried on the next run; upserts are
+        # idempotent, so repeating the rest of the part is harmless
+        if not failed:
+            completed.add(part["file"])
+            state[target] = sorted(completed)
+            await run_blocking("local", _write_json_atomic, state_path, state)
+        if on_progress is not None:
+            on_progress(dict(totals))
+    
+    return totals
\ No newline at end of file
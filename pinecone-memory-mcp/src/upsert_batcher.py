@@ -0,0 +1,197 @@
+"""
+Write-behind batching for Pinecone upserts.
+Merges concurrent single-vector upserts into batched index requests.
+"""
+
+import asyncio
+import json
+import logging
+from typing import List, Dict, Any, Callable, Awaitable, Optional, Tuple
+
+from resilience import CircuitOpenError, is_retryable
+
+logger = logging.getLogger(__name__)
+
+# Pinecone recommends batches of ~100 vectors and rejects requests over 2MB
+DEFAULT_MAX_BATCH_SIZE = 100
+DEFAULT_MAX_BATCH_BYTES = 2 * 1024 * 1024 - 64 * 1024
+DEFAULT_MAX_DELAY_MS = 20.0
+
+
+def estimate_vector_bytes(vector: Dict[str, Any]) -> int:
+    """
+    Cheaply estimate the serialized size of a vector upsert payload.
+    
+    Args:
+        vector: Vector dictionary with id, values and metadata
+    
+    Returns:
+        Approximate payload size in bytes
+    """
+    size = len(vector.get("id", "")) + 32
+    # A float32 rendered as JSON is at most ~12 characters plus separator
+    size += len(vector.get("values", [])) * 12
+    metadata = vector.get("metadata")
+    if metadata:
+        size += len(json.dumps(metadata, default=str))
+    return size
+
+
+class UpsertBatcher:
+    """Buffers vector upserts and flushes them to the index in batches."""
+    
+    def __init__(
+        self,
+        upsert_fn: Callable[[List[Dict[str, Any]]], Awaitable[Any]],
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        max_batch_bytes: int = DEFAULT_MAX_BATCH_BYTES,
+        max_delay_ms: float = DEFAULT_MAX_DELAY_MS
+    ):
+        """
+        Initialize the batcher.
+        
+        Args:
+            upsert_fn: Coroutine that writes a list of vectors in one request
+                and raises on failure
+            max_batch_size: Flush once this many vectors are buffered
+            max_batch_bytes: Flush before the buffered payload exceeds this size
+            max_delay_ms: Flush buffered vectors at most this long after the
+                first one arrived
+        """
+        self._upsert_fn = upsert_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_batch_bytes = max_batch_bytes
+        self.max_delay = max(0.0, max_delay_ms) / 1000.0
+        
+        self._pending: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self._pending_bytes = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._inflight: set = set()
+        self._closed = False
+        
+        self._stats = {
+            "vectors_submitted": 0,
+            "vectors_written": 0,
+            "vectors_failed": 0,
+            "requests_sent": 0,
+            "batches_written": 0,
+            "batches_failed": 0,
+            "batch_retries": 0
+        }
+    
+    async def submit(self, vector: Dict[str, Any]) -> bool:
+        """
+        Queue a vector for upsert and wait for its batch to be written.
+        
+        Args:
+            vector: Vector dictionary with id, values and metadata
+        
+        Returns:
+            Success status for this vector
+        """
+        if self._closed:
+            raise RuntimeError("UpsertBatcher is closed")
+        
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        size = estimate_vector_bytes(vector)
+        
+        # Never let a single addition push the buffered payload over budget
+        if self._pending and self._pending_bytes + size > self.max_batch_bytes:
+            self._flush_pending()
+        
+        self._pending.append((vector, future))
+        self._pending_bytes += size
+        self._stats["vectors_submitted"] += 1
+        
+        if len(self._pending) >= self.max_batch_size or self._pending_bytes >= self.max_batch_bytes:
+            self._flush_pending()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self._flush_pending)
+        
+        # Shield so a cancelled caller does not drop the write for the whole batch
+        return await asyncio.shield(future)
+    
+    def _flush_pending(self):
+        """Hand the buffered vectors to a background write task."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        
+        if not self._pending:
+            return
+        
+        batch = self._pending
+        self._pending = []
+        self._pending_bytes = 0
+        
+        task = asyncio.ensure_future(self._write_batch(batch))
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+    
+    async def _write_batch(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]):
+        """
+        Write one batch, bisecting on rejection so each vector gets its own result.
+        
+        Args:
+            batch: Buffered (vector, future) pairs
+        """
+        self._stats["requests_sent"] += 1
+        try:
+            await self._upsert_fn([vector for vector, _ in batch])
+        except Exception as e:
+            # Only a rejected request (bad vector, payload too large) can be
+            # narrowed down by splitting; during an outage the halves would
+            # fail too and only multiply the load on the backend
+            transient = isinstance(e, CircuitOpenError) or is_retryable(e)
+            if len(batch) > 1 and not transient:
+                # Split the batch to isolate the vector(s) the index rejected
+                self._stats["batch_retries"] += 1
+                middle = len(batch) // 2
+                await asyncio.gather(
+                    self._write_batch(batch[:middle]),
+                    self._write_batch(batch[middle:])
+                )
+                return
+            
+            if len(batch) == 1:
+                logger.error(f"Error upserting memory {batch[0][0].get('id')}: {str(e)}")
+            else:
+                logger.error(f"Error upserting {len(batch)} memories: {str(e)}")
+            self._stats["batches_failed"] += 1
+            self._stats["vectors_failed"] += len(batch)
+            for _, future in batch:
+                if not future.done():
+                    future.set_result(False)
+            return
+        
+        self._stats["batches_written"] += 1
+        self._stats["vectors_written"] += len(batch)
+        for _, future in batch:
+            if not future.done():
+                future.set_result(True)
+    
+    async def flush(self):
+        """Write everything buffered so far and wait for in-flight batches."""
+        self._flush_pending()
+        while self._inflight:
+            await asyncio.gather(*list(self._inflight), return_exceptions=True)
+    
+    async def aclose(self):
+        """Stop accepting new vectors and flush the remaining buffer."""
+        self._closed = True
+        await self.flush()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get batching statistics.
+        
+        Returns:
+            Dictionary of counters plus the current buffer depth
+        """
+        batches = self._stats["batches_written"]
+        return {
+            **self._stats,
+            "pending": len(self._pending),
+            "avg_batch_size": (self._stats["vectors_written"] / batches) if batches else 0.0
+        }
\ No newline at end of file
@@ -2,11 +2,12 @@
 Utility functions for text processing, embedding generation, and metadata extraction.
 """
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import os
-from datetime import datetime
+from datetime import datetime, timedelta
 import re
 import hashlib
+import asyncio
 
 # Try to load dotenv (optional)
 try:
@@ -15,42 +16,188 @@ try:
 except ImportError:
     pass
 
-# Try to import OpenAI (optional for testing)
-try:
-    import openai
-    openai.api_key = os.getenv("OPENAI_API_KEY")
-    OPENAI_AVAILABLE = True
-except ImportError:
-    OPENAI_AVAILABLE = False
+from embedding_providers import (
+    EmbeddingProvider,
+    create_embedding_provider,
+    DEFAULT_EMBEDDING_MODEL
+)
+from embedding_cache import EmbeddingCache, DEFAULT_CACHE_PATH, DEFAULT_MEMORY_ENTRIES
+from embedding_batcher import EmbeddingBatcher, DEFAULT_MAX_BATCH_SIZE, DEFAULT_MAX_DELAY_MS
+from metrics import stage, count_backend_error
+
+# Shared embedding provider, created on first use
+_embedding_provider: Optional[EmbeddingProvider] = None
+
+# Shared embedding cache, created on first use
+_embedding_cache = None
+
+# One micro-batcher per embedding model
+_embedding_batchers: Dict[str, EmbeddingBatcher] = {}
+
+
+def get_embedding_provider() -> EmbeddingProvider:
+    """
+    Get the shared embedding provider.
+    
+    EMBEDDING_PROVIDER selects it (openai or hash).
+    
+    Returns:
+        EmbeddingProvider instance
+    """
+    global _embedding_provider
+    if _embedding_provider is None:
+        _embedding_provider = create_embedding_provider()
+    return _embedding_provider
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """
+    Get the shared embedding cache.
+    
+    EMBEDDING_CACHE_PATH sets the SQLite file (empty disables the disk tier)
+    and EMBEDDING_CACHE_SIZE the number of vectors kept in memory.
+    
+    Returns:
+        EmbeddingCache instance
+    """
+    global _embedding_cache
+    if _embedding_cache is None:
+        _embedding_cache = EmbeddingCache(
+            path=os.getenv("EMBEDDING_CACHE_PATH", DEFAULT_CACHE_PATH),
+            max_memory_entries=int(os.getenv("EMBEDDING_CACHE_SIZE", DEFAULT_MEMORY_ENTRIES))
+        )
+    return _embedding_cache
+
+
+def get_embedding_cache_stats() -> Dict[str, Any]:
+    """
+    Get embedding cache statistics without creating the cache.
+    
+    Returns:
+        Dictionary of cache counters, or {"enabled": False} before first use
+    """
+    if _embedding_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **_embedding_cache.get_stats()}
+
+
+def get_embedding_batcher(model: str = DEFAULT_EMBEDDING_MODEL) -> EmbeddingBatcher:
+    """
+    Get the shared micro-batcher for an embedding model.
+    
+    EMBEDDING_BATCH_SIZE caps the texts per request and EMBEDDING_BATCH_WINDOW_MS
+    sets how long single requests wait for company.
+    
+    Args:
+        model: Embedding model
+    
+    Returns:
+        EmbeddingBatcher instance
+    """
+    batcher = _embedding_batchers.get(model)
+    if batcher is None:
+        async def embed_batch(texts: List[str]) -> List[List[float]]:
+            return await _embed_and_cache(texts, model)
+        
+        batcher = EmbeddingBatcher(
+            embed_batch,
+            max_batch_size=int(os.getenv("EMBEDDING_BATCH_SIZE", DEFAULT_MAX_BATCH_SIZE)),
+            max_delay_ms=float(os.getenv("EMBEDDING_BATCH_WINDOW_MS", DEFAULT_MAX_DELAY_MS))
+        )
+        _embedding_batchers[model] = batcher
+    return batcher
 
 
-async def generate_embedding(text: str, model: str = "text-embedding-3-small") -> List[float]:
+async def _embed_and_cache(texts: List[str], model: str) -> List[List[float]]:
     """
-    Generate embedding for text using OpenAI's embedding model.
+    Embed a batch of texts in one provider call and cache the results.
+    
+    Args:
+        texts: Texts to embed
+        model: Embedding model
+    
+    Returns:
+        Embeddings in input order
+    """
+    embeddings = await get_embedding_provider().embed(texts, model)
+    await get_embedding_cache().put_many(texts, model, embeddings)
+    return embeddings
+
+
+def embedding_metadata(model: Optional[str] = None) -> Dict[str, str]:
+    """
+    Describe which provider and model embed new vectors.
+    
+    Stored in each vector's metadata so indexes mixing models can be detected.
+    
+    Args:
+        model: Embedding model (defaults to the provider's model)
+    
+    Returns:
+        Dictionary with embedding_provider and embedding_model
+    """
+    provider = get_embedding_provider()
+    return {"embedding_provider": provider.name, "embedding_model": model or provider.model}
+
+
+async def generate_embeddings(
+    texts: List[str],
+    model: Optional[str] = None
+) -> List[List[float]]:
+    """
+    Generate embeddings for several texts with the configured provider.
+    
+    Cached texts are answered locally; the rest are deduplicated and sent in
+    as few requests as possible, together with concurrent callers' texts.
+    Inline providers such as the hashing embedder skip both steps.
+    
+    Args:
+        texts: Texts to embed
+        model: Embedding model to use (defaults to the provider's model)
+    
+    Returns:
+        List of embeddings in the same order as texts
+    """
+    provider = get_embedding_provider()
+    model = model or provider.model
+    with stage("embedding"):
+        if provider.inline:
+            try:
+                return await provider.embed(texts, model)
+            except Exception as e:
+                print(f"Error generating embedding: {str(e)}")
+                count_backend_error(provider.name, "embed", e)
+                return [[0.0] * provider.dimension for _ in texts]
+        
+        cache = get_embedding_cache()
+        embeddings = list(await asyncio.gather(*(cache.get(text, model) for text in texts)))
+        
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            results = await get_embedding_batcher(model).embed_many([texts[i] for i in missing])
+            for i, result in zip(missing, results):
+                if isinstance(result, BaseException):
+                    print(f"Error generating embedding: {str(result)}")
+                    count_backend_error(provider.name, "embed", result)
+                    # Return a zero vector as fallback
+                    result = [0.0] * provider.dimension
+                embeddings[i] = result
+        
+        return embeddings
+
+
+async def generate_embedding(text: str, model: Optional[str] = None) -> List[float]:
+    """
+    Generate embedding for text with the configured provider.
     
     Args:
         text: Text to embed
-        model: OpenAI embedding model to use
+        model: Embedding model to use (defaults to the provider's model)
     
     Returns:
         List of floats representing the embedding
     """
-    if not OPENAI_AVAILABLE:
-        # Return a mock embedding for testing
-        import random
-        random.seed(hash(text))
-        return [random.random() for _ in range(1536)]
-    
-    try:
-        response = openai.embeddings.create(
-            input=text,
-            model=model
-        )
-        return response.data[0].embedding
-    except Exception as e:
-        print(f"Error generating embedding: {str(e)}")
-        # Return a zero vector as fallback
-        return [0.0] * 1536
+    return (await generate_embeddings([text], model))[0]
 
 
 def generate_memory_id(text: str) -> str:
@@ -105,6 +252,23 @@ def extract_keywords(text: str, max_keywords: int = 5) -> List[str]:
     return [word for word, _ in sorted_keywords[:max_keywords]]
 
 
+def split_keywords(keywords: Any) -> List[str]:
+    """
+    Normalize stored keywords to a list.
+    
+    Older memories store keywords as one comma-joined string.
+    
+    Args:
+        keywords: Keyword list or comma-joined string
+    
+    Returns:
+        List of lowercase keywords
+    """
+    if isinstance(keywords, str):
+        keywords = keywords.split(",")
+    return [k.strip().lower() for k in keywords or [] if k and k.strip()]
+
+
 def categorize_memory(text: str) -> str:
     """
     Automatically categorize a memory based on its content.
@@ -174,7 +338,7 @@ def format_memory_for_display(
     output += f"📅 Created: {metadata.get('timestamp', 'Unknown')}\n"
     output += f"🏷️ Category: {metadata.get('category', 'general')}\n"
     
-    keywords = metadata.get('keywords', [])
+    keywords = split_keywords(metadata.get('keywords', []))
     if keywords:
         output += f"🔑 Keywords: {', '.join(keywords)}\n"
     
@@ -250,4 +414,73 @@ def extract_context_from_query(query: str) -> Dict[str, Any]:
     if quoted:
         context["filters"]["exact_phrases"] = quoted
     
-    return context
\ No newline at end of file
+    # Treat #hashtags as required keywords
+    hashtags = re.findall(r'(?<!\w)#([A-Za-z0-9]+)', query)
+    if hashtags:
+        context["filters"]["keywords"] = list(dict.fromkeys(tag.lower() for tag in hashtags))
+    
+    return context
+
+
+def time_period_to_range(time_period: str, now: Optional[datetime] = None) -> Optional[Tuple[float, float]]:
+    """
+    Convert a time period detected in a query into an epoch-seconds range.
+    
+    Periods are interpreted in local time; weeks start on Monday.
+    
+    Args:
+        time_period: One of "today", "yesterday", "this week", "last week", "this month"
+        now: Reference time (defaults to the current time)
+    
+    Returns:
+        (start, end) epoch seconds, start inclusive and end exclusive, or None
+        if the period is not recognized
+    """
+    now = now or datetime.now()
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    
+    if time_period == "today":
+        start, end = today, today + timedelta(days=1)
+    elif time_period == "yesterday":
+        start, end = today - timedelta(days=1), today
+    elif time_period == "this week":
+        start = today - timedelta(days=today.weekday())
+        end = start + timedelta(days=7)
+    elif time_period == "last week":
+        end = today - timedelta(days=today.weekday())
+        start = end - timedelta(days=7)
+    elif time_period == "this month":
+        start = today.replace(day=1)
+        end = (start + timedelta(days=32)).replace(day=1)
+    else:
+        return None
+    
+    return start.timestamp(), end.timestamp()
+
+
+def build_metadata_filter(filters: Dict[str, Any], now: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+    """
+    Turn filters from extract_context_from_query into a Pinecone metadata filter.
+    
+    Args:
+        filters: The "filters" dictionary of an extracted query context
+        now: Reference time for relative time periods
+    
+    Returns:
+        Metadata filter, or None if no filter applies
+    """
+    filter_dict: Dict[str, Any] = {}
+    
+    if filters.get("category"):
+        filter_dict["category"] = filters["category"]
+    
+    if filters.get("keywords"):
+        # Matches memories tagged with any of the keywords
+        filter_dict["keywords"] = {"$in": split_keywords(filters["keywords"])}
+    
+    if filters.get("time_period"):
+        time_range = time_period_to_range(filters["time_period"], now)
+        if time_range:
+            filter_dict["created_ts"] = {"$gte": time_range[0], "$lt": time_range[1]}
+    
+    return filter_dict or None
\ No newline at end of file
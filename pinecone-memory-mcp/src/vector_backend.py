@@ -0,0 +1,396 @@
+"""
+Vector database backends for the memory client.
+Pinecone is the default; the in-process local backend implements the same
+operations and filter semantics without network access, for offline
+development, benchmarks and load tests.
+"""
+
+import bisect
+import os
+import random
+import threading
+import time
+import logging
+from abc import ABC, abstractmethod
+from typing import List, Dict, Any, Optional, Tuple
+
+from vector_index import LocalVectorIndex, NUMPY_AVAILABLE, rank_vectors
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INDEX_NAME = "memory-index"
+# OpenAI text-embedding-3-small
+DEFAULT_DIMENSION = 1536
+
+
+class VectorBackend(ABC):
+    """
+    Interface for a vector database.
+    
+    Vectors are dictionaries with id, values and metadata. Methods are
+    synchronous and may block; PineconeMemoryClient runs them on its executor
+    under the resilience policies, and they raise on failure.
+    """
+    
+    @abstractmethod
+    def upsert(self, vectors: List[Dict[str, Any]], namespace: str):
+        """Insert or replace vectors."""
+    
+    @abstractmethod
+    def fetch(self, ids: List[str], namespace: str) -> Dict[str, Dict[str, Any]]:
+        """Get vectors by ID as {id: {"values", "metadata"}}; missing IDs are omitted."""
+    
+    @abstractmethod
+    def query(
+        self,
+        vector: List[float],
+        top_k: int,
+        namespace: str,
+        filter: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Find the most similar vectors.
+        
+        Args:
+            vector: Query embedding
+            top_k: Number of results
+            namespace: Namespace to search
+            filter: Optional Pinecone-style metadata filter
+        
+        Returns:
+            List of {"id", "metadata", "score"} dictionaries, best first
+        """
+    
+    @abstractmethod
+    def update_metadata(self, vector_id: str, fields: Dict[str, Any], namespace: str):
+        """Set metadata fields on a stored vector."""
+    
+    @abstractmethod
+    def delete(self, ids: List[str], namespace: str):
+        """Delete vectors by ID."""
+    
+    @abstractmethod
+    def list_ids(
+        self,
+        namespace: str,
+        limit: int,
+        pagination_token: Optional[str] = None
+    ) -> Tuple[List[str], Optional[str]]:
+        """
+        List one page of vector IDs.
+        
+        Returns:
+            (IDs, token for the next page or None on the last page)
+        """
+    
+    @abstractmethod
+    def describe_stats(self) -> Dict[str, Any]:
+        """Get {"dimension", "index_fullness", "namespaces": {name: vector_count}}."""
+    
+    def close(self):
+        """Release any resources held by the backend."""
+
+
+class PineconeVectorBackend(VectorBackend):
+    """Pinecone serverless index."""
+    
+    def __init__(self, api_key: str, index_name: str = DEFAULT_INDEX_NAME, dimension: int = DEFAULT_DIMENSION):
+        """
+        Connect to the index, creating it if it does not exist.
+        
+        Args:
+            api_key: Pinecone API key
+            index_name: Index name
+            dimension: Vector dimension used when creating the index
+        """
+        # Imported here so the local backend works without the SDK installed
+        from pinecone import Pinecone
+        
+        self.index_name = index_name
+        self.dimension = dimension
+        self.pc = Pinecone(api_key=api_key)
+        self._ensure_index_exists()
+        self.index = self.pc.Index(index_name)
+    
+    def _ensure_index_exists(self):
+        """Create Pinecone index if it doesn't exist."""
+        from pinecone import ServerlessSpec
+        
+        try:
+            existing_indexes = self.pc.list_indexes()
+            index_names = [idx.name for idx in existing_indexes]
+            
+            if self.index_name not in index_names:
+                logger.info(f"Creating new index: {self.index_name}")
+                self.pc.create_index(
+                    name=self.index_name,
+                    dimension=self.dimension,
+                    metric="cosine",
+                    spec=ServerlessSpec(
+                        cloud="aws",
+                        region="us-east-1"
+                    )
+                )
+                logger.info(f"Index {self.index_name} created successfully")
+            else:
+                logger.info(f"Index {self.index_name} already exists")
+        except Exception as e:
+            logger.error(f"Error ensuring index exists: {str(e)}")
+            raise
+    
+    def upsert(self, vectors: List[Dict[str, Any]], namespace: str):
+        self.index.upsert(vectors=vectors, namespace=namespace)
+    
+    def fetch(self, ids: List[str], namespace: str) -> Dict[str, Dict[str, Any]]:
+        response = self.index.fetch(ids=ids, namespace=namespace)
+        return {
+            vec_id: {"values": list(vec.values), "metadata": dict(vec.metadata or {})}
+            for vec_id, vec in response.vectors.items()
+        }
+    
+    def query(
+        self,
+        vector: List[float],
+        top_k: int,
+        namespace: str,
+        filter: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        response = self.index.query(
+            vector=vector,
+            top_k=top_k,
+            namespace=namespace,
+            include_metadata=True,
+            filter=filter
+        )
+        return [
+            {"id": match.id, "metadata": match.metadata, "score": match.score}
+            for match in response.matches
+        ]
+    
+    def update_metadata(self, vector_id: str, fields: Dict[str, Any], namespace: str):
+        self.index.update(id=vector_id, set_metadata=fields, namespace=namespace)
+    
+    def delete(self, ids: List[str], namespace: str):
+        self.index.delete(ids=ids, namespace=namespace)
+    
+    def list_ids(
+        self,
+        namespace: str,
+        limit: int,
+        pagination_token: Optional[str] = None
+    ) -> Tuple[List[str], Optional[str]]:
+        # list_paginated returns the continuation token in every SDK version
+        response = self.index.list_paginated(
+            namespace=namespace,
+            limit=limit,
+            pagination_token=pagination_token
+        )
+        ids = [item.id for item in response.vectors or []]
+        pagination = getattr(response, "pagination", None)
+        return ids, (pagination.next if pagination else None) or None
+    
+    def describe_stats(self) -> Dict[str, Any]:
+        stats = self.index.describe_index_stats()
+        return {
+            "dimension": stats.dimension,
+            "index_fullness": stats.index_fullness,
+            "namespaces": {
+                name: (summary.get("vector_count", 0) if isinstance(summary, dict) else summary.vector_count)
+                for name, summary in stats.namespaces.items()
+            }
+        }
+
+
+class _DictIndex:
+    """Pure-Python stand-in for LocalVectorIndex when NumPy is not installed."""
+    
+    def __init__(self):
+        self._vectors: Dict[str, Dict[str, Any]] = {}
+    
+    def __len__(self) -> int:
+        return len(self._vectors)
+    
+    def __contains__(self, vector_id: str) -> bool:
+        return vector_id in self._vectors
+    
+    def ids(self) -> List[str]:
+        return list(self._vectors)
+    
+    def upsert(self, vectors: List[Dict[str, Any]]):
+        for vector in vectors:
+            self._vectors[vector["id"]] = {
+                "values": list(vector["values"]),
+                "metadata": dict(vector.get("metadata") or {})
+            }
+    
+    def delete(self, ids: List[str]):
+        for vector_id in ids:
+            self._vectors.pop(vector_id, None)
+    
+    def update_metadata(self, vector_id: str, fields: Dict[str, Any]) -> bool:
+        vector = self._vectors.get(vector_id)
+        if vector is None:
+            return False
+        vector["metadata"].update(fields)
+        return True
+    
+    def fetch(self, ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        return {
+            vector_id: {"values": list(self._vectors[vector_id]["values"]), "metadata": dict(self._vectors[vector_id]["metadata"])}
+            for vector_id in ids
+            if vector_id in self._vectors
+        }
+    
+    def query(self, vector: List[float], top_k: int, filter_dict: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        return rank_vectors(vector, self._vectors, top_k, filter_dict)
+
+
+class LocalVectorBackend(VectorBackend):
+    """
+    In-process vector database with Pinecone's filter semantics.
+    
+    Data lives in memory only. With NumPy, fetched values come back
+    unit-normalized (cosine scores are unaffected).
+    """
+    
+    def __init__(
+        self,
+        dimension: int = DEFAULT_DIMENSION,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0
+    ):
+        """
+        Initialize an empty backend.
+        
+        Args:
+            dimension: Required vector dimension, as for a Pinecone index
+            latency_ms: Delay added to every call, to model network round trips
+            jitter_ms: Extra random delay of up to this much per call
+        """
+        self.dimension = dimension
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self._namespaces: Dict[str, Any] = {}
+        # namespace -> its IDs in sorted order, built by list_ids and dropped
+        # when the ID set changes, so paging through a namespace sorts it once
+        self._sorted_ids: Dict[str, List[str]] = {}
+        self._lock = threading.Lock()
+    
+    def _delay(self):
+        """Sleep for the injected latency; calls run on executor threads."""
+        delay_ms = self.latency_ms + (random.uniform(0, self.jitter_ms) if self.jitter_ms else 0.0)
+        if delay_ms > 0:
+            time.sleep(delay_ms / 1000)
+    
+    def _namespace(self, namespace: str) -> Any:
+        """Get a namespace's index, creating it on first write."""
+        with self._lock:
+            index = self._namespaces.get(namespace)
+            if index is None:
+                index = LocalVectorIndex(self.dimension) if NUMPY_AVAILABLE else _DictIndex()
+                self._namespaces[namespace] = index
+            return index
+    
+    def upsert(self, vectors: List[Dict[str, Any]], namespace: str):
+        self._delay()
+        for vector in vectors:
+            if len(vector["values"]) != self.dimension:
+                raise ValueError(
+                    f"Vector dimension {len(vector['values'])} does not match the index dimension {self.dimension}"
+                )
+        index = self._namespace(namespace)
+        # Overwriting existing vectors leaves the ID listing valid
+        adds_ids = any(vector["id"] not in index for vector in vectors)
+        index.upsert(vectors)
+        if adds_ids:
+            # Dropped after the write so a listing built meanwhile cannot miss it
+            with self._lock:
+                self._sorted_ids.pop(namespace, None)
+    
+    def fetch(self, ids: List[str], namespace: str) -> Dict[str, Dict[str, Any]]:
+        self._delay()
+        return self._namespace(namespace).fetch(ids)
+    
+    def query(
+        self,
+        vector: List[float],
+        top_k: int,
+        namespace: str,
+        filter: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        self._delay()
+        return self._namespace(namespace).query(vector, top_k, filter)
+    
+    def update_metadata(self, vector_id: str, fields: Dict[str, Any], namespace: str):
+        self._delay()
+        self._namespace(namespace).update_metadata(vector_id, fields)
+    
+    def delete(self, ids: List[str], namespace: str):
+        self._delay()
+        self._namespace(namespace).delete(ids)
+        with self._lock:
+            self._sorted_ids.pop(namespace, None)
+    
+    def list_ids(
+        self,
+        namespace: str,
+        limit: int,
+        pagination_token: Optional[str] = None
+    ) -> Tuple[List[str], Optional[str]]:
+        # Like Pinecone, IDs are listed in sorted order; the token is the last
+        # ID of the previous page
+        self._delay()
+        index = self._namespace(namespace)
+        with self._lock:
+            ids = self._sorted_ids.get(namespace)
+            if ids is None:
+                ids = self._sorted_ids[namespace] = sorted(index.ids())
+        start = bisect.bisect_right(ids, pagination_token) if pagination_token else 0
+        page = ids[start:start + limit]
+        next_token = page[-1] if page and start + limit < len(ids) else None
+        return page, next_token
+    
+    def describe_stats(self) -> Dict[str, Any]:
+        self._delay()
+        with self._lock:
+            namespaces = {name: len(index) for name, index in self._namespaces.items() if len(index)}
+        return {"dimension": self.dimension, "index_fullness": 0.0, "namespaces": namespaces}
+
+
+def create_vector_backend(
+    kind: Optional[str] = None,
+    index_name: Optional[str] = None,
+    dimension: int = DEFAULT_DIMENSION
+) -> VectorBackend:
+    """
+    Create a vector backend.
+    
+    Args:
+        kind: "pinecone" or "local"; defaults to VECTOR_BACKEND or "pinecone"
+        index_name: Pinecone index name; defaults to PINECONE_INDEX_NAME
+        dimension: Vector dimension, which must match the embedding provider
+    
+    Returns:
+        VectorBackend instance
+    
+    Raises:
+        ValueError: If the kind is unknown or Pinecone has no API key
+    """
+    kind = (kind or os.getenv("VECTOR_BACKEND", "pinecone")).lower()
+    
+    if kind == "pinecone":
+        api_key = os.getenv("PINECONE_API_KEY")
+        if not api_key:
+            raise ValueError("PINECONE_API_KEY environment variable is required")
+        return PineconeVectorBackend(
+            api_key,
+            index_name or os.getenv("PINECONE_INDEX_NAME", DEFAULT_INDEX_NAME),
+            dimension
+        )
+    if kind == "local":
+        return LocalVectorBackend(
+            dimension=dimension,
+            latency_ms=float(os.getenv("LOCAL_BACKEND_LATENCY_MS", "0")),
+            jitter_ms=float(os.getenv("LOCAL_BACKEND_JITTER_MS", "0"))
+        )
+    raise ValueError(f"Unknown vector backend: {kind}")
\ No newline at end of file
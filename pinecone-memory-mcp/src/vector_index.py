@@ -0,0 +1,480 @@
+"""
+Local in-memory vector index mirroring the Pinecone namespace.
+Scores queries with a single float32 matrix-vector product and applies
+Pinecone-compatible metadata filters, so recall can be answered without a
+network round trip.
+"""
+
+import hashlib
+import io
+import json
+import math
+import operator
+import os
+import threading
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Iterable
+
+# Try to import NumPy (optional; the mirror is disabled without it)
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+DEFAULT_SNAPSHOT_PATH = "vector_mirror.npz"
+
+
+def ids_digest(ids: Iterable[str]) -> str:
+    """
+    Digest a set of vector IDs independently of their order.
+    
+    Args:
+        ids: Vector IDs, in any order (e.g. streamed page by page)
+    
+    Returns:
+        Hex digest that changes when any ID is added or removed; the digests
+        of disjoint ID sets add up (mod 2**64) to the digest of their union
+    """
+    total = 0
+    for vector_id in ids:
+        digest = hashlib.blake2b(vector_id.encode("utf-8"), digest_size=8).digest()
+        total = (total + int.from_bytes(digest, "big")) % (1 << 64)
+    return f"{total:016x}"
+
+
+def _compare(value: Any, op: str, operand: Any) -> bool:
+    """Apply one comparison operator to a scalar metadata value."""
+    if op == "$eq":
+        return value == operand
+    if op == "$ne":
+        return value != operand
+    if op == "$in":
+        return value in operand
+    if op == "$nin":
+        return value not in operand
+    try:
+        if op == "$gt":
+            return value > operand
+        if op == "$gte":
+            return value >= operand
+        if op == "$lt":
+            return value < operand
+        if op == "$lte":
+            return value <= operand
+    except TypeError:
+        return False
+    raise ValueError(f"Unsupported filter operator: {op}")
+
+
+def _match_field(metadata: Dict[str, Any], field: str, condition: Any) -> bool:
+    """Check one field condition, e.g. {"$gte": 3} or a bare value for $eq."""
+    if not isinstance(condition, dict):
+        condition = {"$eq": condition}
+    
+    present = field in metadata
+    value = metadata.get(field)
+    
+    for op, operand in condition.items():
+        if op == "$exists":
+            if present != bool(operand):
+                return False
+            continue
+        if not present:
+            # Missing fields only satisfy negative operators
+            if op in ("$ne", "$nin"):
+                continue
+            return False
+        if isinstance(value, list):
+            # List fields match positive operators if any element does,
+            # and negative operators only if no element violates them
+            if op in ("$ne", "$nin"):
+                if not all(_compare(v, op, operand) for v in value):
+                    return False
+            elif not any(_compare(v, op, operand) for v in value):
+                return False
+        elif not _compare(value, op, operand):
+            return False
+    return True
+
+
+def matches_filter(metadata: Optional[Dict[str, Any]], filter_dict: Optional[Dict[str, Any]]) -> bool:
+    """
+    Evaluate a Pinecone metadata filter against a record's metadata.
+    
+    Supports $eq, $ne, $gt, $gte, $lt, $lte, $in, $nin, $exists, $and and $or,
+    with bare values meaning $eq and several top-level fields meaning AND.
+    
+    Args:
+        metadata: Record metadata
+        filter_dict: Pinecone filter expression
+    
+    Returns:
+        True if the record matches
+    """
+    if not filter_dict:
+        return True
+    metadata = metadata or {}
+    
+    for key, condition in filter_dict.items():
+        if key == "$and":
+            if not all(matches_filter(metadata, sub) for sub in condition):
+                return False
+        elif key == "$or":
+            if not any(matches_filter(metadata, sub) for sub in condition):
+                return False
+        elif not _match_field(metadata, key, condition):
+            return False
+    return True
+
+
+def rank_vectors(
+    query: List[float],
+    candidates: Dict[str, Dict[str, Any]],
+    top_k: int = 5,
+    filter_dict: Optional[Dict[str, Any]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Score a small set of fetched vectors against a query by cosine similarity.
+    
+    Works without NumPy, for rescoring candidates fetched from Pinecone.
+    
+    Args:
+        query: Query embedding
+        candidates: Mapping of ID to {"values", "metadata"}
+        top_k: Number of results to return
+        filter_dict: Optional Pinecone-style metadata filter
+    
+    Returns:
+        List of {"id", "metadata", "score"} dictionaries, best first
+    """
+    query_norm = math.sqrt(sum(x * x for x in query)) or 1.0
+    scored = []
+    for vector_id, vector in candidates.items():
+        metadata = vector.get("metadata") or {}
+        if not matches_filter(metadata, filter_dict):
+            continue
+        values = vector["values"]
+        if NUMPY_AVAILABLE:
+            dot = float(np.dot(np.asarray(values, dtype=np.float32), np.asarray(query, dtype=np.float32)))
+            norm = float(np.linalg.norm(np.asarray(values, dtype=np.float32))) or 1.0
+        else:
+            dot = sum(map(operator.mul, values, query))
+            norm = math.sqrt(sum(x * x for x in values)) or 1.0
+        scored.append({"id": vector_id, "metadata": dict(metadata), "score": dot / (norm * query_norm)})
+    
+    scored.sort(key=lambda match: match["score"], reverse=True)
+    return scored[:top_k]
+
+
+class LocalVectorIndex:
+    """Dense float32 vector matrix with cosine scoring and metadata filtering."""
+    
+    def __init__(self, dimension: Optional[int] = None):
+        """
+        Initialize an empty index.
+        
+        Args:
+            dimension: Vector dimension; inferred from the first upsert if None
+        """
+        if not NUMPY_AVAILABLE:
+            raise ImportError("numpy is required for the local vector index")
+        
+        self.dimension = dimension
+        # Watermark stored in the snapshot this index was loaded from, if any
+        self.watermark: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+        self._ids: List[str] = []
+        self._positions: Dict[str, int] = {}
+        self._metadata: List[Dict[str, Any]] = []
+        # Rows are unit-normalized so a dot product is the cosine similarity
+        self._matrix = np.zeros((0, dimension or 0), dtype=np.float32)
+    
+    def __len__(self) -> int:
+        return len(self._ids)
+    
+    def __contains__(self, vector_id: str) -> bool:
+        return vector_id in self._positions
+    
+    def ids(self) -> List[str]:
+        """Get the IDs of all stored vectors."""
+        with self._lock:
+            return list(self._ids)
+    
+    def _ensure_capacity(self, rows: int):
+        """Grow the matrix geometrically so appends stay amortized O(1)."""
+        if rows <= self._matrix.shape[0]:
+            return
+        capacity = max(rows, 2 * self._matrix.shape[0], 1024)
+        grown = np.zeros((capacity, self.dimension), dtype=np.float32)
+        grown[:len(self._ids)] = self._matrix[:len(self._ids)]
+        self._matrix = grown
+    
+    @staticmethod
+    def _normalize(values: Any) -> "np.ndarray":
+        """Convert to a unit-length float32 vector."""
+        vector = np.asarray(values, dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm > 0 else vector
+    
+    def upsert(self, vectors: Iterable[Dict[str, Any]]):
+        """
+        Insert or replace vectors.
+        
+        Args:
+            vectors: Vector dictionaries with id, values and metadata
+        """
+        with self._lock:
+            for vector in vectors:
+                values = vector["values"]
+                if self.dimension is None:
+                    self.dimension = len(values)
+                    self._matrix = np.zeros((0, self.dimension), dtype=np.float32)
+                if len(values) != self.dimension:
+                    raise ValueError(
+                        f"Vector dimension {len(values)} does not match index dimension {self.dimension}"
+                    )
+                
+                vector_id = vector["id"]
+                position = self._positions.get(vector_id)
+                if position is None:
+                    position = len(self._ids)
+                    self._ensure_capacity(position + 1)
+                    self._ids.append(vector_id)
+                    self._metadata.append({})
+                    self._positions[vector_id] = position
+                
+                self._matrix[position] = self._normalize(values)
+                self._metadata[position] = dict(vector.get("metadata") or {})
+    
+    def delete(self, vector_ids: Iterable[str]):
+        """
+        Remove vectors by ID.
+        
+        Args:
+            vector_ids: IDs to remove; unknown IDs are ignored
+        """
+        with self._lock:
+            for vector_id in vector_ids:
+                position = self._positions.pop(vector_id, None)
+                if position is None:
+                    continue
+                # Move the last row into the hole to keep the matrix dense
+                last = len(self._ids) - 1
+                if position != last:
+                    moved_id = self._ids[last]
+                    self._matrix[position] = self._matrix[last]
+                    self._ids[position] = moved_id
+                    self._metadata[position] = self._metadata[last]
+                    self._positions[moved_id] = position
+                self._ids.pop()
+                self._metadata.pop()
+    
+    def update_metadata(self, vector_id: str, fields: Dict[str, Any]) -> bool:
+        """
+        Merge fields into a stored vector's metadata.
+        
+        Args:
+            vector_id: ID of the vector
+            fields: Metadata fields to set
+        
+        Returns:
+            True if the vector exists
+        """
+        with self._lock:
+            position = self._positions.get(vector_id)
+            if position is None:
+                return False
+            self._metadata[position] = {**self._metadata[position], **fields}
+            return True
+    
+    def fetch(self, vector_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Get stored vectors by ID.
+        
+        Args:
+            vector_ids: IDs to fetch
+        
+        Returns:
+            Mapping of ID to {"values", "metadata"}; values are unit-normalized
+        """
+        with self._lock:
+            result = {}
+            for vector_id in vector_ids:
+                position = self._positions.get(vector_id)
+                if position is not None:
+                    result[vector_id] = {
+                        "values": self._matrix[position].tolist(),
+                        "metadata": dict(self._metadata[position])
+                    }
+            return result
+    
+    def query(
+        self,
+        vector: List[float],
+        top_k: int = 5,
+        filter_dict: Optional[Dict[str, Any]] = None,
+        ids: Optional[Iterable[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Find the most similar vectors.
+        
+        Args:
+            vector: Query embedding
+            top_k: Number of results to return
+            filter_dict: Optional Pinecone-style metadata filter
+            ids: Optional set of IDs to restrict the search to
+        
+        Returns:
+            List of {"id", "metadata", "score"} dictionaries, best first
+        """
+        with self._lock:
+            count = len(self._ids)
+            if count == 0 or top_k <= 0:
+                return []
+            
+            query = self._normalize(vector)
+            if ids is not None:
+                rows = np.array(
+                    [self._positions[i] for i in ids if i in self._positions],
+                    dtype=np.int64
+                )
+                if rows.size == 0:
+                    return []
+                scores = self._matrix[rows] @ query
+            else:
+                rows = None
+                scores = self._matrix[:count] @ query
+            
+            # Rank a widening window of best candidates until enough pass the filter
+            matches = []
+            window = top_k if not filter_dict else top_k * 4
+            checked = 0
+            while True:
+                window = min(window, scores.size)
+                if window < scores.size:
+                    top = np.argpartition(-scores, window - 1)[:window]
+                    top = top[np.argsort(-scores[top], kind="stable")]
+                else:
+                    top = np.argsort(-scores, kind="stable")
+                
+                for candidate in top[checked:]:
+                    position = int(rows[candidate]) if rows is not None else int(candidate)
+                    metadata = self._metadata[position]
+                    if matches_filter(metadata, filter_dict):
+                        matches.append({
+                            "id": self._ids[position],
+                            "metadata": dict(metadata),
+                            "score": float(scores[candidate])
+                        })
+                        if len(matches) == top_k:
+                            return matches
+                checked = window
+                if window >= scores.size:
+                    return matches
+                window *= 4
+    
+    def compute_watermark(self) -> Dict[str, Any]:
+        """
+        Summarize the stored vectors so a snapshot can be checked against Pinecone.
+        
+        Returns:
+            Dictionary with count, ids_digest and newest_ts (the largest
+            created_ts in the metadata, or None)
+        """
+        with self._lock:
+            return self._watermark()
+    
+    def _watermark(self) -> Dict[str, Any]:
+        """Build the watermark. Caller holds the lock."""
+        timestamps = [
+            m["created_ts"] for m in self._metadata
+            if isinstance(m.get("created_ts"), (int, float))
+        ]
+        return {
+            "count": len(self._ids),
+            "ids_digest": ids_digest(self._ids),
+            "newest_ts": max(timestamps) if timestamps else None
+        }
+    
+    def differing_ids(self, vectors: Dict[str, Dict[str, Any]], ids: Iterable[str]) -> List[str]:
+        """
+        Compare stored vectors with copies fetched from Pinecone.
+        
+        Args:
+            vectors: Fetched vectors, as returned by fetch
+            ids: IDs to compare; those missing from vectors count as differing
+        
+        Returns:
+            IDs whose direction or metadata differ, or that exist on one side only
+        """
+        differing = []
+        with self._lock:
+            for vector_id in ids:
+                position = self._positions.get(vector_id)
+                remote = vectors.get(vector_id)
+                if position is None or remote is None:
+                    differing.append(vector_id)
+                    continue
+                values = self._normalize(remote["values"])
+                if (
+                    values.shape != self._matrix[position].shape
+                    or not np.allclose(values, self._matrix[position], atol=1e-5)
+                    or dict(remote.get("metadata") or {}) != self._metadata[position]
+                ):
+                    differing.append(vector_id)
+        return differing
+    
+    def save(self, path: str = DEFAULT_SNAPSHOT_PATH):
+        """
+        Write a snapshot for warm starts, replacing the file atomically.
+        
+        Args:
+            path: Snapshot file path
+        """
+        with self._lock:
+            count = len(self._ids)
+            watermark = self._watermark()
+            buffer = io.BytesIO()
+            np.savez(
+                buffer,
+                vectors=self._matrix[:count],
+                ids=np.array(json.dumps(self._ids)),
+                metadata=np.array(json.dumps(self._metadata)),
+                watermark=np.array(json.dumps(watermark))
+            )
+        
+        target = Path(path)
+        tmp_path = target.with_name(target.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(buffer.getvalue())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, target)
+    
+    @classmethod
+    def load(cls, path: str = DEFAULT_SNAPSHOT_PATH) -> "LocalVectorIndex":
+        """
+        Load a snapshot written by save().
+        
+        Args:
+            path: Snapshot file path
+        
+        Returns:
+            LocalVectorIndex instance, with the stored watermark (or None)
+        """
+        with np.load(path, allow_pickle=False) as data:
+            matrix = data["vectors"].astype(np.float32, copy=False)
+            ids = json.loads(str(data["ids"]))
+            metadata = json.loads(str(data["metadata"]))
+            # Snapshots written before watermarks were stored have none
+            watermark = json.loads(str(data["watermark"])) if "watermark" in data.files else None
+        
+        index = cls(dimension=matrix.shape[1] if matrix.ndim == 2 and matrix.shape[0] else None)
+        index.watermark = watermark
+        if ids:
+            index._matrix = np.array(matrix)
+            index._ids = ids
+            index._metadata = metadata
+            index._positions = {vector_id: i for i, vector_id in enumerate(ids)}
+        return index
\ No newline at end of file
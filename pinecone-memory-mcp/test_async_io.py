@@ -0,0 +1,53 @@
+"""Tests for the per-backend executors and concurrency limits."""
+
+import asyncio
+import threading
+
+from async_io import BackendIO
+
+
+def test_calls_run_in_the_backend_executor():
+    backend = BackendIO("test", 2)
+    try:
+        name = asyncio.run(backend.run(lambda: threading.current_thread().name))
+    finally:
+        backend.shutdown()
+    assert name.startswith("test-io")
+    assert backend.get_stats()["in_flight"] == 0
+
+
+def test_cancelled_call_holds_its_slot_until_the_thread_finishes():
+    backend = BackendIO("test", 1)
+    unblock = threading.Event()
+    started = []
+    
+    def blocking(label):
+        started.append(label)
+        unblock.wait(5)
+        return label
+    
+    async def scenario():
+        first = asyncio.ensure_future(backend.run(blocking, "first"))
+        while not started:
+            await asyncio.sleep(0.001)
+        first.cancel()
+        await asyncio.sleep(0)
+        
+        second = asyncio.ensure_future(backend.run(blocking, "second"))
+        await asyncio.sleep(0.05)
+        # The first thread is still running, so the second call must wait
+        assert started == ["first"]
+        assert backend.get_stats()["in_flight"] == 1
+        assert backend.get_stats()["waiting"] == 1
+        
+        unblock.set()
+        assert await second == "second"
+        assert first.cancelled()
+    
+    try:
+        asyncio.run(scenario())
+    finally:
+        unblock.set()
+        backend.shutdown()
+    assert started == ["first", "second"]
+    assert backend.get_stats()["in_flight"] == 0
\ No newline at end of file
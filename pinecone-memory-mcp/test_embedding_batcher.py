@@ -0,0 +1,83 @@
+"""Tests for embedding micro-batching."""
+
+import asyncio
+
+import pytest
+
+from resilience import CircuitOpenError
+from embedding_batcher import EmbeddingBatcher
+
+
+class Rejected(Exception):
+    """Non-retryable error, like a 400 for an input over the token limit."""
+    status = 400
+
+
+class Unavailable(Exception):
+    """Retryable error, like a 503."""
+    status = 503
+
+
+class FakeEmbedder:
+    """Records embedding requests; raises the given error for requests containing a bad text."""
+    
+    def __init__(self, bad_texts=(), error=None):
+        self.bad_texts = set(bad_texts)
+        self.error = error
+        self.requests = []
+    
+    async def embed(self, texts):
+        self.requests.append(list(texts))
+        if self.error is not None and (not self.bad_texts or self.bad_texts & set(texts)):
+            raise self.error
+        return [[float(len(text))] for text in texts]
+
+
+def embed_all(batcher: EmbeddingBatcher, texts):
+    return asyncio.run(batcher.embed_many(texts))
+
+
+def test_concurrent_texts_share_one_request():
+    embedder = FakeEmbedder()
+    batcher = EmbeddingBatcher(embedder.embed, max_delay_ms=5)
+    assert embed_all(batcher, ["a", "bb", "ccc"]) == [[1.0], [2.0], [3.0]]
+    assert embedder.requests == [["a", "bb", "ccc"]]
+
+
+def test_identical_texts_are_embedded_once():
+    embedder = FakeEmbedder()
+    batcher = EmbeddingBatcher(embedder.embed, max_delay_ms=5)
+    assert embed_all(batcher, ["a", "a", "bb"]) == [[1.0], [1.0], [2.0]]
+    assert embedder.requests == [["a", "bb"]]
+    assert batcher.get_stats()["texts_deduplicated"] == 1
+
+
+def test_batches_are_capped_by_count_and_characters():
+    embedder = FakeEmbedder()
+    batcher = EmbeddingBatcher(embedder.embed, max_batch_size=2, max_delay_ms=5)
+    embed_all(batcher, ["a", "b", "c"])
+    assert embedder.requests == [["a", "b"], ["c"]]
+    
+    embedder = FakeEmbedder()
+    batcher = EmbeddingBatcher(embedder.embed, max_delay_ms=5, max_batch_chars=4)
+    embed_all(batcher, ["aa", "bb", "cc"])
+    assert embedder.requests == [["aa", "bb"], ["cc"]]
+
+
+def test_rejected_text_fails_alone():
+    embedder = FakeEmbedder(bad_texts={"bad"}, error=Rejected("too long"))
+    batcher = EmbeddingBatcher(embedder.embed, max_delay_ms=5)
+    results = embed_all(batcher, ["a", "bb", "bad", "dddd"])
+    assert results[0] == [1.0] and results[1] == [2.0] and results[3] == [4.0]
+    assert isinstance(results[2], Rejected)
+    assert ["bad"] in embedder.requests
+
+
+@pytest.mark.parametrize("error", [Unavailable("down"), CircuitOpenError("open"), asyncio.TimeoutError()])
+def test_transient_errors_fail_the_batch_without_bisecting(error):
+    embedder = FakeEmbedder(error=error)
+    batcher = EmbeddingBatcher(embedder.embed, max_delay_ms=5)
+    results = embed_all(batcher, ["a", "bb", "ccc"])
+    assert all(isinstance(result, type(error)) for result in results)
+    assert embedder.requests == [["a", "bb", "ccc"]]
+    assert batcher.get_stats()["batch_retries"] == 0
\ No newline at end of file
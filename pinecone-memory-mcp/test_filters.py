@@ -0,0 +1,114 @@
+"""Tests for turning recall queries into metadata filters."""
+
+from datetime import datetime
+
+import pytest
+
+from ingest import prepare_memory
+from manage import _keyword_fields
+from utils import (
+    build_metadata_filter,
+    extract_context_from_query,
+    format_memory_for_display,
+    split_keywords,
+    time_period_to_range
+)
+from vector_index import matches_filter
+
+# A Wednesday afternoon
+NOW = datetime(2024, 5, 15, 14, 30)
+
+
+def ts(*args) -> float:
+    return datetime(*args).timestamp()
+
+
+@pytest.mark.parametrize("period, start, end", [
+    ("today", (2024, 5, 15), (2024, 5, 16)),
+    ("yesterday", (2024, 5, 14), (2024, 5, 15)),
+    # Weeks start on Monday
+    ("this week", (2024, 5, 13), (2024, 5, 20)),
+    ("last week", (2024, 5, 6), (2024, 5, 13)),
+    ("this month", (2024, 5, 1), (2024, 6, 1)),
+])
+def test_time_periods_become_half_open_ranges(period, start, end):
+    assert time_period_to_range(period, NOW) == (ts(*start), ts(*end))
+
+
+def test_month_range_crosses_the_year():
+    assert time_period_to_range("this month", datetime(2024, 12, 31, 23, 0)) == (ts(2024, 12, 1), ts(2025, 1, 1))
+
+
+def test_unknown_period_has_no_range():
+    assert time_period_to_range("next decade", NOW) is None
+    assert build_metadata_filter({"time_period": "next decade"}, NOW) is None
+
+
+def test_detected_period_is_pushed_down_on_created_ts():
+    filters = extract_context_from_query("what did I note yesterday")["filters"]
+    assert filters == {"time_period": "yesterday"}
+    assert build_metadata_filter(filters, NOW) == {"created_ts": {"$gte": ts(2024, 5, 14), "$lt": ts(2024, 5, 15)}}
+
+
+def test_created_ts_filter_selects_the_period():
+    filter_dict = build_metadata_filter({"time_period": "yesterday"}, NOW)
+    assert matches_filter({"created_ts": ts(2024, 5, 14, 0, 0)}, filter_dict)
+    assert matches_filter({"created_ts": ts(2024, 5, 14, 23, 59)}, filter_dict)
+    # End is exclusive
+    assert not matches_filter({"created_ts": ts(2024, 5, 15)}, filter_dict)
+    # Memories stored before created_ts was recorded are not matched
+    assert not matches_filter({"timestamp": "2024-05-14T12:00:00"}, filter_dict)
+
+
+def test_no_filters_means_no_filter():
+    assert build_metadata_filter({}, NOW) is None
+    assert build_metadata_filter(extract_context_from_query("python tips")["filters"], NOW) is None
+
+
+def test_memories_carry_a_numeric_timestamp():
+    metadata = prepare_memory("Deployed the API", timestamp="2024-05-14T09:15:00")["metadata"]
+    assert metadata["timestamp"] == "2024-05-14T09:15:00"
+    assert metadata["created_ts"] == ts(2024, 5, 14, 9, 15)
+
+
+def test_hashtags_become_an_in_filter_on_keywords():
+    filters = extract_context_from_query("notes on #Python or #deploy from last week at work")["filters"]
+    assert filters["keywords"] == ["python", "deploy"]
+    filter_dict = build_metadata_filter(filters, NOW)
+    assert filter_dict["keywords"] == {"$in": ["python", "deploy"]}
+    assert filter_dict["category"] == "work"
+    assert filter_dict["created_ts"] == {"$gte": ts(2024, 5, 6), "$lt": ts(2024, 5, 13)}
+    
+    memory = {"keywords": ["deploy", "docker"], "category": "work", "created_ts": ts(2024, 5, 8)}
+    assert matches_filter(memory, filter_dict)
+    assert not matches_filter({**memory, "keywords": ["docker"]}, filter_dict)
+    # Comma-joined strings from before the migration cannot match $in
+    assert not matches_filter({**memory, "keywords": "deploy, docker"}, filter_dict)
+
+
+def test_keywords_are_stored_as_a_list():
+    metadata = prepare_memory("Deploy the python service with docker")["metadata"]
+    assert isinstance(metadata["keywords"], list)
+    assert metadata["keywords"] and all(k == k.lower() for k in metadata["keywords"])
+
+
+@pytest.mark.parametrize("stored, expected", [
+    ("Python, deploy,, docker ", ["python", "deploy", "docker"]),
+    (["Python", " deploy "], ["python", "deploy"]),
+    ("", []),
+    (None, []),
+])
+def test_split_keywords(stored, expected):
+    assert split_keywords(stored) == expected
+
+
+def test_keyword_backfill_converts_only_joined_strings():
+    assert _keyword_fields({"keywords": "python,deploy"}) == {"keywords": ["python", "deploy"]}
+    assert _keyword_fields({"keywords": ["python"]}) is None
+    assert _keyword_fields({}) is None
+
+
+def test_display_joins_keywords_not_characters():
+    for stored in ("python,deploy", ["python", "deploy"]):
+        output = format_memory_for_display("id", "text", {"keywords": stored})
+        assert "python, deploy" in output
\ No newline at end of file
@@ -0,0 +1,103 @@
+"""Tests for the bulk ingest pipeline."""
+
+import asyncio
+
+import pytest
+
+import ingest
+from ingest import ingest_memories
+from outbox import WriteOutbox
+
+
+class FakeClient:
+    """Upserts succeed unless down is set."""
+    
+    def __init__(self, down=False):
+        self.down = down
+        self.vectors = {}
+    
+    async def upsert_memories(self, vectors):
+        if self.down:
+            return [False] * len(vectors)
+        self.vectors.update((vector["id"], vector) for vector in vectors)
+        return [True] * len(vectors)
+
+
+class FakeStore:
+    """Keeps records in a dictionary; existing IDs are not added again."""
+    
+    def __init__(self):
+        self.records = {}
+    
+    @staticmethod
+    def build_record(text, category, keywords, context, timestamp, created_ts):
+        return {"text": text, "created_at": timestamp}
+    
+    async def add_memories(self, records):
+        added = []
+        for memory_id, record in records:
+            added.append(memory_id not in self.records)
+            self.records.setdefault(memory_id, record)
+        return added
+
+
+@pytest.fixture(autouse=True)
+def embed(monkeypatch):
+    """Embed every text except those containing "unembeddable"."""
+    async def fake_generate_embeddings(texts, model=None):
+        return [[0.0, 0.0] if "unembeddable" in text else [1.0, 0.5] for text in texts]
+    
+    monkeypatch.setattr(ingest, "generate_embeddings", fake_generate_embeddings)
+    monkeypatch.setattr(ingest, "embedding_metadata", lambda: {"embedding_model": "test"})
+
+
+def test_memories_are_embedded_upserted_and_stored():
+    client, store = FakeClient(), FakeStore()
+    totals = asyncio.run(ingest_memories(["first memory", {"memory": "second", "context": "ctx"}], client, store))
+    assert totals["stored"] == 2
+    assert len(client.vectors) == 2
+    assert set(store.records) == set(client.vectors)
+
+
+def test_unindexed_memories_fail_without_an_outbox():
+    client, store = FakeClient(), FakeStore()
+    totals = asyncio.run(ingest_memories(["fine", "unembeddable text"], client, store))
+    assert totals["stored"] == 1
+    assert totals["failed"] == 1
+    assert len(store.records) == 1
+
+
+def test_unindexed_memories_are_spooled_to_the_outbox():
+    client, store = FakeClient(down=True), FakeStore()
+    
+    async def scenario():
+        box = WriteOutbox(None)
+        totals = await ingest_memories(["one", "two", "unembeddable three"], client, store, outbox=box)
+        pending = await box.pending()
+        box.close()
+        return totals, pending
+    
+    totals, pending = asyncio.run(scenario())
+    assert totals["spooled"] == 3
+    assert totals["failed"] == 0
+    # Kept locally and queued for the outbox worker with everything it needs
+    assert {entry["id"] for entry in pending} == set(store.records)
+    assert all(entry["payload"]["full_text"] and entry["payload"]["metadata"] for entry in pending)
+
+
+def test_malformed_memories_are_invalid_without_failing_the_chunk():
+    client, store = FakeClient(), FakeStore()
+    items = [
+        "good memory",
+        {"memory": "numeric timestamp", "timestamp": 1700000000},
+        {"memory": "unparseable timestamp", "timestamp": "yesterday"},
+        {"memory": "list context", "context": ["a", "b"]},
+        {"memory": "dated memory", "timestamp": "2024-05-01T12:00:00"},
+        None,
+        {"context": "no text"}
+    ]
+    totals = asyncio.run(ingest_memories(items, client, store))
+    assert totals["invalid"] == 5
+    assert totals["stored"] == 2
+    assert totals["failed"] == 0
+    assert sorted(record["created_at"] for record in store.records.values())[0] == "2024-05-01T12:00:00"
\ No newline at end of file
@@ -0,0 +1,220 @@
+"""Tests for the memory store: group-commit writes and paged listings."""
+
+import asyncio
+
+import pytest
+
+from memory_store import MemoryStore, GroupCommitWriter, encode_cursor, decode_cursor
+from storage_backends import JSONStorageBackend, create_storage_backend
+
+
+class FlakyBackend:
+    """Wraps a backend, failing the next apply calls and counting every call."""
+    
+    def __init__(self, backend, failures=0):
+        self.backend = backend
+        self.failures = failures
+        self.calls = []
+    
+    def apply(self, operations):
+        self.calls.append(len(operations))
+        if self.failures:
+            self.failures -= 1
+            raise OSError("disk full")
+        return self.backend.apply(operations)
+
+
+def record(text: str) -> dict:
+    return MemoryStore.build_record(text, timestamp="2024-01-01T00:00:00")
+
+
+@pytest.mark.parametrize("kind", ["json", "sqlite"])
+def test_concurrent_adds_are_grouped_and_all_durable(tmp_path, kind):
+    path = str(tmp_path / ("store.json" if kind == "json" else "store.db"))
+    
+    async def scenario():
+        store = MemoryStore(path, kind)
+        results = await asyncio.gather(*(
+            store.add_memory_id(f"id-{n}", f"memory {n}") for n in range(50)
+        ))
+        stats = store.writer.get_stats()
+        await store.aclose()
+        return results, stats
+    
+    results, stats = asyncio.run(scenario())
+    assert all(results)
+    assert stats["operations"] == 50
+    assert stats["commits"] < 50
+    
+    reopened = create_storage_backend(kind, path)
+    try:
+        assert sorted(reopened.get_memory_ids()) == sorted(f"id-{n}" for n in range(50))
+    finally:
+        reopened.close()
+
+
+def test_each_caller_gets_its_own_results(tmp_path):
+    backend = JSONStorageBackend(str(tmp_path / "store.json"))
+    writer = GroupCommitWriter(backend)
+    
+    async def scenario():
+        results = await asyncio.gather(
+            writer.submit([("add", "a", record("alpha"))]),
+            writer.submit([("add", "a", record("again")), ("add", "b", record("beta"))]),
+            writer.submit([("remove", "missing", None)])
+        )
+        await writer.aclose()
+        return results
+    
+    assert asyncio.run(scenario()) == [[True], [False, True], [False]]
+
+
+def test_failed_commit_fails_its_group_and_the_writer_recovers(tmp_path):
+    backend = FlakyBackend(JSONStorageBackend(str(tmp_path / "store.json")), failures=1)
+    writer = GroupCommitWriter(backend)
+    
+    async def scenario():
+        failed = await asyncio.gather(
+            writer.submit([("add", "a", record("alpha"))]),
+            writer.submit([("add", "b", record("beta"))]),
+            return_exceptions=True
+        )
+        retried = await writer.submit([("add", "a", record("alpha"))])
+        await writer.aclose()
+        return failed, retried
+    
+    failed, retried = asyncio.run(scenario())
+    assert all(isinstance(result, OSError) for result in failed)
+    assert retried == [True]
+    assert backend.backend.get_memory_ids() == ["a"]
+
+
+def test_failed_commit_reports_failure_to_the_store_caller(tmp_path):
+    store = MemoryStore(str(tmp_path / "store.json"))
+    store.writer.backend = FlakyBackend(store.backend, failures=1)
+    
+    async def scenario():
+        added = await store.add_memory_id("a", "alpha")
+        added_again = await store.add_memory_id("a", "alpha")
+        await store.aclose()
+        return added, added_again
+    
+    assert asyncio.run(scenario()) == (False, True)
+
+
+def test_cancelled_caller_does_not_abort_the_commit(tmp_path):
+    backend = JSONStorageBackend(str(tmp_path / "store.json"))
+    writer = GroupCommitWriter(backend)
+    
+    async def scenario():
+        task = asyncio.ensure_future(writer.submit([("add", "a", record("alpha"))]))
+        await asyncio.sleep(0)
+        task.cancel()
+        await writer.aclose()
+        return task
+    
+    assert asyncio.run(scenario()).cancelled()
+    assert JSONStorageBackend(str(tmp_path / "store.json")).get_memory_ids() == ["a"]
+
+
+def test_close_commits_queued_writes(tmp_path):
+    backend = FlakyBackend(JSONStorageBackend(str(tmp_path / "store.json")))
+    writer = GroupCommitWriter(backend, max_group_size=2)
+    
+    async def scenario():
+        pending = [asyncio.ensure_future(writer.submit([("add", f"id-{n}", record(str(n)))])) for n in range(5)]
+        await asyncio.sleep(0)
+        await writer.aclose()
+        return await asyncio.gather(*pending)
+    
+    assert asyncio.run(scenario()) == [[True]] * 5
+    # Groups respect max_group_size
+    assert max(backend.calls) <= 2
+    assert len(backend.backend.get_memory_ids()) == 5
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def listing_store(request, tmp_path):
+    """Store with memories m00..m11 created a minute apart, alternating work/personal."""
+    path = str(tmp_path / ("store.json" if request.param == "json" else "store.db"))
+    store = MemoryStore(path, request.param)
+    asyncio.run(store.add_memories([
+        (
+            f"m{n:02d}",
+            MemoryStore.build_record(
+                f"memory {n}",
+                "work" if n % 2 == 0 else "personal",
+                timestamp=f"2024-01-01T00:{n:02d}:00"
+            )
+        )
+        for n in range(12)
+    ]))
+    yield store
+    asyncio.run(store.aclose())
+
+
+def pages(store: MemoryStore, **kwargs):
+    """Follow next_cursor to the end, returning the IDs on each page."""
+    async def scenario():
+        result, cursor = [], None
+        while True:
+            page = await store.list_memories(cursor=cursor, **kwargs)
+            result.append([memory["id"] for memory in page["memories"]])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                return result
+    return asyncio.run(scenario())
+
+
+def test_cursor_round_trip():
+    key = ("2024-01-01T00:00:00", "id with \"quotes\"")
+    assert decode_cursor(encode_cursor(key)) == key
+    with pytest.raises(ValueError):
+        decode_cursor("not a cursor")
+
+
+def test_listing_pages_newest_first_by_default(listing_store):
+    assert pages(listing_store, limit=5) == [
+        ["m11", "m10", "m09", "m08", "m07"],
+        ["m06", "m05", "m04", "m03", "m02"],
+        ["m01", "m00"]
+    ]
+
+
+def test_listing_pages_oldest_first(listing_store):
+    assert pages(listing_store, limit=6, order="oldest") == [
+        [f"m{n:02d}" for n in range(6)],
+        [f"m{n:02d}" for n in range(6, 12)]
+    ]
+
+
+def test_listing_filters_by_category_across_pages(listing_store):
+    assert pages(listing_store, limit=4, category="work") == [["m10", "m08", "m06", "m04"], ["m02", "m00"]]
+    assert pages(listing_store, limit=4, category="personal", order="oldest") == [
+        ["m01", "m03", "m05", "m07"],
+        ["m09", "m11"]
+    ]
+    assert pages(listing_store, limit=4, category="travel") == [[]]
+
+
+def test_cursor_stays_stable_while_memories_are_added(listing_store):
+    async def scenario():
+        first = await listing_store.list_memories(limit=4)
+        # Newer than every listed memory, and one with the same time as the last
+        await listing_store.add_memories([
+            ("new", MemoryStore.build_record("newest", timestamp="2024-01-02T00:00:00")),
+            ("m08b", MemoryStore.build_record("tied", timestamp="2024-01-01T00:08:00"))
+        ])
+        second = await listing_store.list_memories(limit=4, cursor=first["next_cursor"])
+        return first, second
+    
+    first, second = asyncio.run(scenario())
+    assert [m["id"] for m in first["memories"]] == ["m11", "m10", "m09", "m08"]
+    # Ties on created_at are ordered by ID, so m08b sorts after m08 and is skipped
+    assert [m["id"] for m in second["memories"]] == ["m07", "m06", "m05", "m04"]
+
+
+def test_invalid_listing_arguments_are_rejected(listing_store):
+    with pytest.raises(ValueError):
+        asyncio.run(listing_store.list_memories(cursor="garbage"))
+    assert "error" in asyncio.run(listing_store.list_memories(order="random"))
\ No newline at end of file
@@ -0,0 +1,108 @@
+"""Tests for the Prometheus metrics endpoint."""
+
+import asyncio
+
+import pytest
+
+import index
+from metrics import render_metrics
+from resilience import ResilientCaller
+
+
+class Flaky(Exception):
+    """Retryable error, like a 503."""
+    status = 503
+
+
+class FakeClient:
+    """Exposes the stats collect_metrics reads, backed by a real ResilientCaller."""
+    
+    def __init__(self, resilience: ResilientCaller):
+        self.resilience = resilience
+    
+    def get_query_cache_stats(self):
+        return {"enabled": False}
+    
+    def get_mirror_stats(self):
+        return {"enabled": False, "local_queries": 0, "remote_queries": 0}
+    
+    def get_resilience_stats(self):
+        return self.resilience.get_stats()
+
+
+@pytest.fixture
+def client(monkeypatch):
+    client = FakeClient(ResilientCaller(retry_base=0.001, retry_max=0.001))
+    monkeypatch.setattr(index.context, "pinecone_client", client)
+    monkeypatch.setattr(index.context, "initialized", False)
+    return client
+
+
+def samples(text: str, name: str) -> dict:
+    """Map each sample line of a family to its value."""
+    return {
+        line.split(" ")[0]: float(line.split(" ")[1])
+        for line in text.splitlines()
+        if line.startswith(name + "{")
+    }
+
+
+def test_resilience_counters_are_scraped(client):
+    resilience = client.resilience
+    
+    async def scenario():
+        failures = iter([Flaky("busy")])
+        
+        async def flaky_upsert():
+            error = next(failures, None)
+            if error is not None:
+                raise error
+            return "ok"
+        
+        async def slow_query():
+            await asyncio.sleep(0.05)
+            return "slow"
+        
+        await resilience.call("upsert", flaky_upsert)
+        await resilience.call("query", slow_query, hedge_after=0.01)
+        resilience.record_fallback("query")
+        return await render_metrics()
+    
+    text = asyncio.run(scenario())
+    assert "# TYPE memory_backend_retries_total counter" in text
+    assert samples(text, "memory_backend_retries_total") == {
+        'memory_backend_retries_total{backend="pinecone",operation="query"}': 0,
+        'memory_backend_retries_total{backend="pinecone",operation="upsert"}': 1
+    }
+    calls = samples(text, "memory_backend_calls_total")
+    assert calls['memory_backend_calls_total{backend="pinecone",operation="upsert",kind="success"}'] == 1
+    assert calls['memory_backend_calls_total{backend="pinecone",operation="upsert",kind="failure"}'] == 0
+    hedges = samples(text, "memory_backend_hedges_total")
+    assert hedges['memory_backend_hedges_total{backend="pinecone",operation="query",kind="launched"}'] == 1
+    assert samples(text, "memory_backend_fallbacks_total")[
+        'memory_backend_fallbacks_total{backend="pinecone",operation="query"}'
+    ] == 1
+    assert samples(text, "memory_circuit_open") == {}
+    assert "memory_circuit_open 0" in text
+
+
+def test_short_circuited_calls_are_scraped(client):
+    resilience = client.resilience
+    resilience.breaker.failure_threshold = 1
+    
+    async def scenario():
+        async def down():
+            raise Flaky("down")
+        
+        for _ in range(2):
+            try:
+                await resilience.call("fetch", down)
+            except Exception:
+                pass
+        return await render_metrics()
+    
+    text = asyncio.run(scenario())
+    calls = samples(text, "memory_backend_calls_total")
+    assert calls['memory_backend_calls_total{backend="pinecone",operation="fetch",kind="failure"}'] == 1
+    assert calls['memory_backend_calls_total{backend="pinecone",operation="fetch",kind="short_circuited"}'] == 1
+    assert "memory_circuit_open 1" in text
\ No newline at end of file
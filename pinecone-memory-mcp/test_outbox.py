@@ -0,0 +1,177 @@
+"""Tests for the durable outbox and its background worker."""
+
+import asyncio
+import time
+
+import pytest
+
+import outbox
+from outbox import WriteOutbox, OutboxWorker
+
+
+class FakeClient:
+    """Records upserts; IDs in reject are refused."""
+    
+    def __init__(self, reject=()):
+        self.reject = set(reject)
+        self.vectors = {}
+    
+    async def upsert_memories(self, vectors):
+        results = []
+        for vector in vectors:
+            ok = vector["id"] not in self.reject
+            if ok:
+                self.vectors[vector["id"]] = vector
+            results.append(ok)
+        return results
+
+
+def payload(text: str) -> dict:
+    return {"full_text": text, "metadata": {"memory_text": text}}
+
+
+@pytest.fixture
+def embed(monkeypatch):
+    """Embed every text except those containing "poison", which fail with a zero vector."""
+    calls = []
+    
+    async def fake_generate_embeddings(texts, model=None):
+        calls.append(list(texts))
+        return [[0.0, 0.0] if "poison" in text else [1.0, 0.5] for text in texts]
+    
+    monkeypatch.setattr(outbox, "generate_embeddings", fake_generate_embeddings)
+    monkeypatch.setattr(outbox, "embedding_metadata", lambda: {"embedding_model": "test"})
+    return calls
+
+
+def test_spooled_entries_survive_a_restart(tmp_path):
+    path = str(tmp_path / "outbox.db")
+    
+    async def spool():
+        box = WriteOutbox(path)
+        await box.record("mem_1", payload("first"))
+        await box.record("mem_2", payload("second"))
+        box.close()
+    
+    async def reopen():
+        box = WriteOutbox(path)
+        try:
+            return [entry["id"] for entry in await box.pending()], await box.get_stats()
+        finally:
+            box.close()
+    
+    asyncio.run(spool())
+    ids, stats = asyncio.run(reopen())
+    assert ids == ["mem_1", "mem_2"]
+    assert stats["pending"] == 2
+    assert stats["dead_lettered"] == 0
+
+
+def test_worker_indexes_entries_left_from_a_previous_run(tmp_path, embed):
+    path = str(tmp_path / "outbox.db")
+    client = FakeClient()
+    
+    async def scenario():
+        box = WriteOutbox(path)
+        await box.record("mem_1", payload("left over"))
+        box.close()
+        
+        box = WriteOutbox(path)
+        worker = OutboxWorker(box, client)
+        worker.start()
+        for _ in range(100):
+            if not (await box.get_stats())["pending"]:
+                break
+            await asyncio.sleep(0.01)
+        await worker.stop()
+        stats = await box.get_stats()
+        box.close()
+        return stats
+    
+    stats = asyncio.run(scenario())
+    assert stats["pending"] == 0
+    assert client.vectors["mem_1"]["metadata"] == {"memory_text": "left over", "embedding_model": "test"}
+
+
+def test_failed_entries_are_rescheduled_with_backoff(embed):
+    client = FakeClient(reject={"mem_rejected"})
+    
+    async def scenario():
+        box = WriteOutbox(None)
+        worker = OutboxWorker(box, client, retry_base=10, retry_max=10)
+        for memory_id, text in (("mem_ok", "fine"), ("mem_poison", "poison"), ("mem_rejected", "fine too")):
+            await box.record(memory_id, payload(text))
+        
+        before = time.time()
+        await worker.process(await box.due())
+        pending = {entry["id"]: entry for entry in await box.pending()}
+        return box, worker, pending, before
+    
+    box, worker, pending, before = asyncio.run(scenario())
+    # Zero vectors are never sent to the index
+    assert set(client.vectors) == {"mem_ok"}
+    assert set(pending) == {"mem_poison", "mem_rejected"}
+    assert pending["mem_poison"]["last_error"] == "embedding failed"
+    assert pending["mem_rejected"]["last_error"] == "upsert failed"
+    for entry in pending.values():
+        assert entry["attempts"] == 1
+        assert before <= entry["next_attempt_at"] <= time.time() + 10
+    assert not worker.healthy
+    assert worker.get_stats()["failed_attempts"] == 2
+    box.close()
+
+
+def test_entries_are_dead_lettered_after_max_attempts(embed):
+    client = FakeClient()
+    
+    async def scenario():
+        box = WriteOutbox(None)
+        worker = OutboxWorker(box, client, retry_base=0, retry_max=0, max_attempts=3)
+        await box.record("mem_poison", payload("poison"))
+        
+        for _ in range(3):
+            assert (await box.get_stats())["pending"] == 1
+            await worker.process(await box.due())
+        
+        stats = await box.get_stats()
+        healthy = worker.healthy
+        
+        requeued = await box.requeue_dead_letters()
+        entries = await box.due()
+        box.close()
+        return stats, healthy, worker.get_stats(), requeued, entries
+    
+    stats, healthy, worker_stats, requeued, entries = asyncio.run(scenario())
+    assert stats["pending"] == 0
+    assert stats["dead_lettered"] == 1
+    # A buried entry no longer marks the worker unhealthy
+    assert healthy
+    assert worker_stats["dead_lettered"] == 1
+    assert worker_stats["failed_attempts"] == 3
+    
+    assert requeued == 1
+    assert [entry["id"] for entry in entries] == ["mem_poison"]
+    assert entries[0]["attempts"] == 0
+
+
+def test_dead_letters_survive_a_restart(tmp_path, embed):
+    path = str(tmp_path / "outbox.db")
+    
+    async def bury():
+        box = WriteOutbox(path)
+        worker = OutboxWorker(box, FakeClient(), retry_base=0, retry_max=0, max_attempts=1)
+        await box.record("mem_poison", payload("poison"))
+        await worker.process(await box.due())
+        box.close()
+    
+    async def reopen():
+        box = WriteOutbox(path)
+        try:
+            return await box.get_stats()
+        finally:
+            box.close()
+    
+    asyncio.run(bury())
+    stats = asyncio.run(reopen())
+    assert stats["pending"] == 0
+    assert stats["dead_lettered"] == 1
\ No newline at end of file
@@ -0,0 +1,124 @@
+"""Tests for the query result cache."""
+
+import asyncio
+
+import pytest
+
+import query_cache
+from pinecone_client import PineconeMemoryClient
+from query_cache import QueryCache, make_query_key
+from vector_backend import LocalVectorBackend
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(query_cache.time, "monotonic", clock)
+    return clock
+
+
+def result(*ids):
+    return {"memories": [{"id": memory_id} for memory_id in ids], "count": len(ids)}
+
+
+def test_key_covers_embedding_top_k_and_filter():
+    key = make_query_key([0.1, 0.2], 5, {"category": "work", "created_ts": {"$gte": 1}})
+    assert key == make_query_key([0.1, 0.2], 5, {"created_ts": {"$gte": 1}, "category": "work"})
+    assert key != make_query_key([0.1, 0.2], 6, {"category": "work", "created_ts": {"$gte": 1}})
+    assert key != make_query_key([0.1, 0.2], 5, {"category": "work"})
+    assert key != make_query_key([0.1, 0.3], 5, {"category": "work", "created_ts": {"$gte": 1}})
+    assert make_query_key([0.1], 5, None) == make_query_key([0.1], 5, {})
+
+
+def test_hits_return_copies(clock):
+    cache = QueryCache()
+    assert cache.get([1.0, 0.0], 5) is None
+    cache.put([1.0, 0.0], 5, None, result("a", "b"))
+    
+    hit = cache.get([1.0, 0.0], 5)
+    assert hit == result("a", "b")
+    hit["memories"].append({"id": "mutated"})
+    assert cache.get([1.0, 0.0], 5) == result("a", "b")
+    assert cache.get([1.0, 0.0], 5, {"category": "work"}) is None
+    
+    stats = cache.get_stats()
+    assert (stats["hits"], stats["misses"]) == (2, 2)
+    assert stats["hit_rate"] == 0.5
+
+
+def test_entries_expire_after_the_ttl(clock):
+    cache = QueryCache(ttl_seconds=60)
+    cache.put([1.0], 5, None, result("a"))
+    clock.now += 59
+    assert cache.get([1.0], 5) is not None
+    clock.now += 1
+    assert cache.get([1.0], 5) is None
+    assert len(cache) == 0
+    assert cache.get_stats()["expirations"] == 1
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = QueryCache(max_entries=2)
+    cache.put([1.0], 5, None, result("a"))
+    cache.put([2.0], 5, None, result("b"))
+    # Reading "a" makes "b" the least recently used
+    cache.get([1.0], 5)
+    cache.put([3.0], 5, None, result("c"))
+    assert cache.get([2.0], 5) is None
+    assert cache.get([1.0], 5) is not None and cache.get([3.0], 5) is not None
+    assert cache.get_stats()["evictions"] == 1
+
+
+def test_invalidation_drops_entries_and_in_flight_results(clock):
+    cache = QueryCache(semantic_threshold=0.9)
+    cache.put([1.0, 0.0], 5, None, result("a"))
+    generation = cache.generation
+    
+    cache.invalidate()
+    assert len(cache) == 0
+    assert cache.get([1.0, 0.0], 5) is None
+    # A query that started before the write must not repopulate the cache
+    cache.put([1.0, 0.0], 5, None, result("stale"), generation)
+    assert cache.get([1.0, 0.0], 5) is None
+    cache.put([1.0, 0.0], 5, None, result("fresh"), cache.generation)
+    assert cache.get([1.0, 0.0], 5) == result("fresh")
+
+
+def test_semantic_hits_need_the_same_top_k_and_filter(clock):
+    cache = QueryCache(semantic_threshold=0.99)
+    cache.put([1.0, 0.0], 5, {"category": "work"}, result("a"))
+    assert cache.get([1.0, 0.05], 5, {"category": "work"}) == result("a")
+    assert cache.get([1.0, 0.5], 5, {"category": "work"}) is None
+    assert cache.get([1.0, 0.05], 3, {"category": "work"}) is None
+    assert cache.get([1.0, 0.05], 5, None) is None
+    assert cache.get_stats()["semantic_hits"] == 1
+
+
+def test_client_writes_invalidate_cached_queries(monkeypatch):
+    monkeypatch.setenv("QUERY_CACHE_SIZE", "16")
+    monkeypatch.delenv("LOCAL_VECTOR_INDEX", raising=False)
+    backend = LocalVectorBackend(dimension=2)
+    
+    async def scenario():
+        client = PineconeMemoryClient(backend)
+        await client.upsert_memories([{"id": "a", "values": [1.0, 0.0], "metadata": {}}])
+        first = await client.query_memories([1.0, 0.1], top_k=5)
+        cached = await client.query_memories([1.0, 0.1], top_k=5)
+        await client.upsert_memories([{"id": "b", "values": [1.0, 0.1], "metadata": {}}])
+        after_write = await client.query_memories([1.0, 0.1], top_k=5)
+        await client.aclose()
+        return first, cached, after_write, client.get_query_cache_stats()
+    
+    first, cached, after_write, stats = asyncio.run(scenario())
+    assert [m["id"] for m in first["memories"]] == ["a"]
+    assert cached == first
+    assert [m["id"] for m in after_write["memories"]] == ["b", "a"]
+    assert stats["hits"] == 1 and stats["invalidations"] >= 1
\ No newline at end of file
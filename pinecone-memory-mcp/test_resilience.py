@@ -0,0 +1,216 @@
+"""Tests for the circuit breaker and ResilientCaller."""
+
+import asyncio
+
+import pytest
+
+import resilience
+from resilience import CircuitBreaker, CircuitOpenError, ResilientCaller
+
+
+class FakeClock:
+    """Stands in for time.monotonic so breaker resets need no sleeping."""
+    
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(resilience.time, "monotonic", fake)
+    return fake
+
+
+def open_breaker(clock, threshold=2, reset=30.0) -> CircuitBreaker:
+    breaker = CircuitBreaker(failure_threshold=threshold, reset_seconds=reset)
+    for _ in range(threshold):
+        breaker.record_failure()
+    return breaker
+
+
+class Unavailable(Exception):
+    """Retryable backend error."""
+    status = 503
+
+
+def test_breaker_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_seconds=30)
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    assert breaker.allow()
+    
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+    assert breaker.get_stats()["opened"] == 1
+    assert breaker.get_stats()["short_circuited"] == 1
+
+
+def test_success_resets_the_failure_count(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=30)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == "closed"
+
+
+def test_open_breaker_lets_one_probe_through_after_reset(clock):
+    breaker = open_breaker(clock)
+    clock.now += 29
+    assert not breaker.allow()
+    
+    clock.now += 1
+    assert breaker.allow()
+    assert breaker.state == "half_open"
+    # Only one probe at a time
+    assert not breaker.allow()
+
+
+def test_successful_probe_closes_the_breaker(clock):
+    breaker = open_breaker(clock)
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow() and breaker.allow()
+
+
+def test_failed_probe_reopens_the_breaker(clock):
+    breaker = open_breaker(clock)
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+    
+    clock.now += 30
+    assert breaker.allow()
+
+
+def test_cancelled_probe_releases_the_half_open_slot(clock):
+    breaker = open_breaker(clock)
+    clock.now += 30
+    caller = ResilientCaller(breaker=breaker)
+    started = asyncio.Event()
+    
+    async def hang():
+        started.set()
+        await asyncio.sleep(60)
+    
+    async def succeed():
+        return "ok"
+    
+    async def scenario():
+        probe = asyncio.ensure_future(caller.call("query", hang))
+        await started.wait()
+        assert breaker.state == "half_open"
+        with pytest.raises(CircuitOpenError):
+            await caller.call("query", succeed)
+        
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+        assert breaker.state == "half_open"
+        
+        # The next call becomes the probe instead of being short-circuited forever
+        assert await caller.call("query", succeed) == "ok"
+        assert breaker.state == "closed"
+    
+    asyncio.run(scenario())
+
+
+def test_cancelled_call_does_not_release_another_calls_probe(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=30)
+    caller = ResilientCaller(breaker=breaker)
+    started = asyncio.Event()
+    
+    async def hang():
+        started.set()
+        await asyncio.sleep(60)
+    
+    async def scenario():
+        # Started while closed, so this call never holds the probe
+        bystander = asyncio.ensure_future(caller.call("query", hang))
+        await started.wait()
+        breaker.record_failure()
+        clock.now += 30
+        assert breaker.allow()
+        
+        bystander.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await bystander
+        assert not breaker.allow()
+    
+    asyncio.run(scenario())
+
+
+def test_retryable_errors_are_retried_and_counted(clock):
+    caller = ResilientCaller(max_attempts=3, retry_base=0, breaker=CircuitBreaker(failure_threshold=10))
+    attempts = []
+    
+    async def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise Unavailable("try again")
+        return "ok"
+    
+    assert asyncio.run(caller.call("upsert", flaky)) == "ok"
+    stats = caller.get_stats()["operations"]["upsert"]
+    assert stats["retries"] == 2
+    assert stats["successes"] == 1
+
+
+def test_bad_requests_are_not_retried_and_do_not_trip_the_breaker(clock):
+    breaker = CircuitBreaker(failure_threshold=1)
+    caller = ResilientCaller(max_attempts=3, retry_base=0, breaker=breaker)
+    attempts = []
+    
+    async def invalid():
+        attempts.append(1)
+        raise ValueError("bad vector")
+    
+    with pytest.raises(ValueError):
+        asyncio.run(caller.call("upsert", invalid))
+    assert len(attempts) == 1
+    assert breaker.state == "closed"
+
+
+def test_hedged_call_cancels_its_requests_when_the_deadline_expires():
+    caller = ResilientCaller(deadlines={"query": 0.05}, max_attempts=1)
+    requests = []
+    
+    async def slow():
+        requests.append(asyncio.current_task())
+        await asyncio.sleep(60)
+    
+    async def scenario():
+        with pytest.raises(asyncio.TimeoutError):
+            await caller.call("query", slow, hedge_after=0.01)
+        await asyncio.sleep(0)
+        assert len(requests) == 2
+        assert all(task.cancelled() for task in requests)
+    
+    asyncio.run(scenario())
+
+
+def test_primary_request_is_cancelled_before_the_hedge_starts():
+    caller = ResilientCaller(deadlines={"query": 0.05}, max_attempts=1)
+    requests = []
+    
+    async def slow():
+        requests.append(asyncio.current_task())
+        await asyncio.sleep(60)
+    
+    async def scenario():
+        with pytest.raises(asyncio.TimeoutError):
+            await caller.call("query", slow, hedge_after=10)
+        await asyncio.sleep(0)
+        assert len(requests) == 1
+        assert requests[0].cancelled()
+    
+    asyncio.run(scenario())
\ No newline at end of file
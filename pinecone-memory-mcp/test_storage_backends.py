@@ -0,0 +1,166 @@
+"""Tests for the JSON and SQLite storage backends."""
+
+import json
+import sqlite3
+
+import pytest
+
+from storage_backends import (
+    JSONStorageBackend,
+    SQLiteStorageBackend,
+    create_storage_backend,
+    migrate_json_to_sqlite
+)
+
+
+def record(text: str, category: str = "general", created_at: str = "2024-01-01T00:00:00") -> dict:
+    return {"text": text, "category": category, "keywords": [], "created_at": created_at}
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def open_backend(request, tmp_path):
+    """Open (or reopen) a backend of each kind on the same file."""
+    path = tmp_path / ("store.json" if request.param == "json" else "store.db")
+    opened = []
+    
+    def open_():
+        backend = create_storage_backend(request.param, str(path))
+        opened.append(backend)
+        return backend
+    
+    yield open_
+    for backend in opened:
+        backend.close()
+
+
+def test_apply_reports_per_operation_results(open_backend):
+    backend = open_backend()
+    results = backend.apply([
+        ("add", "a", record("first")),
+        ("add", "a", record("duplicate")),
+        ("put", "b", record("second")),
+        ("remove", "missing", None),
+        ("put", "a", record("replaced", "work")),
+        ("remove", "b", None)
+    ])
+    assert results == [True, False, True, False, True, True]
+    assert backend.get_memory_ids() == ["a"]
+    assert backend.get_memory("a")["text"] == "replaced"
+    assert backend.get_memory("b") is None
+
+
+def test_lookups_and_stats(open_backend):
+    backend = open_backend()
+    assert backend.add_many([
+        ("a", record("alpha", "work")),
+        ("b", record("beta", "personal")),
+        ("c", record("gamma", "work"))
+    ]) == 3
+    assert set(backend.get_memories(["a", "c", "missing"])) == {"a", "c"}
+    assert [r["id"] for r in backend.get_memories_by_category("work")] == ["a", "c"]
+    assert [memory_id for memory_id, _ in backend.iter_memories()] == ["a", "b", "c"]
+    
+    stats = backend.get_stats()
+    assert stats["total_memories"] == 3
+    assert stats["categories"] == {"work": 2, "personal": 1}
+    assert stats["last_updated"]
+
+
+def test_records_survive_reopening(open_backend):
+    backend = open_backend()
+    backend.add_memory("a", record("alpha"))
+    backend.add_memory("b", record("beta"))
+    backend.remove_memory("a")
+    backend.close()
+    
+    reopened = open_backend()
+    assert reopened.get_memory_ids() == ["b"]
+    assert reopened.get_memory("b")["text"] == "beta"
+
+
+def test_unknown_operation_is_rejected(open_backend):
+    with pytest.raises(ValueError):
+        open_backend().apply([("upsert", "a", record("alpha"))])
+
+
+def test_json_backend_reloads_after_another_writer(tmp_path):
+    path = str(tmp_path / "store.json")
+    first, second = JSONStorageBackend(path), JSONStorageBackend(path)
+    first.add_memory("a", record("alpha"))
+    reloads = second.reloads
+    assert second.get_memory_ids() == ["a"]
+    assert second.reloads == reloads + 1
+    # Unchanged file: served from memory
+    second.get_memory_ids()
+    assert second.reloads == reloads + 1
+
+
+def test_json_file_keeps_its_format(tmp_path):
+    path = tmp_path / "store.json"
+    JSONStorageBackend(str(path)).add_memory("a", record("alpha"))
+    data = json.loads(path.read_text())
+    assert data["vector_ids"] == ["a"]
+    assert data["memories"]["a"]["text"] == "alpha"
+    assert data["total_memories"] == 1
+
+
+def test_sqlite_backend_uses_wal(tmp_path):
+    path = str(tmp_path / "store.db")
+    SQLiteStorageBackend(path).close()
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_migration_copies_records_once(tmp_path):
+    json_path, sqlite_path = str(tmp_path / "store.json"), str(tmp_path / "store.db")
+    source = JSONStorageBackend(json_path)
+    source.add_many([("a", record("alpha", "work")), ("b", record("beta"))])
+    
+    assert migrate_json_to_sqlite(json_path, sqlite_path) == 2
+    assert migrate_json_to_sqlite(json_path, sqlite_path) == 0
+    target = SQLiteStorageBackend(sqlite_path)
+    try:
+        assert target.get_memory_ids() == ["a", "b"]
+        assert target.get_memory("a") == source.get_memory("a")
+    finally:
+        target.close()
+
+
+def test_migration_requires_the_json_store(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        migrate_json_to_sqlite(str(tmp_path / "missing.json"), str(tmp_path / "store.db"))
+
+def test_stats_track_category_changes(open_backend):
+    backend = open_backend()
+    backend.apply([
+        ("add", "a", record("alpha", "work")),
+        ("add", "b", record("beta", "work")),
+        ("put", "a", record("alpha", "personal")),
+        ("put", "b", record("beta again", "work")),
+        ("add", "b", record("duplicate", "travel")),
+        ("remove", "missing", None)
+    ])
+    assert backend.get_stats()["categories"] == {"personal": 1, "work": 1}
+    backend.remove_memory("b")
+    stats = backend.get_stats()
+    assert stats["categories"] == {"personal": 1}
+    assert stats["total_memories"] == 1
+
+
+def test_sqlite_counts_existing_databases_once(tmp_path):
+    path = str(tmp_path / "store.db")
+    backend = SQLiteStorageBackend(path)
+    backend.add_many([("a", record("alpha", "work")), ("b", record("beta"))])
+    backend.close()
+    # A database written before category counts were kept
+    with sqlite3.connect(path) as conn:
+        conn.execute("DROP TABLE category_counts")
+        conn.execute("DELETE FROM store_meta WHERE key = 'category_counts'")
+    
+    reopened = SQLiteStorageBackend(path)
+    try:
+        assert reopened.get_stats()["categories"] == {"general": 1, "work": 1}
+        reopened.add_memory("c", record("gamma", "work"))
+        assert reopened.get_stats()["categories"] == {"general": 1, "work": 2}
+    finally:
+        reopened.close()
\ No newline at end of file
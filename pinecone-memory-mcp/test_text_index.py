@@ -0,0 +1,78 @@
+"""Tests for the in-memory BM25 text index."""
+
+import pytest
+
+from text_index import InvertedIndex, tokenize
+
+
+@pytest.fixture
+def index():
+    index = InvertedIndex()
+    index.add("python", "I write most of my scripts in python")
+    index.add("pythons", "python python python is my favourite language")
+    index.add("rust", "Learning rust for systems programming")
+    index.add("coffee", "I drink coffee every morning", keywords=["caffeine"])
+    return index
+
+
+def ids(results):
+    return [doc_id for doc_id, _ in results]
+
+
+def test_tokenize_lowercases_and_drops_punctuation():
+    assert tokenize("Hello, World! v2") == ["hello", "world", "v2"]
+
+
+def test_higher_term_frequency_ranks_first(index):
+    assert ids(index.search("python")) == ["pythons", "python"]
+
+
+def test_rare_terms_outweigh_common_ones(index):
+    index.add("both", "my coffee and rust notes")
+    results = index.search("my rust", mode="or")
+    # "rust" is in two documents, "my" in three
+    assert ids(results)[0] == "both"
+    assert set(ids(results)) == {"both", "rust", "python", "pythons"}
+
+
+def test_and_requires_every_term(index):
+    assert ids(index.search("python scripts")) == ["python"]
+    assert index.search("python coffee") == []
+    assert set(ids(index.search("python coffee", mode="or"))) == {"python", "pythons", "coffee"}
+
+
+def test_prefix_matching(index):
+    assert ids(index.search("progr")) == ["rust"]
+    assert index.search("progr", prefix=False) == []
+    # Single-character terms only match exactly
+    assert index.search("p") == []
+
+
+def test_keywords_are_weighted_and_searchable(index):
+    assert ids(index.search("caffeine")) == ["coffee"]
+    index.add("tea", "caffeine in tea")
+    assert ids(index.search("caffeine")) == ["coffee", "tea"]
+
+
+def test_limit_and_scores_are_ordered(index):
+    results = index.search("python my", mode="or", limit=2)
+    assert len(results) == 2
+    assert results[0][1] >= results[1][1]
+
+
+def test_replacing_and_removing_documents(index):
+    index.add("rust", "Now writing go instead")
+    assert index.search("rust") == []
+    assert ids(index.search("go")) == ["rust"]
+    
+    assert index.remove("rust") is True
+    assert index.remove("rust") is False
+    assert "rust" not in index
+    assert index.search("go") == []
+    assert index.search("programming") == []
+    assert len(index) == 3
+
+
+def test_unknown_mode_is_rejected(index):
+    with pytest.raises(ValueError):
+        index.search("python", mode="xor")
\ No newline at end of file
@@ -0,0 +1,175 @@
+"""Tests for resumable export and import of the memory corpus."""
+
+import asyncio
+import json
+
+import pytest
+
+import transfer
+from pinecone_client import PineconeMemoryClient
+from transfer import export_memories, import_memories
+from vector_backend import LocalVectorBackend
+
+
+def vector(n: int, dimension: int = 4, **metadata) -> dict:
+    values = [1.0] + [0.0] * (dimension - 1)
+    values[1 + n % (dimension - 1)] = (n + 1) / 300
+    return {"id": f"m{n:03d}", "values": values, "metadata": {"memory_text": f"memory {n}", **metadata}}
+
+
+@pytest.fixture(autouse=True)
+def environment(monkeypatch):
+    monkeypatch.delenv("LOCAL_VECTOR_INDEX", raising=False)
+    monkeypatch.setenv("QUERY_CACHE_SIZE", "0")
+    monkeypatch.setattr(transfer, "embedding_metadata", lambda model=None: {"embedding_model": "current"})
+
+
+def client_for(backend: LocalVectorBackend) -> PineconeMemoryClient:
+    return PineconeMemoryClient(backend)
+
+
+@pytest.fixture
+def source():
+    """Backend holding 250 memories, listed in pages of 100."""
+    backend = LocalVectorBackend(dimension=4)
+    backend.upsert([vector(n) for n in range(250)], "memories")
+    return backend
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def exported_ids(directory) -> list:
+    manifest = json.loads((directory / "manifest.json").read_text())
+    return [
+        record["id"]
+        for part in manifest["parts"]
+        for record in transfer.read_part(directory / part["file"], manifest["format"])
+    ]
+
+
+@pytest.mark.parametrize("fmt", ["jsonl", "npz"])
+def test_round_trip(source, tmp_path, fmt):
+    manifest = run(export_memories(client_for(source), str(tmp_path), fmt=fmt, part_size=100))
+    assert manifest["complete"] and manifest["exported"] == 250
+    assert [part["count"] for part in manifest["parts"]] == [100, 100, 50]
+    assert manifest["dimension"] == 4
+    
+    target = LocalVectorBackend(dimension=4)
+    totals = run(import_memories(client_for(target), str(tmp_path)))
+    assert totals == {"imported": 250, "reembedded": 0, "failed": 0, "skipped_parts": 0}
+    
+    ids = [f"m{n:03d}" for n in range(250)]
+    copied, original = target.fetch(ids, "memories"), source.fetch(ids, "memories")
+    assert copied.keys() == original.keys()
+    for vector_id in ids:
+        assert copied[vector_id]["metadata"] == original[vector_id]["metadata"]
+        assert copied[vector_id]["values"] == pytest.approx(original[vector_id]["values"], abs=1e-6)
+
+
+def test_interrupted_export_resumes_from_the_saved_token(source, tmp_path):
+    client = client_for(source)
+    fetch = client.fetch_vectors
+    calls = []
+    
+    async def failing_fetch(ids):
+        calls.append(ids)
+        if len(calls) == 2:
+            raise ConnectionError("network down")
+        return await fetch(ids)
+    
+    client.fetch_vectors = failing_fetch
+    with pytest.raises(ConnectionError):
+        run(export_memories(client, str(tmp_path), part_size=100))
+    
+    partial = json.loads((tmp_path / "manifest.json").read_text())
+    assert not partial["complete"]
+    assert partial["exported"] == 100 and partial["next_token"] == "m099"
+    
+    # Rerunning continues after m099 instead of starting over
+    manifest = run(export_memories(client, str(tmp_path), part_size=100))
+    assert manifest["complete"] and manifest["exported"] == 250
+    assert calls[2][0] == "m100"
+    assert exported_ids(tmp_path) == [f"m{n:03d}" for n in range(250)]
+
+
+def test_finished_export_is_not_repeated(source, tmp_path):
+    client = client_for(source)
+    first = run(export_memories(client, str(tmp_path), part_size=100))
+    source.upsert([vector(999)], "memories")
+    assert run(export_memories(client, str(tmp_path), part_size=100)) == first
+    with pytest.raises(ValueError):
+        run(export_memories(client, str(tmp_path / "other"), fmt="csv"))
+
+
+def test_partial_export_keeps_its_format(source, tmp_path):
+    client = client_for(source)
+    fetch = client.fetch_vectors
+    
+    async def failing_fetch(ids):
+        if ids[0] == "m100":
+            raise ConnectionError("network down")
+        return await fetch(ids)
+    
+    client.fetch_vectors = failing_fetch
+    with pytest.raises(ConnectionError):
+        run(export_memories(client, str(tmp_path), part_size=100))
+    with pytest.raises(ValueError):
+        run(export_memories(client, str(tmp_path), fmt="npz", part_size=100))
+    with pytest.raises(ValueError):
+        run(import_memories(client_for(LocalVectorBackend(dimension=4)), str(tmp_path)))
+
+
+def test_interrupted_import_skips_finished_parts(source, tmp_path):
+    run(export_memories(client_for(source), str(tmp_path), part_size=100))
+    target = LocalVectorBackend(dimension=4)
+    client = client_for(target)
+    upsert = client.upsert_memories
+    
+    async def failing_upsert(vectors):
+        if vectors[0]["id"] == "m100":
+            return [False] * len(vectors)
+        return await upsert(vectors)
+    
+    client.upsert_memories = failing_upsert
+    totals = run(import_memories(client, str(tmp_path)))
+    assert totals["imported"] == 150 and totals["failed"] == 100
+    
+    resumed = run(import_memories(client_for(target), str(tmp_path)))
+    assert resumed == {"imported": 100, "reembedded": 0, "failed": 0, "skipped_parts": 2}
+    assert target.describe_stats()["namespaces"]["memories"] == 250
+
+
+def test_only_incompatible_vectors_are_reembedded(tmp_path, monkeypatch):
+    source = LocalVectorBackend(dimension=4)
+    source.upsert([
+        vector(0, embedding_model="current"),
+        vector(1),
+        vector(2, embedding_model="older-model")
+    ], "memories")
+    run(export_memories(client_for(source), str(tmp_path)))
+    
+    embedded = []
+    
+    async def fake_generate_embeddings(texts, model=None):
+        embedded.extend(texts)
+        return [[0.5, 0.5, 0.5, 0.5] for _ in texts]
+    
+    monkeypatch.setattr(transfer, "generate_embeddings", fake_generate_embeddings)
+    target = LocalVectorBackend(dimension=4)
+    totals = run(import_memories(client_for(target), str(tmp_path)))
+    assert totals["imported"] == 3 and totals["reembedded"] == 1
+    assert embedded == ["memory 2"]
+    assert target.fetch(["m002"], "memories")["m002"]["metadata"]["embedding_model"] == "current"
+    
+    # A target index of another dimension re-embeds everything
+    embedded.clear()
+    monkeypatch.setattr(
+        transfer, "generate_embeddings",
+        lambda texts, model=None: asyncio.sleep(0, [[1.0] * 8 for _ in texts])
+    )
+    monkeypatch.setenv("PINECONE_INDEX_NAME", "wider-index")
+    wider = LocalVectorBackend(dimension=8)
+    totals = run(import_memories(client_for(wider), str(tmp_path)))
+    assert totals == {"imported": 3, "reembedded": 3, "failed": 0, "skipped_parts": 0}
\ No newline at end of file
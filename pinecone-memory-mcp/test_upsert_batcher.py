@@ -0,0 +1,98 @@
+"""Tests for write-behind upsert batching."""
+
+import asyncio
+
+from resilience import CircuitOpenError, DeadlineExceededError
+from upsert_batcher import UpsertBatcher, estimate_vector_bytes
+
+
+class Rejected(Exception):
+    """Non-retryable error, like a 400 for a malformed vector."""
+    status = 400
+
+
+class Unavailable(Exception):
+    """Retryable error, like a 503."""
+    status = 503
+
+
+class FakeIndex:
+    """Records upsert requests; raises the given error for requests containing a bad ID."""
+    
+    def __init__(self, bad_ids=(), error=None):
+        self.bad_ids = set(bad_ids)
+        self.error = error
+        self.requests = []
+    
+    async def upsert(self, vectors):
+        self.requests.append([vector["id"] for vector in vectors])
+        if self.error is not None and (not self.bad_ids or self.bad_ids & {vector["id"] for vector in vectors}):
+            raise self.error
+
+
+def vector(memory_id: str, size: int = 4) -> dict:
+    return {"id": memory_id, "values": [0.1] * size, "metadata": {"memory_text": memory_id}}
+
+
+def submit_all(batcher: UpsertBatcher, ids):
+    async def scenario():
+        return await asyncio.gather(*(batcher.submit(vector(memory_id)) for memory_id in ids))
+    return asyncio.run(scenario())
+
+
+def test_concurrent_upserts_share_one_request():
+    index = FakeIndex()
+    batcher = UpsertBatcher(index.upsert, max_delay_ms=5)
+    assert submit_all(batcher, ["a", "b", "c"]) == [True, True, True]
+    assert index.requests == [["a", "b", "c"]]
+    assert batcher.get_stats()["avg_batch_size"] == 3
+
+
+def test_batches_are_capped_by_count():
+    index = FakeIndex()
+    batcher = UpsertBatcher(index.upsert, max_batch_size=2, max_delay_ms=5)
+    assert all(submit_all(batcher, ["a", "b", "c", "d", "e"]))
+    assert index.requests == [["a", "b"], ["c", "d"], ["e"]]
+
+
+def test_batches_are_capped_by_payload_size():
+    index = FakeIndex()
+    limit = estimate_vector_bytes(vector("a")) * 2
+    batcher = UpsertBatcher(index.upsert, max_batch_bytes=limit, max_delay_ms=5)
+    assert all(submit_all(batcher, ["a", "b", "c"]))
+    assert index.requests == [["a", "b"], ["c"]]
+
+
+def test_rejected_vector_is_isolated_by_bisection():
+    index = FakeIndex(bad_ids={"c"}, error=Rejected("bad vector"))
+    batcher = UpsertBatcher(index.upsert, max_delay_ms=5)
+    assert submit_all(batcher, ["a", "b", "c", "d"]) == [True, True, False, True]
+    assert index.requests[0] == ["a", "b", "c", "d"]
+    assert ["c"] in index.requests
+    assert batcher.get_stats()["vectors_failed"] == 1
+
+
+def test_transient_errors_fail_the_batch_without_bisecting():
+    for error in (Unavailable("down"), CircuitOpenError("open"), DeadlineExceededError("slow")):
+        index = FakeIndex(error=error)
+        batcher = UpsertBatcher(index.upsert, max_delay_ms=5)
+        assert submit_all(batcher, ["a", "b", "c", "d"]) == [False] * 4
+        assert index.requests == [["a", "b", "c", "d"]]
+        stats = batcher.get_stats()
+        assert stats["batch_retries"] == 0
+        assert stats["batches_failed"] == 1
+        assert stats["vectors_failed"] == 4
+
+
+def test_flush_writes_buffered_vectors_before_the_delay():
+    index = FakeIndex()
+    batcher = UpsertBatcher(index.upsert, max_delay_ms=60_000)
+    
+    async def scenario():
+        pending = asyncio.ensure_future(batcher.submit(vector("a")))
+        await asyncio.sleep(0)
+        await batcher.aclose()
+        return await pending
+    
+    assert asyncio.run(scenario()) is True
+    assert index.requests == [["a"]]
\ No newline at end of file
@@ -0,0 +1,103 @@
+"""Tests for the in-process local vector backend."""
+
+import time
+
+import pytest
+
+import vector_backend
+from vector_backend import LocalVectorBackend, create_vector_backend
+
+
+def vector(vector_id: str, values=(1.0, 0.0, 0.0, 0.0), **metadata) -> dict:
+    return {"id": vector_id, "values": list(values), "metadata": metadata}
+
+
+@pytest.fixture(params=["numpy", "pure_python"])
+def backend(request, monkeypatch):
+    """Local backend on the NumPy index and on the pure-Python fallback."""
+    if request.param == "pure_python":
+        monkeypatch.setattr(vector_backend, "NUMPY_AVAILABLE", False)
+    return LocalVectorBackend(dimension=4)
+
+
+def list_all(backend: LocalVectorBackend, limit: int, namespace: str = "ns"):
+    pages, token = [], None
+    while True:
+        ids, token = backend.list_ids(namespace, limit, token)
+        pages.append(ids)
+        if token is None:
+            return pages
+
+
+def test_list_ids_pages_in_sorted_order(backend):
+    backend.upsert([vector(f"id-{n}") for n in (3, 0, 4, 1, 2)], "ns")
+    assert list_all(backend, 2) == [["id-0", "id-1"], ["id-2", "id-3"], ["id-4"]]
+    assert list_all(backend, 5) == [["id-0", "id-1", "id-2", "id-3", "id-4"]]
+    assert list_all(backend, 2, "empty") == [[]]
+
+
+def test_list_ids_sees_writes_between_pages(backend):
+    backend.upsert([vector(f"id-{n}") for n in range(4)], "ns")
+    first, token = backend.list_ids("ns", 2)
+    assert first == ["id-0", "id-1"]
+    
+    backend.upsert([vector("id-9"), vector("id-0", (0.0, 1.0, 0.0, 0.0))], "ns")
+    backend.delete(["id-2"], "ns")
+    rest, token = backend.list_ids("ns", 10, token)
+    assert rest == ["id-3", "id-9"]
+    assert token is None
+    
+    # Overwriting existing vectors keeps the listing
+    backend.upsert([vector("id-3", (0.0, 0.0, 1.0, 0.0))], "ns")
+    assert list_all(backend, 10) == [["id-0", "id-1", "id-3", "id-9"]]
+
+
+def test_upsert_checks_the_dimension(backend):
+    with pytest.raises(ValueError):
+        backend.upsert([vector("short", (1.0, 0.0))], "ns")
+
+
+def test_query_applies_filters(backend):
+    backend.upsert([
+        vector("a", (1.0, 0.0, 0.0, 0.0), category="work", keywords=["python"]),
+        vector("b", (0.9, 0.1, 0.0, 0.0), category="idea", keywords=["rust"]),
+        vector("c", (0.0, 1.0, 0.0, 0.0), category="work")
+    ], "ns")
+    query = [1.0, 0.0, 0.0, 0.0]
+    assert [m["id"] for m in backend.query(query, 3, "ns")] == ["a", "b", "c"]
+    assert [m["id"] for m in backend.query(query, 3, "ns", {"category": "work"})] == ["a", "c"]
+    assert [m["id"] for m in backend.query(query, 3, "ns", {"keywords": {"$nin": ["python"]}})] == ["b", "c"]
+    assert backend.query(query, 3, "other") == []
+
+
+def test_fetch_update_and_delete(backend):
+    backend.upsert([vector("a", category="work"), vector("b")], "ns")
+    backend.update_metadata("a", {"pinned": True}, "ns")
+    fetched = backend.fetch(["a", "missing"], "ns")
+    assert list(fetched) == ["a"]
+    assert fetched["a"]["metadata"] == {"category": "work", "pinned": True}
+    assert fetched["a"]["values"] == pytest.approx([1.0, 0.0, 0.0, 0.0])
+    
+    backend.delete(["a", "missing"], "ns")
+    assert backend.fetch(["a", "b"], "ns").keys() == {"b"}
+
+
+def test_describe_stats_counts_non_empty_namespaces(backend):
+    backend.upsert([vector("a"), vector("b")], "ns")
+    backend.upsert([vector("c")], "other")
+    backend.delete(["c"], "other")
+    assert backend.describe_stats() == {"dimension": 4, "index_fullness": 0.0, "namespaces": {"ns": 2}}
+
+
+def test_injected_latency(monkeypatch):
+    monkeypatch.setenv("LOCAL_BACKEND_LATENCY_MS", "20")
+    backend = create_vector_backend("local", dimension=4)
+    assert isinstance(backend, LocalVectorBackend) and backend.dimension == 4
+    start = time.perf_counter()
+    backend.fetch(["a"], "ns")
+    assert time.perf_counter() - start >= 0.02
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        create_vector_backend("faiss")
\ No newline at end of file
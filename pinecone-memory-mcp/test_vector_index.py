@@ -0,0 +1,188 @@
+"""Tests for Pinecone-compatible filtering and the local vector index."""
+
+import pytest
+
+from vector_index import LocalVectorIndex, ids_digest, matches_filter, rank_vectors
+
+
+METADATA = {"category": "work", "keywords": ["python", "deploy"], "created_ts": 100.0, "pinned": True}
+
+
+@pytest.mark.parametrize("filter_dict, expected", [
+    (None, True),
+    ({}, True),
+    ({"category": "work"}, True),
+    ({"category": {"$eq": "personal"}}, False),
+    ({"category": {"$ne": "personal"}}, True),
+    ({"category": {"$in": ["work", "idea"]}}, True),
+    ({"category": {"$nin": ["work"]}}, False),
+    ({"created_ts": {"$gte": 100, "$lt": 200}}, True),
+    ({"created_ts": {"$gt": 100}}, False),
+    ({"created_ts": {"$lte": 99.5}}, False),
+    # Comparing incompatible types does not match instead of raising
+    ({"category": {"$gt": 5}}, False),
+    # Several fields mean AND
+    ({"category": "work", "pinned": False}, False),
+])
+def test_scalar_conditions(filter_dict, expected):
+    assert matches_filter(METADATA, filter_dict) is expected
+
+
+@pytest.mark.parametrize("condition, expected", [
+    # Positive operators match if any element does
+    ("python", True),
+    ({"$in": ["rust", "deploy"]}, True),
+    ({"$in": ["rust"]}, False),
+    # Negative operators match only if no element violates them
+    ({"$ne": "python"}, False),
+    ({"$ne": "rust"}, True),
+    ({"$nin": ["rust", "go"]}, True),
+    ({"$nin": ["rust", "deploy"]}, False),
+])
+def test_list_fields(condition, expected):
+    assert matches_filter(METADATA, {"keywords": condition}) is expected
+
+
+@pytest.mark.parametrize("condition, expected", [
+    ("work", False),
+    ({"$in": ["work"]}, False),
+    ({"$gt": 0}, False),
+    # Missing fields satisfy only negative operators
+    ({"$ne": "work"}, True),
+    ({"$nin": ["work"]}, True),
+    ({"$exists": False}, True),
+    ({"$exists": True}, False),
+])
+def test_missing_fields(condition, expected):
+    assert matches_filter(METADATA, {"missing": condition}) is expected
+    assert matches_filter(None, {"missing": condition}) is expected
+
+
+def test_logical_operators():
+    assert matches_filter(METADATA, {"$or": [{"category": "idea"}, {"keywords": "deploy"}]})
+    assert not matches_filter(METADATA, {"$or": [{"category": "idea"}, {"pinned": False}]})
+    assert matches_filter(METADATA, {"$and": [{"category": "work"}, {"created_ts": {"$lt": 101}}]})
+    assert not matches_filter(METADATA, {"$and": [{"category": "work"}, {"$or": [{"pinned": False}]}]})
+    assert matches_filter(METADATA, {"category": {"$exists": True}})
+
+
+def test_unknown_operator_is_rejected():
+    with pytest.raises(ValueError):
+        matches_filter(METADATA, {"category": {"$regex": "w.*"}})
+
+
+def unit(*values):
+    return list(values)
+
+
+@pytest.fixture
+def index():
+    index = LocalVectorIndex()
+    index.upsert([
+        {"id": "east", "values": unit(1.0, 0.0), "metadata": {"category": "work", "n": 0}},
+        {"id": "north-east", "values": unit(1.0, 1.0), "metadata": {"category": "personal", "n": 1}},
+        {"id": "north", "values": unit(0.0, 2.0), "metadata": {"category": "work", "n": 2}},
+        {"id": "west", "values": unit(-1.0, 0.0), "metadata": {"category": "idea", "n": 3}}
+    ])
+    return index
+
+
+def ids(matches):
+    return [match["id"] for match in matches]
+
+
+def test_query_ranks_by_cosine_similarity(index):
+    matches = index.query([1.0, 0.1], top_k=3)
+    assert ids(matches) == ["east", "north-east", "north"]
+    assert matches[0]["score"] == pytest.approx(0.995, abs=1e-3)
+    assert matches[0]["metadata"] == {"category": "work", "n": 0}
+
+
+def test_query_filters_and_restricts_ids(index):
+    assert ids(index.query([1.0, 0.1], top_k=2, filter_dict={"category": "work"})) == ["east", "north"]
+    assert ids(index.query([1.0, 0.1], top_k=5, ids=["west", "north", "unknown"])) == ["north", "west"]
+    assert index.query([1.0, 0.1], top_k=5, ids=["unknown"]) == []
+    assert index.query([1.0, 0.1], top_k=0) == []
+
+
+def test_filtered_query_widens_its_window_until_enough_match():
+    index = LocalVectorIndex(2)
+    # The 200 best-scoring vectors fail the filter; only the worst two pass
+    index.upsert(
+        {"id": f"near-{n}", "values": [1.0, n / 1000], "metadata": {"rare": False}}
+        for n in range(200)
+    )
+    index.upsert([
+        {"id": "far-1", "values": [-1.0, 0.1], "metadata": {"rare": True}},
+        {"id": "far-2", "values": [-1.0, 0.2], "metadata": {"rare": True}}
+    ])
+    assert ids(index.query([1.0, 0.0], top_k=2, filter_dict={"rare": True})) == ["far-2", "far-1"]
+    assert ids(index.query([1.0, 0.0], top_k=5, filter_dict={"rare": True})) == ["far-2", "far-1"]
+
+
+def test_delete_moves_the_last_row_into_the_hole(index):
+    index.delete(["east", "unknown"])
+    assert len(index) == 3 and "east" not in index
+    # "west" was the last row and now fills the deleted slot
+    fetched = index.fetch(["west", "north"])
+    assert fetched["west"]["values"] == pytest.approx([-1.0, 0.0])
+    assert fetched["west"]["metadata"] == {"category": "idea", "n": 3}
+    assert ids(index.query([-1.0, 0.0], top_k=1)) == ["west"]
+    assert ids(index.query([1.0, 0.0], top_k=1)) == ["north-east"]
+    
+    index.delete(["west", "north", "north-east"])
+    assert len(index) == 0
+    assert index.query([1.0, 0.0]) == []
+
+
+def test_upsert_replaces_and_updates_metadata(index):
+    index.upsert([{"id": "east", "values": [0.0, -1.0], "metadata": {"category": "idea"}}])
+    assert len(index) == 4
+    assert ids(index.query([0.0, -1.0], top_k=1)) == ["east"]
+    assert index.update_metadata("east", {"pinned": True})
+    assert index.fetch(["east"])["east"]["metadata"] == {"category": "idea", "pinned": True}
+    assert not index.update_metadata("unknown", {"pinned": True})
+    with pytest.raises(ValueError):
+        index.upsert([{"id": "bad", "values": [1.0, 0.0, 0.0]}])
+
+
+def test_snapshot_round_trip(index, tmp_path):
+    path = str(tmp_path / "mirror.npz")
+    index.save(path)
+    loaded = LocalVectorIndex.load(path)
+    assert loaded.ids() == index.ids()
+    assert loaded.fetch(loaded.ids()) == index.fetch(index.ids())
+    assert loaded.watermark == index.compute_watermark()
+    # The loaded index keeps working, including swap-deletes
+    loaded.delete(["north-east"])
+    assert ids(loaded.query([1.0, 0.0], top_k=2)) == ["east", "north"]
+
+
+def test_empty_snapshot_round_trip(tmp_path):
+    path = str(tmp_path / "mirror.npz")
+    LocalVectorIndex().save(path)
+    loaded = LocalVectorIndex.load(path)
+    assert len(loaded) == 0
+    loaded.upsert([{"id": "a", "values": [1.0, 0.0, 0.0]}])
+    assert loaded.dimension == 3
+
+
+def test_watermark_tracks_ids_and_newest_timestamp(index):
+    watermark = index.compute_watermark()
+    assert watermark["count"] == 4 and watermark["newest_ts"] is None
+    assert watermark["ids_digest"] == ids_digest(["west", "north", "east", "north-east"])
+    assert ids_digest(["a", "b"]) != ids_digest(["a", "c"])
+    
+    index.update_metadata("north", {"created_ts": 50.0})
+    index.update_metadata("west", {"created_ts": 75.0})
+    assert index.compute_watermark()["newest_ts"] == 75.0
+
+
+def test_rank_vectors_without_an_index():
+    candidates = {
+        "a": {"values": [1.0, 0.0], "metadata": {"category": "work"}},
+        "b": {"values": [0.0, 1.0], "metadata": {"category": "idea"}},
+        "c": {"values": [0.7, 0.7], "metadata": {"category": "work"}}
+    }
+    assert ids(rank_vectors([1.0, 0.2], candidates, top_k=2)) == ["a", "c"]
+    assert ids(rank_vectors([1.0, 0.2], candidates, filter_dict={"category": "idea"})) == ["b"]
\ No newline at end of file
@@ -0,0 +1,95 @@
+"""Tests for warm-starting the local vector mirror from its snapshot."""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from pinecone_client import PineconeMemoryClient
+from vector_backend import LocalVectorBackend
+from vector_index import LocalVectorIndex
+
+
+def vector(n: int, **metadata) -> dict:
+    values = [0.0] * 4
+    values[n % 4] = 1.0
+    values[(n + 1) % 4] = 0.5 + n / 100
+    return {"id": f"m{n}", "values": values, "metadata": {"created_ts": 1000.0 + n, **metadata}}
+
+
+@pytest.fixture
+def snapshot(tmp_path, monkeypatch):
+    path = str(tmp_path / "mirror.npz")
+    monkeypatch.setenv("LOCAL_VECTOR_INDEX", "1")
+    monkeypatch.setenv("LOCAL_VECTOR_SNAPSHOT", path)
+    monkeypatch.setenv("LOCAL_VECTOR_VERIFY_SAMPLE", "100")
+    return path
+
+
+@pytest.fixture
+def backend(snapshot):
+    """Backend holding m0..m9, with a mirror snapshot saved after a full sync."""
+    backend = LocalVectorBackend(dimension=4)
+    backend.upsert([vector(n) for n in range(10)], "memories")
+    
+    async def sync():
+        client = PineconeMemoryClient(backend)
+        await client.sync_mirror()
+    
+    asyncio.run(sync())
+    return backend
+
+
+def warm_start(backend: LocalVectorBackend) -> PineconeMemoryClient:
+    """Start a client and wait for its mirror to warm."""
+    async def scenario():
+        client = PineconeMemoryClient(backend)
+        await client._warm_mirror()
+        return client
+    return asyncio.run(scenario())
+
+
+def test_current_snapshot_is_loaded_without_a_resync(backend):
+    client = warm_start(backend)
+    assert client.mirror_ready
+    assert client.get_mirror_stats()["synced_vectors"] == 0
+    assert sorted(client.mirror.ids()) == sorted(f"m{n}" for n in range(10))
+
+
+def test_replaced_memory_with_the_same_count_forces_a_resync(backend):
+    # Another writer deletes one memory and adds an older-dated one
+    backend.delete(["m3"], "memories")
+    backend.upsert([{**vector(42), "metadata": {"created_ts": 5.0}}], "memories")
+    client = warm_start(backend)
+    assert client.get_mirror_stats()["synced_vectors"] == 10
+    assert "m42" in client.mirror and "m3" not in client.mirror
+
+
+def test_newer_memory_forces_a_resync(backend):
+    # Same ID set, but a memory was re-created after the snapshot
+    backend.upsert([vector(5, created_ts=99999.0)], "memories")
+    client = warm_start(backend)
+    assert client.get_mirror_stats()["synced_vectors"] == 10
+    assert client.mirror.fetch(["m5"])["m5"]["metadata"]["created_ts"] == 99999.0
+
+
+@pytest.mark.parametrize("change", ["metadata", "values"])
+def test_changed_vectors_force_a_resync(backend, change):
+    if change == "metadata":
+        backend.update_metadata("m7", {"category": "work"}, "memories")
+    else:
+        backend.upsert([{**vector(7), "values": [0.0, 0.0, 0.0, 1.0]}], "memories")
+    client = warm_start(backend)
+    assert client.get_mirror_stats()["synced_vectors"] == 10
+    assert client.mirror.differing_ids(backend.fetch(["m7"], "memories"), ["m7"]) == []
+
+
+def test_snapshot_without_a_watermark_forces_a_resync(backend, snapshot):
+    with np.load(snapshot) as data:
+        legacy = {name: data[name] for name in data.files if name != "watermark"}
+    np.savez(snapshot, **legacy)
+    assert LocalVectorIndex.load(snapshot).watermark is None
+    
+    client = warm_start(backend)
+    assert client.mirror_ready
+    assert client.get_mirror_stats()["synced_vectors"] == 10
\ No newline at end of file